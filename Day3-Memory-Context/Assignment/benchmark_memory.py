@@ -0,0 +1,393 @@
+"""
+Day 3b: Memory Service Benchmarks
+
+Offline benchmarks for the memory services used in day_3b_agent_memory.py.
+No API key or network is needed: sessions are filled with synthetic events.
+
+Benchmarks:
+- search: ingest + search latency of InMemoryMemoryService vs BM25MemoryService
+          at 10k / 100k / 1M stored events
+- vector: ingest + query latency of FaissMemoryService (HNSW) and its
+          recall@k against an exact (brute-force) index
+- ingest: per-turn auto-save over a 500-turn session, whole-session
+          add_session_to_memory vs IncrementalMemoryIngestor vs
+          WriteBehindMemoryQueue (turn time = submit only, flush reported)
+- sqlite: bulk ingest + search latency of SqliteMemoryService and its cold
+          start (reopen the file) vs replaying sessions into BM25MemoryService
+- growth: store size and search latency over simulated days of auto-save,
+          with and without MemoryMaintenanceJob (consolidation + TTL + cap)
+
+Usage:
+    python benchmark_memory.py search
+    python benchmark_memory.py search --sizes 10000 100000
+    python benchmark_memory.py vector --sizes 10000 100000
+    python benchmark_memory.py ingest --turns 500
+    python benchmark_memory.py sqlite --sizes 10000 100000
+    python benchmark_memory.py growth --days 30 --events-per-day 5000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+
+from google.adk.events import Event
+from google.adk.memory import InMemoryMemoryService
+from google.adk.sessions import Session
+from google.genai import types
+
+from bm25_memory_service import BM25MemoryService
+from incremental_memory import IncrementalMemoryIngestor
+from memory_consolidation import MemoryMaintenanceJob, MemoryMaintenancePolicy
+from sqlite_memory_service import SqliteMemoryService
+from write_behind_memory import WriteBehindMemoryQueue
+from vector_memory_service import FaissMemoryService, HashingEmbedder
+
+APP_NAME = "MemoryBenchApp"
+USER_ID = "bench_user"
+EVENTS_PER_SESSION = 100
+
+# ============================================================================
+# Synthetic Data
+# ============================================================================
+
+_SUBJECTS = ["color", "birthday", "nephew", "toy", "city", "food", "sport",
+             "book", "movie", "song", "car", "pet", "job", "hobby", "trip"]
+_ADJECTIVES = ["favorite", "new", "old", "best", "first", "last", "blue-green",
+               "red", "quiet", "busy", "small", "large", "spicy", "sweet"]
+_FILLER = ["the", "a", "my", "is", "was", "on", "about", "and", "with", "for",
+           "really", "think", "remember", "today", "yesterday", "week"]
+# Facts users restate over and over (what consolidation should merge)
+_FACTS = [
+    "My favorite color is blue-green.",
+    "My birthday is on March 15th.",
+    "I gifted a new toy to my nephew on his 1st birthday!",
+    "I live in Warsaw and work as a teacher.",
+    "I am allergic to peanuts.",
+]
+_QUERIES = [
+    "What is the user's favorite color?",
+    "When is my birthday?",
+    "What did I gift my nephew?",
+    "Which city did I visit on my last trip?",
+    "What is my favorite spicy food?",
+]
+
+
+def make_event(rng: random.Random, index: int, timestamp: float = None) -> Event:
+    """Build one synthetic conversation event without pydantic validation."""
+    words = [rng.choice(_FILLER) for _ in range(8)]
+    words += [rng.choice(_ADJECTIVES), rng.choice(_SUBJECTS), f"item{index % 5000}"]
+    rng.shuffle(words)
+    return Event.model_construct(
+        id=uuid.uuid4().hex,
+        invocation_id="bench",
+        author="user" if index % 2 == 0 else "model",
+        content=types.Content(
+            role="user" if index % 2 == 0 else "model",
+            parts=[types.Part(text=" ".join(words))],
+        ),
+        timestamp=timestamp if timestamp is not None else 1_700_000_000.0 + index,
+        actions=None,
+    )
+
+
+def make_sessions(num_events: int, seed: int = 0) -> list[Session]:
+    """Split num_events synthetic events into sessions of EVENTS_PER_SESSION."""
+    rng = random.Random(seed)
+    sessions = []
+    for start in range(0, num_events, EVENTS_PER_SESSION):
+        count = min(EVENTS_PER_SESSION, num_events - start)
+        sessions.append(
+            Session.model_construct(
+                id=f"session-{start // EVENTS_PER_SESSION}",
+                app_name=APP_NAME,
+                user_id=USER_ID,
+                state={},
+                events=[make_event(rng, start + i) for i in range(count)],
+                last_update_time=0.0,
+            )
+        )
+    return sessions
+
+
+# ============================================================================
+# Measurement Helpers
+# ============================================================================
+
+
+async def time_ingest(memory_service, sessions) -> float:
+    """Return seconds spent adding all sessions to memory."""
+    start = time.perf_counter()
+    for session in sessions:
+        await memory_service.add_session_to_memory(session)
+    return time.perf_counter() - start
+
+
+async def time_searches(memory_service, repeats: int) -> dict:
+    """Run every benchmark query `repeats` times and summarize latency (ms)."""
+    latencies = []
+    results = 0
+    for _ in range(repeats):
+        for query in _QUERIES:
+            start = time.perf_counter()
+            response = await memory_service.search_memory(
+                app_name=APP_NAME, user_id=USER_ID, query=query
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            results = len(response.memories)
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "results": results,
+    }
+
+
+# ============================================================================
+# Benchmarks
+# ============================================================================
+
+
+async def bench_search(sizes: list[int], repeats: int, baseline_max: int):
+    """Compare ingest and search latency of the keyword scan vs BM25 index."""
+    print(f"{'events':>10} {'service':<22} {'ingest s':>10} "
+          f"{'p50 ms':>10} {'p95 ms':>10} {'hits':>6}")
+    print("-" * 74)
+
+    for size in sizes:
+        sessions = make_sessions(size)
+        services = [("BM25MemoryService", BM25MemoryService(top_k=10))]
+        if size <= baseline_max:
+            services.insert(0, ("InMemoryMemoryService", InMemoryMemoryService()))
+
+        for name, service in services:
+            ingest = await time_ingest(service, sessions)
+            search = await time_searches(service, repeats)
+            print(f"{size:>10} {name:<22} {ingest:>10.2f} "
+                  f"{search['p50']:>10.3f} {search['p95']:>10.3f} {search['results']:>6}")
+
+        if size > baseline_max:
+            print(f"{size:>10} {'InMemoryMemoryService':<22} "
+                  f"{'skipped (--baseline-max)':>38}")
+
+
+async def bench_vector(sizes: list[int], repeats: int, top_k: int):
+    """Measure FaissMemoryService latency and HNSW recall vs exact search."""
+    import faiss
+    import numpy as np
+
+    print(f"{'events':>10} {'ingest s':>10} {'p50 ms':>10} {'p95 ms':>10} "
+          f"{'recall@k':>10}")
+    print("-" * 56)
+
+    for size in sizes:
+        sessions = make_sessions(size)
+        service = FaissMemoryService(embedder=HashingEmbedder(dim=256), top_k=top_k)
+        ingest = await time_ingest(service, sessions)
+        search = await time_searches(service, repeats)
+
+        # Recall of the HNSW index against brute-force inner product
+        user_index = service._indexes[(APP_NAME, USER_ID)].index
+        exact = faiss.IndexFlatIP(user_index.d)
+        exact.add(np.vstack([user_index.reconstruct(i) for i in range(user_index.ntotal)]))
+        queries = service.embedder(_QUERIES)
+        approx_scores, _ = user_index.search(queries, top_k)
+        exact_scores, _ = exact.search(queries, top_k)
+        # Synthetic events share a small vocabulary, so many have identical
+        # scores; count a hit as any result scoring at least the exact k-th.
+        recall = np.mean(approx_scores >= exact_scores[:, -1:] - 1e-6)
+
+        print(f"{size:>10} {ingest:>10.2f} {search['p50']:>10.3f} "
+              f"{search['p95']:>10.3f} {recall:>10.2f}")
+
+
+async def bench_ingest(turns: int):
+    """Simulate auto_save_to_memory after every turn of one long session."""
+    rng = random.Random(0)
+    turn_events = [
+        (make_event(rng, 2 * turn), make_event(rng, 2 * turn + 1))
+        for turn in range(turns)
+    ]
+
+    print(f"{'service':<22} {'mode':<12} {'total s':>10} {'last turn ms':>13} "
+          f"{'events sent':>12} {'flush s':>9}")
+    print("-" * 83)
+
+    for name, service_class in [
+        ("InMemoryMemoryService", InMemoryMemoryService),
+        ("BM25MemoryService", BM25MemoryService),
+    ]:
+        for mode in ["full", "incremental", "write-behind"]:
+            service = service_class()
+            ingestor = IncrementalMemoryIngestor(service)
+            memory_queue = WriteBehindMemoryQueue(service)
+            session = Session.model_construct(
+                id="long-session", app_name=APP_NAME, user_id=USER_ID,
+                state={}, events=[], last_update_time=0.0,
+            )
+            events_sent = 0
+            total = 0.0
+            last_turn = 0.0
+
+            for user_event, model_event in turn_events:
+                session.events.extend([user_event, model_event])
+                start = time.perf_counter()
+                if mode == "full":
+                    await service.add_session_to_memory(session)
+                    events_sent += len(session.events)
+                elif mode == "incremental":
+                    events_sent += await ingestor.ingest(session)
+                else:
+                    events_sent += await memory_queue.submit(session)
+                last_turn = time.perf_counter() - start
+                total += last_turn
+
+            start = time.perf_counter()
+            await memory_queue.close(flush=True)
+            flush = f"{time.perf_counter() - start:.3f}" if mode == "write-behind" else "-"
+
+            print(f"{name:<22} {mode:<12} {total:>10.3f} {last_turn * 1000:>13.3f} "
+                  f"{events_sent:>12} {flush:>9}")
+
+
+async def bench_sqlite(sizes: list[int], repeats: int):
+    """Measure SqliteMemoryService ingest, search and cold start."""
+    print(f"{'events':>10} {'bulk ingest s':>14} {'p50 ms':>10} {'p95 ms':>10} "
+          f"{'cold start ms':>14} {'replay s':>10}")
+    print("-" * 74)
+
+    for size in sizes:
+        sessions = make_sessions(size)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "memory.db")
+
+            service = SqliteMemoryService(db_path)
+            start = time.perf_counter()
+            await service.add_sessions_to_memory(sessions)
+            ingest = time.perf_counter() - start
+            search = await time_searches(service, repeats)
+            service.close()
+
+            # Cold start: open the file and answer one query
+            start = time.perf_counter()
+            service = SqliteMemoryService(db_path)
+            await service.search_memory(
+                app_name=APP_NAME, user_id=USER_ID, query=_QUERIES[0]
+            )
+            cold_start = (time.perf_counter() - start) * 1000
+            service.close()
+
+        # What a non-durable service pays instead: replay every session
+        replay = await time_ingest(BM25MemoryService(), sessions)
+
+        print(f"{size:>10} {ingest:>14.2f} {search['p50']:>10.3f} "
+              f"{search['p95']:>10.3f} {cold_start:>14.2f} {replay:>10.2f}")
+
+
+async def bench_growth(days: int, events_per_day: int, ttl_days: float, cap: int):
+    """Follow store size and search latency as auto-save runs day after day."""
+    day_seconds = 24 * 3600
+    start_time = 1_700_000_000.0
+    policy = MemoryMaintenancePolicy(
+        merge_threshold=0.85, ttl_seconds=ttl_days * day_seconds, max_memories=cap
+    )
+    unbounded = BM25MemoryService()
+    bounded = BM25MemoryService()
+    job = MemoryMaintenanceJob(bounded, policy)
+    rng = random.Random(0)
+
+    print(f"{'day':>5} {'unbounded size':>15} {'search ms':>10} "
+          f"{'bounded size':>13} {'search ms':>10} {'merged':>7} {'expired':>8} "
+          f"{'capped':>7}")
+    print("-" * 82)
+
+    for day in range(days):
+        now = start_time + day * day_seconds
+        events = [
+            make_event(rng, day * events_per_day + i, timestamp=now + i)
+            for i in range(events_per_day)
+        ]
+        # Every 10th user message restates a known fact
+        for event in events[::10]:
+            event.author = "user"
+            event.content = types.Content(
+                role="user", parts=[types.Part(text=rng.choice(_FACTS))]
+            )
+        for service in (unbounded, bounded):
+            await service.add_events_to_memory(
+                app_name=APP_NAME, user_id=USER_ID, events=events,
+                session_id=f"day-{day}",
+            )
+
+        reports = await job.run_once(now=now + day_seconds)
+        report = reports[(APP_NAME, USER_ID)]
+        unbounded_search = await time_searches(unbounded, 2)
+        bounded_search = await time_searches(bounded, 2)
+
+        print(f"{day + 1:>5} {unbounded.stats(APP_NAME, USER_ID)['documents']:>15} "
+              f"{unbounded_search['p50']:>10.3f} {report['after']:>13} "
+              f"{bounded_search['p50']:>10.3f} {report['merged']:>7} "
+              f"{report['expired']:>8} {report['capped']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory service benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    search_parser = subparsers.add_parser("search", help="BM25 vs keyword scan")
+    search_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    search_parser.add_argument("--repeats", type=int, default=20)
+    search_parser.add_argument(
+        "--baseline-max",
+        type=int,
+        default=100_000,
+        help="Largest size to also run the InMemoryMemoryService scan on",
+    )
+
+    vector_parser = subparsers.add_parser("vector", help="FAISS HNSW memory")
+    vector_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    vector_parser.add_argument("--repeats", type=int, default=20)
+    vector_parser.add_argument("--top-k", type=int, default=10)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Per-turn auto-save cost")
+    ingest_parser.add_argument("--turns", type=int, default=500)
+
+    sqlite_parser = subparsers.add_parser("sqlite", help="SQLite FTS5 memory")
+    sqlite_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    sqlite_parser.add_argument("--repeats", type=int, default=20)
+
+    growth_parser = subparsers.add_parser("growth", help="Store growth over time")
+    growth_parser.add_argument("--days", type=int, default=30)
+    growth_parser.add_argument("--events-per-day", type=int, default=5000)
+    growth_parser.add_argument("--ttl-days", type=float, default=7)
+    growth_parser.add_argument("--cap", type=int, default=20_000)
+
+    args = parser.parse_args()
+
+    if args.benchmark == "search":
+        asyncio.run(bench_search(args.sizes, args.repeats, args.baseline_max))
+    elif args.benchmark == "vector":
+        asyncio.run(bench_vector(args.sizes, args.repeats, args.top_k))
+    elif args.benchmark == "ingest":
+        asyncio.run(bench_ingest(args.turns))
+    elif args.benchmark == "sqlite":
+        asyncio.run(bench_sqlite(args.sizes, args.repeats))
+    elif args.benchmark == "growth":
+        asyncio.run(
+            bench_growth(args.days, args.events_per_day, args.ttl_days, args.cap)
+        )
+
+
+if __name__ == "__main__":
+    main()
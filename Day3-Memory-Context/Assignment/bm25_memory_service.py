@@ -0,0 +1,343 @@
+"""
+Day 3b: BM25 Memory Service
+
+An indexed, ranked replacement for InMemoryMemoryService.
+
+InMemoryMemoryService scans every stored event and counts shared keywords on
+each search. This service keeps an inverted index per (app_name, user_id) and
+ranks matches with BM25, so a search only touches the events that share at
+least one term with the query.
+
+Features:
+- Inverted index with BM25 ranking (k1 / b configurable)
+- Top-k limit on returned memories
+- Incremental index updates: re-adding a session only indexes new events
+- Tokenizer that handles both Latin text and CJK text (character bigrams)
+  and drops common English stopwords
+
+Usage:
+    from bm25_memory_service import BM25MemoryService
+
+    memory_service = BM25MemoryService(top_k=5)
+    runner = Runner(..., memory_service=memory_service)
+"""
+
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from google.adk.memory import BaseMemoryService
+from google.adk.memory.base_memory_service import SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+
+# ============================================================================
+# Tokenization
+# ============================================================================
+
+_WORD_RE = re.compile(r"\w+")
+
+# Very common English words match almost every event; indexing them makes
+# their posting lists as long as the store without helping the ranking.
+STOPWORDS = frozenset(
+    "a an and are as at be but by did do does for from had has have i in is it "
+    "its me my of on or so that the their this to was were what when where "
+    "which who why will with you your".split()
+)
+
+
+def _is_cjk(char: str) -> bool:
+    """Return True for characters of scripts written without spaces."""
+    code = ord(char)
+    return (
+        0x3040 <= code <= 0x30FF  # Hiragana / Katakana
+        or 0x3400 <= code <= 0x4DBF  # CJK Extension A
+        or 0x4E00 <= code <= 0x9FFF  # CJK Unified Ideographs
+        or 0xAC00 <= code <= 0xD7AF  # Hangul syllables
+        or 0xF900 <= code <= 0xFAFF  # CJK Compatibility Ideographs
+    )
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase index terms.
+
+    Latin words become one term each. Runs of CJK characters have no spaces,
+    so they are split into overlapping character bigrams ("蓝绿色" -> "蓝绿",
+    "绿色"); a single CJK character is kept as a unigram.
+    """
+    text = unicodedata.normalize("NFC", text).lower()
+    terms: List[str] = []
+
+    for word in _WORD_RE.findall(text):
+        if word.isascii():
+            if word not in STOPWORDS:
+                terms.append(word)
+            continue
+
+        # Split mixed-script words ("我喜欢python") into runs
+        run: List[str] = []
+        run_is_cjk = None
+        for char in word + " ":
+            char_is_cjk = _is_cjk(char) if char != " " else None
+            if run and char_is_cjk != run_is_cjk:
+                if run_is_cjk:
+                    if len(run) == 1:
+                        terms.append(run[0])
+                    else:
+                        terms.extend(a + b for a, b in zip(run, run[1:]))
+                else:
+                    terms.append("".join(run))
+                run = []
+            run.append(char)
+            run_is_cjk = char_is_cjk
+
+    return terms
+
+
+def event_text(event) -> str:
+    """Join the text parts of an event (or MemoryEntry)."""
+    if not event.content or not event.content.parts:
+        return ""
+    return " ".join(part.text for part in event.content.parts if part.text)
+
+
+def format_timestamp(timestamp: Optional[float]) -> Optional[str]:
+    """Format an event timestamp the same way ADK memory entries do."""
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+
+# ============================================================================
+# Per-user Inverted Index
+# ============================================================================
+
+
+class _UserIndex:
+    """Inverted index over the memory events of one (app_name, user_id)."""
+
+    def __init__(self):
+        self.next_doc_id = 0
+        self.entries: Dict[int, MemoryEntry] = {}
+        self.doc_terms: Dict[int, Counter] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+        self.postings: Dict[str, Dict[int, int]] = {}
+        # session_id -> {event_id: doc_id}
+        self.session_docs: Dict[str, Dict[str, int]] = {}
+        self.doc_sessions: Dict[int, str] = {}
+        self.doc_timestamps: Dict[int, float] = {}
+        # Event ids removed by delete_memories(): re-adding a session must not
+        # bring them back
+        self.deleted: Set[str] = set()
+
+    def add(self, session_id: str, event) -> bool:
+        """
+        Index one event. Returns False if it has no text, is already indexed
+        or was deleted.
+        """
+        docs = self.session_docs.setdefault(session_id, {})
+        if event.id in docs or event.id in self.deleted:
+            return False
+
+        text = event_text(event)
+        terms = Counter(tokenize(text))
+        if not terms:
+            return False
+
+        doc_id = self.next_doc_id
+        self.next_doc_id += 1
+
+        self.entries[doc_id] = MemoryEntry(
+            id=event.id,
+            content=event.content,
+            author=event.author,
+            timestamp=format_timestamp(event.timestamp),
+        )
+        self.doc_terms[doc_id] = terms
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+        for term, freq in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = freq
+        docs[event.id] = doc_id
+        self.doc_sessions[doc_id] = session_id
+        # An event without a timestamp is as old as its ingestion, not the epoch
+        self.doc_timestamps[doc_id] = event.timestamp or time.time()
+        return True
+
+    def remove(self, session_id: str, event_id: str) -> None:
+        """Drop one indexed event and its postings."""
+        doc_id = self.session_docs.get(session_id, {}).pop(event_id, None)
+        if doc_id is None:
+            return
+
+        for term in self.doc_terms.pop(doc_id):
+            posting = self.postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        del self.entries[doc_id]
+        del self.doc_sessions[doc_id]
+        del self.doc_timestamps[doc_id]
+
+    def search(
+        self, query: str, top_k: int, k1: float, b: float
+    ) -> List[Tuple[float, int]]:
+        """Return the top_k (score, doc_id) pairs for a query, best first."""
+        num_docs = len(self.entries)
+        if not num_docs:
+            return []
+
+        avg_length = self.total_length / num_docs
+        scores: Dict[int, float] = {}
+
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            # BM25 IDF, always positive
+            idf = math.log(1 + (num_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, freq in posting.items():
+                norm = k1 * (1 - b + b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * (
+                    freq * (k1 + 1) / (freq + norm)
+                )
+
+        # Ties keep insertion order (lower doc_id first)
+        return heapq.nlargest(top_k, ((s, -d) for d, s in scores.items()))
+
+
+# ============================================================================
+# BM25 Memory Service
+# ============================================================================
+
+
+class BM25MemoryService(BaseMemoryService):
+    """
+    In-process memory service with an inverted index and BM25 ranking.
+
+    Drop-in replacement for InMemoryMemoryService: same scoping by
+    (app_name, user_id), same MemoryEntry results, but searches are ranked and
+    limited to top_k, and ingestion is incremental.
+    """
+
+    def __init__(self, top_k: int = 10, k1: float = 1.2, b: float = 0.75):
+        self.top_k = top_k
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._indexes: Dict[Tuple[str, str], _UserIndex] = {}
+
+    def _index_for(self, app_name: str, user_id: str) -> _UserIndex:
+        key = (app_name, user_id)
+        if key not in self._indexes:
+            self._indexes[key] = _UserIndex()
+        return self._indexes[key]
+
+    async def add_session_to_memory(self, session) -> None:
+        """
+        Index a session's events.
+
+        A session may be added many times during its lifetime (e.g. after
+        every turn). Only events not indexed yet are tokenized; events that
+        disappeared from the session are dropped from the index.
+        """
+        with self._lock:
+            index = self._index_for(session.app_name, session.user_id)
+            current_ids = {event.id for event in session.events}
+            for event_id in list(index.session_docs.get(session.id, {})):
+                if event_id not in current_ids:
+                    index.remove(session.id, event_id)
+            for event in session.events:
+                index.add(session.id, event)
+
+    async def add_events_to_memory(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        events,
+        session_id: Optional[str] = None,
+        custom_metadata=None,
+    ) -> None:
+        """Index an explicit delta of events, skipping ones already indexed."""
+        with self._lock:
+            index = self._index_for(app_name, user_id)
+            for event in events:
+                index.add(session_id or "__unknown_session_id__", event)
+
+    async def search_memory(
+        self, *, app_name: str, user_id: str, query: str
+    ) -> SearchMemoryResponse:
+        """Return the top_k memories ranked by BM25 score."""
+        with self._lock:
+            index = self._indexes.get((app_name, user_id))
+            if index is None:
+                return SearchMemoryResponse()
+            ranked = index.search(query, self.top_k, self.k1, self.b)
+            memories = [index.entries[-neg_doc_id] for _, neg_doc_id in ranked]
+
+        return SearchMemoryResponse(memories=memories)
+
+    # ------------------------------------------------------------------------
+    # Maintenance (used by memory_consolidation.py)
+    # ------------------------------------------------------------------------
+
+    def users(self) -> List[Tuple[str, str]]:
+        """Return every (app_name, user_id) with stored memories."""
+        with self._lock:
+            return [key for key, index in self._indexes.items() if index.entries]
+
+    def list_memories(self, app_name: str, user_id: str) -> List[Dict]:
+        """Return id, author, timestamp and text of every stored memory."""
+        with self._lock:
+            index = self._indexes.get((app_name, user_id))
+            if index is None:
+                return []
+            return [
+                {
+                    "id": entry.id,
+                    "author": entry.author,
+                    "timestamp": index.doc_timestamps[doc_id],
+                    "text": event_text(entry),
+                }
+                for doc_id, entry in index.entries.items()
+            ]
+
+    def delete_memories(self, app_name: str, user_id: str, memory_ids) -> int:
+        """
+        Remove memories by id. Returns how many were removed.
+
+        Removed ids are remembered, so adding their session again does not
+        restore them.
+        """
+        memory_ids = set(memory_ids)
+        with self._lock:
+            index = self._indexes.get((app_name, user_id))
+            if index is None:
+                return 0
+            doomed = [
+                (index.doc_sessions[doc_id], entry.id)
+                for doc_id, entry in index.entries.items()
+                if entry.id in memory_ids
+            ]
+            for session_id, event_id in doomed:
+                index.remove(session_id, event_id)
+                index.deleted.add(event_id)
+            return len(doomed)
+
+    def stats(self, app_name: str, user_id: str) -> Dict[str, int]:
+        """Return index size counters for one user."""
+        with self._lock:
+            index = self._indexes.get((app_name, user_id))
+            if index is None:
+                return {"documents": 0, "terms": 0}
+            return {"documents": len(index.entries), "terms": len(index.postings)}
@@ -0,0 +1,197 @@
+"""
+Day 3b: Budgeted preload_memory
+
+The built-in `preload_memory` tool injects every memory returned by
+search_memory into every request. With a large memory store this bloats the
+prompt on each turn. BudgetedPreloadMemoryTool keeps the same behaviour but:
+
+- drops memories below a relevance threshold (query-term coverage by default)
+- drops near-identical memories ("My favorite color is blue-green" x5)
+- stops adding memories once a prompt-token budget is reached
+- records how many prompt tokens preload added to every model request
+
+Usage:
+    from budgeted_preload_memory import BudgetedPreloadMemoryTool
+
+    preload = BudgetedPreloadMemoryTool(max_tokens=300, min_relevance=0.2)
+    agent = LlmAgent(..., tools=[preload])
+    ...
+    print(preload.metrics_summary())
+"""
+
+import logging
+import re
+import unicodedata
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from google.adk.tools.preload_memory_tool import PreloadMemoryTool
+from google.genai import types
+
+from bm25_memory_service import tokenize
+
+logger = logging.getLogger(__name__)
+
+RelevanceFunction = Callable[[str, str], float]
+
+_MEMORY_CONTEXT_TEMPLATE = """The following content is from your previous conversations with the user.
+They may be useful for answering the user's current query.
+<PAST_CONVERSATIONS>
+{memories}
+</PAST_CONVERSATIONS>
+"""
+
+# ============================================================================
+# Helpers
+# ============================================================================
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap prompt-token estimate without a tokenizer.
+
+    ~4 characters per token for Latin text, 1 token per CJK character.
+    """
+    cjk = sum(1 for char in text if "\u3040" <= char <= "\u9fff")
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def term_coverage(query: str, text: str) -> float:
+    """Fraction of the query's terms that appear in the memory text (0..1)."""
+    query_terms = set(tokenize(query))
+    if not query_terms:
+        return 0.0
+    return len(query_terms & set(tokenize(text))) / len(query_terms)
+
+
+def _memory_text(memory) -> str:
+    """Join the text parts of a MemoryEntry."""
+    if not memory.content or not memory.content.parts:
+        return ""
+    return " ".join(part.text for part in memory.content.parts if part.text)
+
+
+def _shingles(text: str) -> Set[str]:
+    """Character 3-grams of normalized text, for near-duplicate detection."""
+    text = re.sub(r"\W+", " ", unicodedata.normalize("NFC", text).lower()).strip()
+    if len(text) < 3:
+        return {text}
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+# ============================================================================
+# Budgeted Preload Tool
+# ============================================================================
+
+
+class BudgetedPreloadMemoryTool(PreloadMemoryTool):
+    """PreloadMemoryTool with relevance cutoff, dedup and a token budget."""
+
+    def __init__(
+        self,
+        max_tokens: int = 500,
+        min_relevance: float = 0.2,
+        dedup_threshold: float = 0.8,
+        relevance_fn: Optional[RelevanceFunction] = None,
+    ):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.min_relevance = min_relevance
+        self.dedup_threshold = dedup_threshold
+        self.relevance_fn = relevance_fn or term_coverage
+        # One entry per model request the tool was applied to
+        self.turn_metrics: List[Dict[str, int]] = []
+
+    def select_memories(
+        self, query: str, memories
+    ) -> Tuple[List[str], Dict[str, int]]:
+        """
+        Filter ranked memories down to the lines injected into the prompt.
+
+        Returns the memory lines and this turn's metrics.
+        """
+        metrics = {
+            "retrieved": len(memories),
+            "used": 0,
+            "dropped_low_relevance": 0,
+            "dropped_duplicate": 0,
+            "dropped_budget": 0,
+            "tokens_added": 0,
+        }
+        lines: List[str] = []
+        kept_shingles: List[Set[str]] = []
+        budget = self.max_tokens - estimate_tokens(
+            _MEMORY_CONTEXT_TEMPLATE.format(memories="")
+        )
+
+        for memory in memories:
+            text = _memory_text(memory)
+            if not text:
+                continue
+            if self.relevance_fn(query, text) < self.min_relevance:
+                metrics["dropped_low_relevance"] += 1
+                continue
+
+            shingles = _shingles(text)
+            if any(
+                len(shingles & kept) / len(shingles | kept) >= self.dedup_threshold
+                for kept in kept_shingles
+            ):
+                metrics["dropped_duplicate"] += 1
+                continue
+
+            line = f"{memory.author}: {text}" if memory.author else text
+            if memory.timestamp:
+                line = f"Time: {memory.timestamp}\n{line}"
+            cost = estimate_tokens(line) + 1
+            if cost > budget:
+                # Later memories are ranked lower; a shorter one may still fit
+                metrics["dropped_budget"] += 1
+                continue
+
+            budget -= cost
+            lines.append(line)
+            kept_shingles.append(shingles)
+            metrics["used"] += 1
+
+        return lines, metrics
+
+    async def process_llm_request(self, *, tool_context, llm_request) -> None:
+        user_content = tool_context.user_content
+        if not user_content or not user_content.parts:
+            return
+        query = " ".join(part.text for part in user_content.parts if part.text)
+        if not query:
+            return
+
+        try:
+            response = await tool_context.search_memory(query)
+        except Exception:
+            logger.warning("Failed to preload memory", exc_info=True)
+            return
+
+        lines, metrics = self.select_memories(query, response.memories)
+        if lines:
+            memory_context = _MEMORY_CONTEXT_TEMPLATE.format(memories="\n".join(lines))
+            metrics["tokens_added"] = estimate_tokens(memory_context)
+            if hasattr(llm_request, "_insert_transient_user_content"):
+                llm_request._insert_transient_user_content(
+                    [types.Content(role="user", parts=[types.Part(text=memory_context)])]
+                )
+            else:
+                llm_request.append_instructions([memory_context])
+        self.turn_metrics.append(metrics)
+
+    def metrics_summary(self) -> Dict[str, float]:
+        """Aggregate the per-request preload metrics."""
+        turns = len(self.turn_metrics)
+        tokens = [m["tokens_added"] for m in self.turn_metrics]
+        summary = {
+            "turns": turns,
+            "tokens_added_total": sum(tokens),
+            "tokens_added_avg": sum(tokens) / turns if turns else 0.0,
+            "tokens_added_max": max(tokens, default=0),
+        }
+        for key in ["retrieved", "used", "dropped_low_relevance",
+                    "dropped_duplicate", "dropped_budget"]:
+            summary[key] = sum(m[key] for m in self.turn_metrics)
+        return summary
@@ -24,9 +24,16 @@ from google.adk.models.lite_llm import LiteLlm
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.adk.memory import InMemoryMemoryService
-from google.adk.tools import load_memory, preload_memory
+from google.adk.tools import load_memory
 from google.genai import types
 
+from bm25_memory_service import BM25MemoryService
+from budgeted_preload_memory import BudgetedPreloadMemoryTool
+from memory_consolidation import MemoryMaintenanceJob, MemoryMaintenancePolicy
+from sqlite_memory_service import SqliteMemoryService
+from vector_memory_service import FaissMemoryService, HashingEmbedder
+from write_behind_memory import WriteBehindMemoryQueue
+
 # ============================================================================
 # 设置和配置
 # ============================================================================
@@ -50,6 +57,12 @@ print("✅ API 密钥已从 .env 文件加载")
 
 APP_NAME = "MemoryDemoApp"
 USER_ID = "demo_user"
+
+# 内存后端："bm25"（索引、排序）、"faiss"（本地向量搜索）、
+# "sqlite"（持久化、FTS5）或 "in_memory"（ADK 关键词扫描）
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "bm25")
+MEMORY_DB_PATH = os.getenv("MEMORY_DB_PATH", "agent_memory.db")
+
 MODEL_NAME = "volcengine/doubao-1-5-lite-32k-250115"
 
 # ============================================================================
@@ -92,6 +105,19 @@ async def run_session(
                     print(f"模型：> {text}")
 
 
+def create_memory_service():
+    """根据 MEMORY_BACKEND 创建内存服务"""
+    if MEMORY_BACKEND == "in_memory":
+        return InMemoryMemoryService()
+    if MEMORY_BACKEND == "bm25":
+        return BM25MemoryService(top_k=10)
+    if MEMORY_BACKEND == "faiss":
+        return FaissMemoryService(embedder=HashingEmbedder(dim=256), top_k=10)
+    if MEMORY_BACKEND == "sqlite":
+        return SqliteMemoryService(MEMORY_DB_PATH, top_k=10)
+    raise ValueError(f"未知的 MEMORY_BACKEND：{MEMORY_BACKEND}")
+
+
 print("✅ 辅助函数已定义。")
 
 # ============================================================================
@@ -104,7 +130,8 @@ def section_3_initialize_memory():
     global memory_service, session_service, user_agent, runner
 
     # 步骤 1：初始化内存服务
-    memory_service = InMemoryMemoryService()
+    memory_service = create_memory_service()
+    print(f"✅ 内存后端：{type(memory_service).__name__}")
 
     # 步骤 2：创建智能体
     user_agent = LlmAgent(
@@ -236,15 +263,21 @@ async def manual_memory_search():
 
 
 async def auto_save_to_memory(callback_context):
-    """在每个智能体轮次后自动将会话保存到内存。"""
-    await callback_context._invocation_context.memory_service.add_session_to_memory(
-        callback_context._invocation_context.session
-    )
+    """在每个智能体轮次后自动将新的会话事件保存到内存。"""
+    # 只将上次保存之后的事件放入队列（参见 incremental_memory.py）；
+    # 索引在后台进行（参见 write_behind_memory.py）
+    await memory_queue.submit(callback_context._invocation_context.session)
 
 
 def section_6_automatic_memory():
     """使用回调创建具有自动内存保存的智能体"""
-    global auto_memory_agent, auto_runner
+    global auto_memory_agent, auto_runner, memory_queue, budgeted_preload
+
+    # 写后（write-behind）队列：轮次中只快照新事件，由后台 worker 批量索引
+    memory_queue = WriteBehindMemoryQueue(memory_service, max_size=1000)
+
+    # 带有相关性阈值、去重和提示令牌预算的 preload_memory
+    budgeted_preload = BudgetedPreloadMemoryTool(max_tokens=500, min_relevance=0.2)
 
     # 具有自动内存保存的智能体
     auto_memory_agent = LlmAgent(
@@ -254,7 +287,7 @@ def section_6_automatic_memory():
         ),
         name="AutoMemoryAgent",
         instruction="回答用户问题。",
-        tools=[preload_memory],
+        tools=[budgeted_preload],
         after_agent_callback=auto_save_to_memory,
     )
 
@@ -279,6 +312,10 @@ async def test_automatic_memory():
         "auto-save-test",
     )
 
+    # 在新会话中查询之前，等待后台写入完成
+    await memory_queue.flush()
+    print(f"\n📊 内存队列统计：{memory_queue.stats}")
+
     # 测试 2：在新会话中询问礼物
     await run_session(
         auto_runner,
@@ -286,6 +323,33 @@ async def test_automatic_memory():
         "auto-save-test-2",
     )
 
+    print(f"\n📊 预加载内存指标：{budgeted_preload.metrics_summary()}")
+
+
+async def run_memory_maintenance():
+    """整合重复的事实，并应用 TTL / 容量上限淘汰"""
+    if not hasattr(memory_service, "list_memories"):
+        print(f"⚠️ {type(memory_service).__name__} 不支持维护操作")
+        return
+
+    job = MemoryMaintenanceJob(
+        memory_service,
+        MemoryMaintenancePolicy(
+            merge_threshold=0.85,
+            ttl_seconds=90 * 24 * 3600,  # 90 天后遗忘
+            max_memories=10_000,  # 每个用户
+        ),
+    )
+    reports = await job.run_once()
+
+    for (app_name, user_id), report in reports.items():
+        print(f"\n🧹 {app_name}/{user_id}：{report}")
+    for sample in job.metrics.latest().values():
+        print(
+            f"📊 存储大小：{sample['store_size']}，"
+            f"探测搜索：{sample['search_ms']:.2f} 毫秒"
+        )
+
 
 # ============================================================================
 # 示例用法
@@ -333,6 +397,14 @@ async def main():
     # 测试自动内存
     await test_automatic_memory()
 
+    # 整合与淘汰让内存存储保持有界
+    print("\n--- 记忆整合与淘汰 ---")
+    await memory_queue.flush()
+    await run_memory_maintenance()
+
+    # 关闭前刷新待处理的内存写入
+    await memory_queue.close(flush=True)
+
 
 if __name__ == "__main__":
     import asyncio
@@ -24,9 +24,16 @@ from google.adk.models.google_llm import Gemini
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.adk.memory import InMemoryMemoryService
-from google.adk.tools import load_memory, preload_memory
+from google.adk.tools import load_memory
 from google.genai import types
 
+from bm25_memory_service import BM25MemoryService
+from budgeted_preload_memory import BudgetedPreloadMemoryTool
+from memory_consolidation import MemoryMaintenanceJob, MemoryMaintenancePolicy
+from sqlite_memory_service import SqliteMemoryService
+from vector_memory_service import FaissMemoryService, HashingEmbedder
+from write_behind_memory import WriteBehindMemoryQueue
+
 # ============================================================================
 # Setup and Configuration
 # ============================================================================
@@ -52,6 +59,11 @@ print("✅ API key loaded from .env file")
 APP_NAME = "MemoryDemoApp"
 USER_ID = "demo_user"
 
+# Memory backend: "bm25" (indexed, ranked), "faiss" (local vector search),
+# "sqlite" (durable, FTS5) or "in_memory" (ADK keyword scan)
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "bm25")
+MEMORY_DB_PATH = os.getenv("MEMORY_DB_PATH", "agent_memory.db")
+
 # Configure Retry Options
 retry_config = types.HttpRetryOptions(
     attempts=5,
@@ -100,6 +112,19 @@ async def run_session(
                     print(f"Model: > {text}")
 
 
+def create_memory_service():
+    """Create the memory service selected by MEMORY_BACKEND."""
+    if MEMORY_BACKEND == "in_memory":
+        return InMemoryMemoryService()
+    if MEMORY_BACKEND == "bm25":
+        return BM25MemoryService(top_k=10)
+    if MEMORY_BACKEND == "faiss":
+        return FaissMemoryService(embedder=HashingEmbedder(dim=256), top_k=10)
+    if MEMORY_BACKEND == "sqlite":
+        return SqliteMemoryService(MEMORY_DB_PATH, top_k=10)
+    raise ValueError(f"Unknown MEMORY_BACKEND: {MEMORY_BACKEND}")
+
+
 print("✅ Helper functions defined.")
 
 # ============================================================================
@@ -112,7 +137,8 @@ def section_3_initialize_memory():
     global memory_service, session_service, user_agent, runner
 
     # Step 1: Initialize Memory Service
-    memory_service = InMemoryMemoryService()
+    memory_service = create_memory_service()
+    print(f"✅ Memory backend: {type(memory_service).__name__}")
 
     # Step 2: Create agent
     user_agent = LlmAgent(
@@ -238,22 +264,29 @@ async def manual_memory_search():
 
 
 async def auto_save_to_memory(callback_context):
-    """Automatically save session to memory after each agent turn."""
-    await callback_context._invocation_context.memory_service.add_session_to_memory(
-        callback_context._invocation_context.session
-    )
+    """Automatically save new session events to memory after each agent turn."""
+    # Only the events since the last save are queued (see incremental_memory.py);
+    # indexing happens in the background (see write_behind_memory.py)
+    await memory_queue.submit(callback_context._invocation_context.session)
 
 
 def section_6_automatic_memory():
     """Create an agent with automatic memory saving using callbacks"""
-    global auto_memory_agent, auto_runner
+    global auto_memory_agent, auto_runner, memory_queue, budgeted_preload
+
+    # Write-behind queue: turns only snapshot new events, a background
+    # worker indexes them in batches
+    memory_queue = WriteBehindMemoryQueue(memory_service, max_size=1000)
+
+    # preload_memory with a relevance cutoff, dedup and a prompt-token budget
+    budgeted_preload = BudgetedPreloadMemoryTool(max_tokens=500, min_relevance=0.2)
 
     # Agent with automatic memory saving
     auto_memory_agent = LlmAgent(
         model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
         name="AutoMemoryAgent",
         instruction="Answer user questions.",
-        tools=[preload_memory],
+        tools=[budgeted_preload],
         after_agent_callback=auto_save_to_memory,
     )
 
@@ -278,6 +311,10 @@ async def test_automatic_memory():
         "auto-save-test",
     )
 
+    # Wait for the background writer before querying a NEW session
+    await memory_queue.flush()
+    print(f"\n📊 Memory queue stats: {memory_queue.stats}")
+
     # Test 2: Ask about the gift in a NEW session
     await run_session(
         auto_runner,
@@ -285,6 +322,33 @@ async def test_automatic_memory():
         "auto-save-test-2",
     )
 
+    print(f"\n📊 Preload memory metrics: {budgeted_preload.metrics_summary()}")
+
+
+async def run_memory_maintenance():
+    """Consolidate repeated facts and apply TTL / size-cap eviction"""
+    if not hasattr(memory_service, "list_memories"):
+        print(f"⚠️ {type(memory_service).__name__} does not support maintenance")
+        return
+
+    job = MemoryMaintenanceJob(
+        memory_service,
+        MemoryMaintenancePolicy(
+            merge_threshold=0.85,
+            ttl_seconds=90 * 24 * 3600,  # forget after 90 days
+            max_memories=10_000,  # per user
+        ),
+    )
+    reports = await job.run_once()
+
+    for (app_name, user_id), report in reports.items():
+        print(f"\n🧹 {app_name}/{user_id}: {report}")
+    for sample in job.metrics.latest().values():
+        print(
+            f"📊 Store size: {sample['store_size']}, "
+            f"probe search: {sample['search_ms']:.2f} ms"
+        )
+
 
 # ============================================================================
 # Example Usage
@@ -332,6 +396,14 @@ async def main():
     # Test automatic memory
     await test_automatic_memory()
 
+    # Consolidation and eviction keep the memory store bounded
+    print("\n--- Memory Consolidation and Eviction ---")
+    await memory_queue.flush()
+    await run_memory_maintenance()
+
+    # Flush pending memory writes before shutdown
+    await memory_queue.close(flush=True)
+
 
 if __name__ == "__main__":
     import asyncio
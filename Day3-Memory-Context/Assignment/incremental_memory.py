@@ -0,0 +1,137 @@
+"""
+Day 3b: Incremental Memory Ingestion
+
+`auto_save_to_memory` runs after every agent turn. Calling
+add_session_to_memory(session) there hands the WHOLE session to the memory
+service each time, so a conversation of N turns costs O(N^2) ingest work and
+services that append events store duplicates.
+
+IncrementalMemoryIngestor keeps a watermark per session (how many events were
+already ingested, plus the id of the last one) and only sends the events after
+it, deduplicated by event id, through add_events_to_memory().
+
+Usage:
+    from incremental_memory import IncrementalMemoryIngestor
+
+    memory_ingestor = IncrementalMemoryIngestor(memory_service)
+
+    async def auto_save_to_memory(callback_context):
+        await memory_ingestor.ingest(callback_context._invocation_context.session)
+"""
+
+from typing import Dict, List, Set, Tuple
+
+# ============================================================================
+# Incremental Ingestor
+# ============================================================================
+
+
+class _Watermark:
+    """Ingest position of one session."""
+
+    def __init__(self):
+        self.count = 0
+        self.last_event_id = None
+        self.seen_ids: Set[str] = set()
+
+
+class IncrementalMemoryIngestor:
+    """
+    Adds only the events appended to a session since its last ingest.
+
+    The watermark is trusted while session.events[count - 1] is still the last
+    ingested event. If the history was rewritten (e.g. rewind or compaction),
+    the ingestor rescans the whole session once and relies on the event-id
+    set to skip what is already stored.
+    """
+
+    def __init__(self, memory_service):
+        self.memory_service = memory_service
+        self._watermarks: Dict[Tuple[str, str, str], _Watermark] = {}
+        self._supports_deltas = True
+        self.stats = {
+            "ingest_calls": 0,
+            "events_ingested": 0,
+            "duplicates_skipped": 0,
+            "full_rescans": 0,
+        }
+
+    def _pending_events(self, session, watermark: _Watermark) -> List:
+        """Return the session events after the watermark that were never ingested."""
+        events = session.events
+        count = watermark.count
+        if count == 0 or (
+            count <= len(events) and events[count - 1].id == watermark.last_event_id
+        ):
+            candidates = events[count:]
+        else:
+            self.stats["full_rescans"] += 1
+            candidates = events
+
+        pending = []
+        for event in candidates:
+            if event.id in watermark.seen_ids:
+                self.stats["duplicates_skipped"] += 1
+                continue
+            watermark.seen_ids.add(event.id)
+            if event.content and event.content.parts:
+                pending.append(event)
+        return pending
+
+    def take_pending(self, session) -> List:
+        """
+        Return the events to ingest for a session and advance its watermark.
+
+        Synchronous, so callers (e.g. a write-behind queue) can snapshot the
+        delta during the agent turn and write it to memory later.
+        """
+        self.stats["ingest_calls"] += 1
+        key = (session.app_name, session.user_id, session.id)
+        watermark = self._watermarks.setdefault(key, _Watermark())
+
+        pending = self._pending_events(session, watermark)
+        watermark.count = len(session.events)
+        watermark.last_event_id = session.events[-1].id if session.events else None
+        return pending
+
+    async def write(self, session, events: List) -> None:
+        """Send already-selected events of a session to the memory service."""
+        if self._supports_deltas:
+            try:
+                await self.memory_service.add_events_to_memory(
+                    app_name=session.app_name,
+                    user_id=session.user_id,
+                    events=events,
+                    session_id=session.id,
+                )
+                self.stats["events_ingested"] += len(events)
+                return
+            except (NotImplementedError, AttributeError):
+                # Older memory services only accept whole sessions
+                self._supports_deltas = False
+        await self.memory_service.add_session_to_memory(session)
+        self.stats["events_ingested"] += len(events)
+
+    async def ingest(self, session) -> int:
+        """Ingest the new events of a session. Returns how many were sent."""
+        key = (session.app_name, session.user_id, session.id)
+        watermark = self._watermarks.setdefault(key, _Watermark())
+
+        # Advance the watermark before awaiting so a concurrent ingest of the
+        # same session cannot pick up the same events again.
+        previous = (watermark.count, watermark.last_event_id)
+        pending = self.take_pending(session)
+        if not pending:
+            return 0
+
+        try:
+            await self.write(session, pending)
+        except Exception:
+            watermark.count, watermark.last_event_id = previous
+            watermark.seen_ids.difference_update(event.id for event in pending)
+            raise
+        return len(pending)
+
+    def forget_session(self, app_name: str, user_id: str, session_id: str) -> None:
+        """Drop the watermark of a finished session."""
+        self._watermarks.pop((app_name, user_id, session_id), None)
@@ -0,0 +1,250 @@
+"""
+Day 3b: Memory Consolidation and Eviction
+
+add_session_to_memory() only ever appends, and auto_save_to_memory runs on
+every turn, so the memory store grows without bound and search slows down.
+This module bounds it with a maintenance pass per (app_name, user_id):
+
+1. Consolidation: memories by the same author whose term sets are
+   near-identical ("My favorite color is blue-green" stated five times) are
+   merged - the newest one is kept, the older repeats are deleted.
+2. TTL eviction: memories older than `ttl_seconds` are deleted.
+3. Size cap: only the newest `max_memories` memories are kept.
+
+After every pass MemoryStoreMetrics records the store size and the latency of
+a probe search, so growth and search cost can be followed over time.
+
+Works with memory services that expose users() / list_memories() /
+delete_memories(): BM25MemoryService and SqliteMemoryService. (FAISS HNSW
+indexes cannot delete vectors, so FaissMemoryService is not supported.)
+
+Usage:
+    from memory_consolidation import MemoryMaintenanceJob, MemoryMaintenancePolicy
+
+    job = MemoryMaintenanceJob(
+        memory_service,
+        MemoryMaintenancePolicy(ttl_seconds=30 * 24 * 3600, max_memories=5000),
+    )
+    report = await job.run_once()      # or: job.start(interval=600)
+    print(job.metrics.latest())
+"""
+
+import asyncio
+import logging
+import math
+import time
+from typing import Dict, List, Optional
+
+from bm25_memory_service import tokenize
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# Policy
+# ============================================================================
+
+
+class MemoryMaintenancePolicy:
+    """
+    What a maintenance pass is allowed to remove.
+
+    merge_threshold: Jaccard similarity of term sets at or above which two
+        memories of the same author are merged (None disables consolidation)
+    ttl_seconds: delete memories older than this (None disables TTL)
+    max_memories: keep at most this many memories per user, newest first
+        (None disables the cap)
+    """
+
+    def __init__(
+        self,
+        merge_threshold: Optional[float] = 0.85,
+        ttl_seconds: Optional[float] = None,
+        max_memories: Optional[int] = None,
+    ):
+        self.merge_threshold = merge_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_memories = max_memories
+
+
+# ============================================================================
+# Consolidation
+# ============================================================================
+
+
+def _recency(memory: Dict) -> float:
+    """Sort key, newest last. A memory without a timestamp counts as new."""
+    timestamp = memory["timestamp"]
+    return math.inf if timestamp is None else timestamp
+
+
+def find_redundant_memories(memories: List[Dict], threshold: float) -> List[str]:
+    """
+    Return the ids of memories that repeat a newer memory of the same author.
+
+    Memories are visited newest first and compared by Jaccard similarity of
+    their term sets. To avoid comparing every pair, prefix filtering is used:
+    with terms ordered rarest first, two sets with Jaccard >= threshold must
+    share one of the first |terms| - ceil(threshold * |terms|) + 1 terms, so
+    only those prefix terms are indexed and probed.
+    """
+    term_sets = {m["id"]: frozenset(tokenize(m["text"])) for m in memories}
+    document_frequency: Dict[str, int] = {}
+    for terms in term_sets.values():
+        for term in terms:
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+
+    redundant: List[str] = []
+    kept_terms: List[frozenset] = []
+    kept_by_prefix: Dict[tuple, List[int]] = {}
+
+    for memory in sorted(memories, key=_recency, reverse=True):
+        terms = term_sets[memory["id"]]
+        if not terms:
+            continue
+
+        ordered = sorted(terms, key=lambda term: (document_frequency[term], term))
+        prefix = ordered[: len(ordered) - math.ceil(threshold * len(ordered)) + 1]
+
+        candidates = set()
+        for term in prefix:
+            candidates.update(kept_by_prefix.get((memory["author"], term), ()))
+        if any(
+            len(terms & kept_terms[i]) / len(terms | kept_terms[i]) >= threshold
+            for i in candidates
+        ):
+            redundant.append(memory["id"])
+            continue
+
+        position = len(kept_terms)
+        kept_terms.append(terms)
+        for term in prefix:
+            kept_by_prefix.setdefault((memory["author"], term), []).append(position)
+
+    return redundant
+
+
+# ============================================================================
+# Metrics
+# ============================================================================
+
+
+class MemoryStoreMetrics:
+    """Time series of store size and probe-search latency per user."""
+
+    def __init__(self, max_samples: int = 10_000):
+        self.max_samples = max_samples
+        self.samples: List[Dict] = []
+
+    def record(self, sample: Dict) -> None:
+        self.samples.append(sample)
+        if len(self.samples) > self.max_samples:
+            del self.samples[: len(self.samples) - self.max_samples]
+
+    def latest(self) -> Dict[tuple, Dict]:
+        """Most recent sample for every (app_name, user_id)."""
+        latest = {}
+        for sample in self.samples:
+            latest[(sample["app_name"], sample["user_id"])] = sample
+        return latest
+
+
+# ============================================================================
+# Maintenance Job
+# ============================================================================
+
+
+class MemoryMaintenanceJob:
+    """Runs consolidation + TTL + size-cap passes over a memory service."""
+
+    def __init__(
+        self,
+        memory_service,
+        policy: Optional[MemoryMaintenancePolicy] = None,
+        probe_query: str = "favorite",
+    ):
+        self.memory_service = memory_service
+        self.policy = policy or MemoryMaintenancePolicy()
+        self.probe_query = probe_query
+        self.metrics = MemoryStoreMetrics()
+        self._task: Optional[asyncio.Task] = None
+
+    def maintain_user(self, app_name: str, user_id: str, now: float) -> Dict:
+        """Apply the policy to one user's memories. Returns removal counts."""
+        memories = self.memory_service.list_memories(app_name, user_id)
+        report = {"before": len(memories), "merged": 0, "expired": 0, "capped": 0}
+        doomed = set()
+
+        if self.policy.merge_threshold is not None:
+            merged = find_redundant_memories(memories, self.policy.merge_threshold)
+            doomed.update(merged)
+            report["merged"] = len(merged)
+
+        alive = [m for m in memories if m["id"] not in doomed]
+        if self.policy.ttl_seconds is not None:
+            cutoff = now - self.policy.ttl_seconds
+            expired = [m["id"] for m in alive if _recency(m) < cutoff]
+            doomed.update(expired)
+            report["expired"] = len(expired)
+            alive = [m for m in alive if _recency(m) >= cutoff]
+
+        cap = self.policy.max_memories
+        if cap is not None and len(alive) > cap:
+            alive.sort(key=_recency, reverse=True)
+            capped = [m["id"] for m in alive[cap:]]
+            doomed.update(capped)
+            report["capped"] = len(capped)
+
+        self.memory_service.delete_memories(app_name, user_id, doomed)
+        report["after"] = report["before"] - len(doomed)
+        return report
+
+    async def run_once(self, now: Optional[float] = None) -> Dict[tuple, Dict]:
+        """Maintain every user once and record store metrics."""
+        now = time.time() if now is None else now
+        reports = {}
+        # Listing and deleting are blocking store calls: keep them off the event loop
+        users = await asyncio.to_thread(self.memory_service.users)
+        for app_name, user_id in users:
+            report = await asyncio.to_thread(self.maintain_user, app_name, user_id, now)
+
+            start = time.perf_counter()
+            await self.memory_service.search_memory(
+                app_name=app_name, user_id=user_id, query=self.probe_query
+            )
+            search_ms = (time.perf_counter() - start) * 1000
+
+            self.metrics.record(
+                {
+                    "time": now,
+                    "app_name": app_name,
+                    "user_id": user_id,
+                    "store_size": report["after"],
+                    "search_ms": search_ms,
+                    **{k: report[k] for k in ("merged", "expired", "capped")},
+                }
+            )
+            reports[(app_name, user_id)] = report
+        return reports
+
+    async def _run_forever(self, interval: float) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Memory maintenance pass failed")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float = 600.0) -> None:
+        """Run maintenance in the background every `interval` seconds."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_forever(interval))
+
+    async def stop(self) -> None:
+        """Stop the background maintenance task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,291 @@
+"""
+Day 3b: SQLite Memory Service (FTS5)
+
+A local, durable memory service. InMemoryMemoryService (and the BM25 / FAISS
+services in this folder) lose everything on restart, so sessions have to be
+replayed into memory on every cold start. SqliteMemoryService stores memory
+events in a SQLite file with an FTS5 full-text index:
+
+- scoped by app_name / user_id, deduplicated by event id
+- ranked search with FTS5's built-in bm25()
+- bulk ingest of many sessions in one transaction
+- cold start = opening the file
+
+Text is indexed with bm25_memory_service.tokenize(), so Chinese text is
+searchable by character bigrams (FTS5's default tokenizer would treat a whole
+Chinese sentence as one token).
+
+Usage:
+    from sqlite_memory_service import SqliteMemoryService
+
+    memory_service = SqliteMemoryService("agent_memory.db")
+    runner = Runner(..., memory_service=memory_service)
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from google.adk.memory import BaseMemoryService
+from google.adk.memory.base_memory_service import SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+from google.genai import types
+
+from bm25_memory_service import event_text, format_timestamp, tokenize
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory_events (
+    rowid INTEGER PRIMARY KEY,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    author TEXT,
+    timestamp REAL,
+    content_json TEXT NOT NULL,
+    terms TEXT NOT NULL,
+    UNIQUE (app_name, user_id, event_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_memory_events_scope
+    ON memory_events (app_name, user_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts USING fts5(
+    terms,
+    content='memory_events',
+    content_rowid='rowid'
+);
+
+-- Event ids removed by delete_memories(): re-adding a session must not bring
+-- them back
+CREATE TABLE IF NOT EXISTS deleted_events (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id, event_id)
+);
+
+CREATE TRIGGER IF NOT EXISTS memory_events_bi BEFORE INSERT ON memory_events
+WHEN EXISTS (
+    SELECT 1 FROM deleted_events
+    WHERE app_name = new.app_name AND user_id = new.user_id AND event_id = new.event_id
+)
+BEGIN
+    SELECT RAISE(IGNORE);
+END;
+
+CREATE TRIGGER IF NOT EXISTS memory_events_ai AFTER INSERT ON memory_events BEGIN
+    INSERT INTO memory_fts (rowid, terms) VALUES (new.rowid, new.terms);
+END;
+
+CREATE TRIGGER IF NOT EXISTS memory_events_ad AFTER DELETE ON memory_events BEGIN
+    INSERT INTO memory_fts (memory_fts, rowid, terms)
+        VALUES ('delete', old.rowid, old.terms);
+END;
+"""
+
+_SEARCH_SQL = """
+SELECT e.event_id, e.author, e.timestamp, e.content_json
+FROM memory_fts
+JOIN memory_events AS e ON e.rowid = memory_fts.rowid
+WHERE memory_fts MATCH ? AND e.app_name = ? AND e.user_id = ?
+ORDER BY bm25(memory_fts)
+LIMIT ?
+"""
+
+
+def _fts_query(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 OR-query of quoted terms."""
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return None
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+# ============================================================================
+# SQLite Memory Service
+# ============================================================================
+
+
+class SqliteMemoryService(BaseMemoryService):
+    """Durable memory service on SQLite FTS5."""
+
+    def __init__(self, db_path: str = "agent_memory.db", top_k: int = 10):
+        self.db_path = db_path
+        self.top_k = top_k
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    # ------------------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _rows(app_name: str, user_id: str, session_id: str, events) -> List[Tuple]:
+        """Convert events with text into memory_events rows."""
+        # An event without a timestamp is as old as its ingestion, not the epoch
+        now = time.time()
+        rows = []
+        for event in events:
+            text = event_text(event)
+            if not text:
+                continue
+            rows.append(
+                (
+                    app_name,
+                    user_id,
+                    session_id,
+                    event.id,
+                    event.author,
+                    event.timestamp or now,
+                    event.content.model_dump_json(exclude_none=True),
+                    " ".join(tokenize(text)),
+                )
+            )
+        return rows
+
+    def _insert(self, rows: List[Tuple]) -> int:
+        """Insert rows in one transaction, skipping stored and deleted event ids."""
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO memory_events "
+                "(app_name, user_id, session_id, event_id, author, timestamp, "
+                "content_json, terms) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return cursor.rowcount
+
+    async def add_session_to_memory(self, session) -> None:
+        """Store a session's events (stored and deleted events are skipped)."""
+        rows = self._rows(session.app_name, session.user_id, session.id, session.events)
+        await asyncio.to_thread(self._insert, rows)
+
+    async def add_events_to_memory(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        events,
+        session_id: Optional[str] = None,
+        custom_metadata=None,
+    ) -> None:
+        """Store an explicit delta of events."""
+        rows = self._rows(app_name, user_id, session_id or "", events)
+        await asyncio.to_thread(self._insert, rows)
+
+    async def add_sessions_to_memory(self, sessions: Iterable) -> int:
+        """Bulk-ingest many sessions in a single transaction. Returns rows added."""
+        rows = []
+        for session in sessions:
+            rows.extend(
+                self._rows(session.app_name, session.user_id, session.id, session.events)
+            )
+        return await asyncio.to_thread(self._insert, rows)
+
+    # ------------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------------
+
+    def _search(self, app_name: str, user_id: str, query: str) -> List[MemoryEntry]:
+        fts_query = _fts_query(query)
+        if fts_query is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                _SEARCH_SQL, (fts_query, app_name, user_id, self.top_k)
+            ).fetchall()
+        return [
+            MemoryEntry(
+                id=event_id,
+                author=author,
+                timestamp=format_timestamp(timestamp),
+                content=types.Content.model_validate_json(content_json),
+            )
+            for event_id, author, timestamp, content_json in rows
+        ]
+
+    async def search_memory(
+        self, *, app_name: str, user_id: str, query: str
+    ) -> SearchMemoryResponse:
+        """Return the top_k memories ranked by FTS5 bm25()."""
+        memories = await asyncio.to_thread(self._search, app_name, user_id, query)
+        return SearchMemoryResponse(memories=memories)
+
+    # ------------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------------
+
+    def users(self) -> List[Tuple[str, str]]:
+        """Return every (app_name, user_id) with stored memories."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT DISTINCT app_name, user_id FROM memory_events"
+            ).fetchall()
+
+    def list_memories(self, app_name: str, user_id: str) -> List[Dict]:
+        """Return id, author, timestamp and text of every stored memory."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT event_id, author, timestamp, content_json FROM memory_events "
+                "WHERE app_name = ? AND user_id = ?",
+                (app_name, user_id),
+            ).fetchall()
+        return [
+            {
+                "id": event_id,
+                "author": author,
+                "timestamp": timestamp,
+                "text": " ".join(
+                    part.text
+                    for part in types.Content.model_validate_json(content_json).parts
+                    or []
+                    if part.text
+                ),
+            }
+            for event_id, author, timestamp, content_json in rows
+        ]
+
+    def delete_memories(self, app_name: str, user_id: str, memory_ids) -> int:
+        """
+        Remove memories by id. Returns how many were removed.
+
+        Removed ids are recorded in deleted_events, so adding their session
+        again does not restore them.
+        """
+        rows = [(app_name, user_id, memory_id) for memory_id in memory_ids]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO deleted_events (app_name, user_id, event_id) "
+                "SELECT app_name, user_id, event_id FROM memory_events "
+                "WHERE app_name = ? AND user_id = ? AND event_id = ?",
+                rows,
+            )
+            cursor = self._conn.executemany(
+                "DELETE FROM memory_events "
+                "WHERE app_name = ? AND user_id = ? AND event_id = ?",
+                rows,
+            )
+            return cursor.rowcount
+
+    def count(self, app_name: str, user_id: str) -> int:
+        """Number of stored memory events for one user."""
+        with self._lock:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM memory_events WHERE app_name = ? AND user_id = ?",
+                (app_name, user_id),
+            ).fetchone()
+        return count
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,114 @@
+"""
+Tests for memory_consolidation.py with the BM25 and SQLite memory services.
+
+Run: python -m pytest test_memory_consolidation.py
+"""
+
+import asyncio
+
+import pytest
+from google.adk.events import Event
+from google.adk.sessions import Session
+from google.genai import types
+
+from bm25_memory_service import BM25MemoryService
+from memory_consolidation import MemoryMaintenanceJob, MemoryMaintenancePolicy
+from sqlite_memory_service import SqliteMemoryService
+
+APP_NAME = "test_app"
+USER_ID = "test_user"
+
+# Four distinct facts; the first one is repeated three more times
+TEXTS = [
+    "My favorite color is blue-green",
+    "I live in Lisbon near the river",
+    "My nephew likes model trains",
+    "I am allergic to peanuts",
+    "My favorite color is blue-green",
+    "My favorite color is blue-green",
+    "My favorite color is blue-green",
+]
+
+
+def make_session(timestamps=None) -> Session:
+    timestamps = timestamps or [1_700_000_000.0 + i for i in range(len(TEXTS))]
+    return Session(
+        id="session-1",
+        app_name=APP_NAME,
+        user_id=USER_ID,
+        events=[
+            Event(
+                id=f"event-{i}",
+                invocation_id="test",
+                author="user",
+                content=types.Content(role="user", parts=[types.Part(text=text)]),
+                timestamp=timestamp,
+            )
+            for i, (text, timestamp) in enumerate(zip(TEXTS, timestamps))
+        ],
+    )
+
+
+@pytest.fixture(params=["bm25", "sqlite"])
+def memory_service(request, tmp_path):
+    if request.param == "bm25":
+        yield BM25MemoryService()
+    else:
+        service = SqliteMemoryService(str(tmp_path / "memory.db"))
+        yield service
+        service.close()
+
+
+def stored(memory_service) -> int:
+    return len(memory_service.list_memories(APP_NAME, USER_ID))
+
+
+def test_consolidated_memories_stay_deleted_when_session_is_added_again(memory_service):
+    session = make_session()
+    job = MemoryMaintenanceJob(memory_service, MemoryMaintenancePolicy(merge_threshold=0.85))
+
+    asyncio.run(memory_service.add_session_to_memory(session))
+    assert stored(memory_service) == 7
+
+    reports = asyncio.run(job.run_once())
+    assert reports[(APP_NAME, USER_ID)]["merged"] == 3
+    assert stored(memory_service) == 4
+
+    asyncio.run(memory_service.add_session_to_memory(session))
+    asyncio.run(memory_service.add_events_to_memory(
+        app_name=APP_NAME, user_id=USER_ID, events=session.events, session_id=session.id
+    ))
+    assert stored(memory_service) == 4
+
+
+def test_capped_memories_stay_deleted_when_session_is_added_again(memory_service):
+    session = make_session()
+    job = MemoryMaintenanceJob(
+        memory_service, MemoryMaintenancePolicy(merge_threshold=None, max_memories=2)
+    )
+
+    asyncio.run(memory_service.add_session_to_memory(session))
+    asyncio.run(job.run_once())
+    asyncio.run(memory_service.add_session_to_memory(session))
+    assert stored(memory_service) == 2
+
+
+def test_memory_without_timestamp_is_not_expired(memory_service):
+    event = Event.model_construct(
+        id="event-undated",
+        invocation_id="test",
+        author="user",
+        content=types.Content(role="user", parts=[types.Part(text="My dog is called Biscuit")]),
+        timestamp=None,
+        actions=None,
+    )
+    asyncio.run(memory_service.add_events_to_memory(
+        app_name=APP_NAME, user_id=USER_ID, events=[event], session_id="session-2"
+    ))
+    job = MemoryMaintenanceJob(
+        memory_service, MemoryMaintenancePolicy(merge_threshold=None, ttl_seconds=3600)
+    )
+
+    reports = asyncio.run(job.run_once())
+    assert reports[(APP_NAME, USER_ID)]["expired"] == 0
+    assert stored(memory_service) == 1
@@ -0,0 +1,74 @@
+"""
+Tests for the retries of write_behind_memory.WriteBehindMemoryQueue.
+
+Run: python -m pytest test_write_behind_memory.py
+"""
+
+import asyncio
+
+from google.adk.events import Event
+from google.adk.sessions import Session
+from google.genai import types
+
+from write_behind_memory import WriteBehindMemoryQueue
+
+
+class FlakyMemoryService:
+    """Fails the first `failures` writes, then stores the events."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.events = []
+
+    async def add_events_to_memory(self, *, app_name, user_id, events, session_id):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("memory service unavailable")
+        self.events.extend(events)
+
+
+def make_session(texts) -> Session:
+    return Session(
+        id="session-1",
+        app_name="test_app",
+        user_id="test_user",
+        events=[
+            Event(
+                id=f"event-{i}",
+                invocation_id="test",
+                author="user",
+                content=types.Content(role="user", parts=[types.Part(text=text)]),
+            )
+            for i, text in enumerate(texts)
+        ],
+    )
+
+
+def run(service, max_retries: int = 3) -> WriteBehindMemoryQueue:
+    memory_queue = WriteBehindMemoryQueue(
+        service, max_batch_delay=0, max_retries=max_retries, retry_delay=0.001
+    )
+
+    async def submit_and_close():
+        await memory_queue.submit(make_session(["I live in Lisbon", "I like trains"]))
+        await memory_queue.close(flush=True)
+
+    asyncio.run(submit_and_close())
+    return memory_queue
+
+
+def test_failed_write_is_retried_until_it_succeeds():
+    service = FlakyMemoryService(failures=2)
+    memory_queue = run(service)
+    assert [event.id for event in service.events] == ["event-0", "event-1"]
+    assert memory_queue.stats["retries"] == 2
+    assert memory_queue.stats["events_written"] == 2
+    assert memory_queue.stats["events_dropped"] == 0
+
+
+def test_write_is_dropped_after_max_retries():
+    service = FlakyMemoryService(failures=10)
+    memory_queue = run(service, max_retries=2)
+    assert service.events == []
+    assert memory_queue.stats["write_errors"] == 3
+    assert memory_queue.stats["events_dropped"] == 2
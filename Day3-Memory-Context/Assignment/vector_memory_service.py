@@ -0,0 +1,195 @@
+"""
+Day 3b: Vector Memory Service (FAISS)
+
+A local, drop-in memory service that serves search_memory with approximate
+nearest neighbour search instead of keyword matching.
+
+Each memory event is embedded with a local embedding function and added to a
+FAISS HNSW index (one per app_name / user_id). Searches embed the query and
+return the top_k most similar events, so load_memory and preload_memory stay
+fast when the memory holds hundreds of thousands of events.
+
+Features:
+- HashingEmbedder: dependency-free feature-hashing embedder (tests/demos)
+- Any callable `embed(texts) -> np.ndarray` can be plugged in instead
+- HNSW index: no training step, incremental adds, tunable ef_search
+- Events are deduplicated by event id, so re-adding a session is cheap
+
+Usage:
+    from vector_memory_service import FaissMemoryService, HashingEmbedder
+
+    memory_service = FaissMemoryService(embedder=HashingEmbedder(dim=256))
+    runner = Runner(..., memory_service=memory_service)
+"""
+
+import threading
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from google.adk.memory import BaseMemoryService
+from google.adk.memory.base_memory_service import SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+
+from bm25_memory_service import event_text, format_timestamp, tokenize
+
+EmbedFunction = Callable[[Sequence[str]], np.ndarray]
+
+# ============================================================================
+# Local Embedding Function
+# ============================================================================
+
+
+class HashingEmbedder:
+    """
+    Feature-hashing text embedder.
+
+    Every token (see bm25_memory_service.tokenize) is hashed to one of `dim`
+    buckets with a +1/-1 sign; the resulting vector is L2-normalized so that
+    inner product equals cosine similarity. It has no model to download and is
+    deterministic across processes, which makes it a good default for tests.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                hashed = zlib.crc32(token.encode("utf-8"))
+                sign = 1.0 if hashed & 0x80000000 else -1.0
+                vectors[row, hashed % self.dim] += sign
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+# ============================================================================
+# Per-user Vector Index
+# ============================================================================
+
+
+class _UserVectorIndex:
+    """FAISS index plus row -> MemoryEntry mapping for one user."""
+
+    def __init__(self, dim: int, hnsw_m: int, ef_construction: int):
+        self.index = faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        self.index.hnsw.efConstruction = ef_construction
+        self.entries: List[MemoryEntry] = []
+        self.event_ids: set = set()
+
+
+# ============================================================================
+# FAISS Memory Service
+# ============================================================================
+
+
+class FaissMemoryService(BaseMemoryService):
+    """
+    Memory service backed by a FAISS HNSW index per (app_name, user_id).
+
+    Drop-in replacement for InMemoryMemoryService. Events are only ever added:
+    HNSW indexes do not support deletion, so an event removed from a session
+    stays searchable until the service is rebuilt.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[EmbedFunction] = None,
+        top_k: int = 10,
+        min_score: float = 0.0,
+        hnsw_m: int = 32,
+        ef_construction: int = 64,
+        ef_search: int = 64,
+    ):
+        self.embedder = embedder or HashingEmbedder()
+        self.top_k = top_k
+        self.min_score = min_score
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._dim = int(self.embedder(["dimension probe"]).shape[1])
+        self._lock = threading.Lock()
+        self._indexes: Dict[Tuple[str, str], _UserVectorIndex] = {}
+
+    def _index_for(self, app_name: str, user_id: str) -> _UserVectorIndex:
+        key = (app_name, user_id)
+        if key not in self._indexes:
+            self._indexes[key] = _UserVectorIndex(
+                self._dim, self.hnsw_m, self.ef_construction
+            )
+        return self._indexes[key]
+
+    def _add_events(self, app_name: str, user_id: str, events) -> int:
+        """Embed and index events not seen before. Returns how many were added."""
+        with self._lock:
+            index = self._index_for(app_name, user_id)
+            new_events = [
+                event
+                for event in events
+                if event.id not in index.event_ids and event_text(event)
+            ]
+            if not new_events:
+                return 0
+
+            # Embed in one batch so the embedding function can vectorize
+            vectors = self.embedder([event_text(event) for event in new_events])
+            index.index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+            for event in new_events:
+                index.event_ids.add(event.id)
+                index.entries.append(
+                    MemoryEntry(
+                        id=event.id,
+                        content=event.content,
+                        author=event.author,
+                        timestamp=format_timestamp(event.timestamp),
+                    )
+                )
+            return len(new_events)
+
+    async def add_session_to_memory(self, session) -> None:
+        """Embed the session's events that are not indexed yet."""
+        self._add_events(session.app_name, session.user_id, session.events)
+
+    async def add_events_to_memory(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        events,
+        session_id: Optional[str] = None,
+        custom_metadata=None,
+    ) -> None:
+        """Embed an explicit delta of events."""
+        self._add_events(app_name, user_id, events)
+
+    async def search_memory(
+        self, *, app_name: str, user_id: str, query: str
+    ) -> SearchMemoryResponse:
+        """Return up to top_k memories by cosine similarity to the query."""
+        query_vector = np.ascontiguousarray(
+            self.embedder([query]), dtype=np.float32
+        )
+
+        with self._lock:
+            index = self._indexes.get((app_name, user_id))
+            if index is None or not index.entries:
+                return SearchMemoryResponse()
+            index.index.hnsw.efSearch = max(self.ef_search, self.top_k)
+            scores, rows = index.index.search(query_vector, self.top_k)
+            memories = [
+                index.entries[row]
+                for score, row in zip(scores[0], rows[0])
+                if row >= 0 and score > self.min_score
+            ]
+
+        return SearchMemoryResponse(memories=memories)
+
+    def stats(self, app_name: str, user_id: str) -> Dict[str, int]:
+        """Return index size counters for one user."""
+        with self._lock:
+            index = self._indexes.get((app_name, user_id))
+            return {"documents": len(index.entries) if index else 0}
@@ -0,0 +1,209 @@
+"""
+Day 3b: Write-Behind Memory Ingestion
+
+With `after_agent_callback=auto_save_to_memory`, the agent turn does not end
+until the memory service has indexed the session. WriteBehindMemoryQueue moves
+that work off the turn:
+
+- submit() snapshots the new events of the session (IncrementalMemoryIngestor
+  watermark, cheap and synchronous) and puts them on a bounded asyncio.Queue
+- a background worker drains the queue in batches, merging the deltas of the
+  same session into one add_events_to_memory() call
+- when the queue is full, submit() waits; those waits are counted in stats so
+  back-pressure is visible instead of silently slowing turns
+- a failed write is put back on the queue after retry_delay (doubling with
+  each attempt), up to max_retries times. The watermark has already moved
+  past those events, so a delta that still fails is dropped and counted in
+  stats["events_dropped"]
+- close(flush=True) drains everything still queued (and still being retried)
+  before shutdown
+
+Usage:
+    from write_behind_memory import WriteBehindMemoryQueue
+
+    memory_queue = WriteBehindMemoryQueue(memory_service, max_size=1000)
+
+    async def auto_save_to_memory(callback_context):
+        await memory_queue.submit(callback_context._invocation_context.session)
+
+    ...
+    await memory_queue.close(flush=True)
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from incremental_memory import IncrementalMemoryIngestor
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# Write-Behind Queue
+# ============================================================================
+
+
+class WriteBehindMemoryQueue:
+    """Bounded asynchronous ingestion queue in front of a memory service."""
+
+    def __init__(
+        self,
+        memory_service,
+        max_size: int = 1000,
+        max_batch: int = 64,
+        max_batch_delay: float = 0.05,
+        max_retries: int = 3,
+        retry_delay: float = 0.5,
+    ):
+        self.ingestor = IncrementalMemoryIngestor(memory_service)
+        self.max_batch = max_batch
+        self.max_batch_delay = max_batch_delay
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._max_size = max_size
+        self._worker: Optional[asyncio.Task] = None
+        self._retries: Set[asyncio.Task] = set()
+        self._closed = False
+        self.stats = {
+            "submitted": 0,
+            "batches": 0,
+            "events_written": 0,
+            "write_errors": 0,
+            "retries": 0,
+            "events_dropped": 0,
+            "max_depth": 0,
+            "backpressure_waits": 0,
+            "backpressure_seconds": 0.0,
+        }
+
+    def _ensure_worker(self) -> None:
+        """Create the queue and worker on first use, inside the running loop."""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._max_size)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    @property
+    def depth(self) -> int:
+        """Number of submissions waiting to be written."""
+        return self._queue.qsize() if self._queue else 0
+
+    async def submit(self, session) -> int:
+        """
+        Queue the session's new events for ingestion.
+
+        Returns the number of events queued. Only waits when the queue is full.
+        """
+        if self._closed:
+            raise RuntimeError("WriteBehindMemoryQueue is closed")
+        self._ensure_worker()
+
+        events = self.ingestor.take_pending(session)
+        if not events:
+            return 0
+
+        item = (session, events, 0)
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.stats["backpressure_waits"] += 1
+            start = time.perf_counter()
+            await self._queue.put(item)
+            self.stats["backpressure_seconds"] += time.perf_counter() - start
+
+        self.stats["submitted"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], self._queue.qsize())
+        return len(events)
+
+    async def _next_batch(self) -> List[Tuple[object, List, int]]:
+        """Wait for one item, then collect more for up to max_batch_delay."""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_batch_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write_batch(self, batch: List[Tuple[object, List, int]]) -> None:
+        """Merge deltas per session and write each session once."""
+        merged: Dict[Tuple[str, str, str], List] = {}
+        for session, events, attempt in batch:
+            key = (session.app_name, session.user_id, session.id)
+            if key in merged:
+                merged[key][1].extend(events)
+                merged[key][2] = max(merged[key][2], attempt)
+            else:
+                merged[key] = [session, list(events), attempt]
+
+        for session, events, attempt in merged.values():
+            try:
+                await self.ingestor.write(session, events)
+                self.stats["events_written"] += len(events)
+            except Exception:
+                # Write-behind has no caller to raise to: log, retry later
+                self.stats["write_errors"] += 1
+                if attempt < self.max_retries:
+                    logger.warning("Memory ingestion failed for session %s, retrying",
+                                   session.id, exc_info=True)
+                    self._retry_later((session, events, attempt + 1))
+                else:
+                    self.stats["events_dropped"] += len(events)
+                    logger.exception("Memory ingestion failed for session %s after %d "
+                                     "retries, dropping %d events",
+                                     session.id, attempt, len(events))
+        self.stats["batches"] += 1
+
+    def _retry_later(self, item: Tuple[object, List, int]) -> None:
+        """Put a failed delta back on the queue after an exponential backoff."""
+
+        async def requeue():
+            await asyncio.sleep(self.retry_delay * 2 ** (item[2] - 1))
+            # Waits for space like submit(), never blocking the worker itself
+            await self._queue.put(item)
+
+        self.stats["retries"] += 1
+        task = asyncio.create_task(requeue())
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _run(self) -> None:
+        """Background worker loop."""
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def flush(self) -> None:
+        """Wait until everything submitted so far has been written (or dropped)."""
+        if self._queue is None:
+            return
+        await self._queue.join()
+        # Writes that failed come back on the queue once their retry is due
+        while self._retries:
+            await asyncio.gather(*self._retries)
+            await self._queue.join()
+
+    async def close(self, flush: bool = True) -> None:
+        """Stop the worker, optionally draining the queue first."""
+        self._closed = True
+        if flush:
+            await self.flush()
+        for task in list(self._retries):
+            task.cancel()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
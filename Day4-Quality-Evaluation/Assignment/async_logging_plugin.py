@@ -0,0 +1,356 @@
+"""
+Day 4a: Asynchronous Logging Plugin
+
+`setup_logging()` + `LoggingPlugin()` write DEBUG logs synchronously: every
+model request, tool call and response is formatted and written to logger.log
+on the agent's own thread, inside the turn.
+
+This module moves that work off the hot path:
+
+- setup_async_logging(): the root logger gets a QueueHandler; a background
+  QueueListener thread formats records as JSON lines and writes them to a
+  RotatingFileHandler
+- AsyncLoggingPlugin: emits one structured record per lifecycle step
+  (run, agent, model, tool, errors) with durations and token counts
+- Sampling: verbose records (model/tool payloads) are kept for a fraction of
+  invocations; lifecycle records and errors are always kept
+- Truncation: large payloads are cut to `max_field_chars`
+
+Usage:
+    from async_logging_plugin import AsyncLoggingPlugin, setup_async_logging
+
+    listener = setup_async_logging("logger.log")
+    runner = InMemoryRunner(agent=agent, plugins=[AsyncLoggingPlugin(sample_rate=0.1)])
+    ...
+    listener.stop()  # flushes the queue and detaches it from the root logger
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+# ============================================================================
+# Background Log Writer
+# ============================================================================
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that does not format on the caller's thread.
+
+    The stock QueueHandler.prepare() formats the message before enqueueing,
+    which is exactly the work we want off the agent's thread. The queue stays
+    in-process, so the record can be passed through as is. When the queue is
+    full the record is dropped and counted instead of blocking the agent.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        if isinstance(record.msg, dict):
+            entry.update(record.msg)
+        else:
+            entry["message"] = record.getMessage()
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class AsyncLogListener(logging.handlers.QueueListener):
+    """
+    QueueListener that owns its root-logger QueueHandler.
+
+    stop() removes that handler before flushing, so later records are not
+    queued with no thread left to read them.
+    """
+
+    def __init__(self, log_queue: queue.Queue, file_handler: logging.Handler):
+        super().__init__(log_queue, file_handler, respect_handler_level=True)
+        self.queue_handler = _DeferredQueueHandler(log_queue)
+
+    def stop(self) -> None:
+        logging.getLogger().removeHandler(self.queue_handler)
+        super().stop()
+        for handler in self.handlers:
+            handler.close()
+
+
+def _stop_listener(listener: logging.handlers.QueueListener) -> None:
+    """Flush and stop a listener; safe to call on an already stopped one."""
+    if listener._thread is not None:
+        listener.stop()
+
+
+def setup_async_logging(
+    filename: str = "logger.log",
+    level: int = logging.DEBUG,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    queue_size: int = 10_000,
+) -> AsyncLogListener:
+    """
+    Route all logging through a queue to a rotating JSON-lines file.
+
+    Returns the started listener; call .stop() on shutdown to flush and
+    detach the queue from the root logger (also registered with atexit). If
+    the queue is full, records are dropped rather than blocking the agent;
+    `listener.queue_handler.dropped` counts them.
+    """
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    file_handler = logging.handlers.RotatingFileHandler(
+        filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    file_handler.setFormatter(JsonLineFormatter())
+
+    listener = AsyncLogListener(log_queue, file_handler)
+    listener.start()
+    atexit.register(_stop_listener, listener)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(listener.queue_handler)
+    root.setLevel(level)
+    return listener
+
+
+# ============================================================================
+# Async Logging Plugin
+# ============================================================================
+
+
+def _truncate(value: Any, max_chars: int) -> Any:
+    """Cut long strings (or the repr of other objects) to max_chars."""
+    if value is None or isinstance(value, (int, float, bool)):
+        return value
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + f"...[+{len(text) - max_chars} chars]"
+
+
+def _content_text(content) -> str:
+    """Text parts of a types.Content, joined."""
+    if not content or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text)
+
+
+class AsyncLoggingPlugin(BasePlugin):
+    """Structured, sampled, truncated lifecycle logging for agent runs."""
+
+    def __init__(
+        self,
+        name: str = "async_logging",
+        logger_name: str = "agent_events",
+        sample_rate: float = 1.0,
+        max_field_chars: int = 500,
+    ):
+        super().__init__(name=name)
+        self.logger = logging.getLogger(logger_name)
+        self.sample_rate = sample_rate
+        self.max_field_chars = max_field_chars
+        self._started: Dict[tuple, float] = {}
+
+    # ------------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------------
+
+    def _sampled(self, invocation_id: str) -> bool:
+        """Deterministic per-invocation sampling of verbose records."""
+        if self.sample_rate >= 1.0:
+            return True
+        bucket = zlib.crc32(invocation_id.encode("utf-8")) % 10_000
+        return bucket < self.sample_rate * 10_000
+
+    def _emit(self, level: int, record: Dict[str, Any]) -> None:
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, record)
+
+    def _start(self, key: tuple) -> None:
+        self._started[key] = time.perf_counter()
+
+    def _elapsed_ms(self, key: tuple) -> Optional[float]:
+        start = self._started.pop(key, None)
+        if start is None:
+            return None
+        return round((time.perf_counter() - start) * 1000, 3)
+
+    # ------------------------------------------------------------------------
+    # Run lifecycle
+    # ------------------------------------------------------------------------
+
+    async def before_run_callback(self, *, invocation_context) -> None:
+        self._start(("run", invocation_context.invocation_id))
+        self._emit(
+            logging.INFO,
+            {
+                "event": "run_start",
+                "invocation_id": invocation_context.invocation_id,
+                "session_id": invocation_context.session.id,
+                "user_id": invocation_context.user_id,
+                "agent": invocation_context.agent.name,
+            },
+        )
+
+    async def after_run_callback(self, *, invocation_context) -> None:
+        self._emit(
+            logging.INFO,
+            {
+                "event": "run_end",
+                "invocation_id": invocation_context.invocation_id,
+                "duration_ms": self._elapsed_ms(
+                    ("run", invocation_context.invocation_id)
+                ),
+            },
+        )
+
+    async def before_agent_callback(self, *, agent, callback_context) -> None:
+        self._start(("agent", callback_context.invocation_id, agent.name))
+
+    async def after_agent_callback(self, *, agent, callback_context) -> None:
+        self._emit(
+            logging.INFO,
+            {
+                "event": "agent_end",
+                "invocation_id": callback_context.invocation_id,
+                "agent": agent.name,
+                "duration_ms": self._elapsed_ms(
+                    ("agent", callback_context.invocation_id, agent.name)
+                ),
+            },
+        )
+
+    # ------------------------------------------------------------------------
+    # Model calls
+    # ------------------------------------------------------------------------
+
+    async def before_model_callback(self, *, callback_context, llm_request) -> None:
+        invocation_id = callback_context.invocation_id
+        self._start(("model", invocation_id, callback_context.agent_name))
+        if not self._sampled(invocation_id) or not self.logger.isEnabledFor(
+            logging.DEBUG
+        ):
+            return
+        last_content = llm_request.contents[-1] if llm_request.contents else None
+        self._emit(
+            logging.DEBUG,
+            {
+                "event": "model_request",
+                "invocation_id": invocation_id,
+                "agent": callback_context.agent_name,
+                "model": llm_request.model,
+                "num_contents": len(llm_request.contents),
+                "tools": list(llm_request.tools_dict),
+                "last_content": _truncate(
+                    _content_text(last_content), self.max_field_chars
+                ),
+            },
+        )
+
+    async def after_model_callback(self, *, callback_context, llm_response) -> None:
+        invocation_id = callback_context.invocation_id
+        record = {
+            "event": "model_response",
+            "invocation_id": invocation_id,
+            "agent": callback_context.agent_name,
+            "duration_ms": self._elapsed_ms(
+                ("model", invocation_id, callback_context.agent_name)
+            ),
+        }
+        usage = llm_response.usage_metadata
+        if usage:
+            record["prompt_tokens"] = usage.prompt_token_count
+            record["completion_tokens"] = usage.candidates_token_count
+        if self._sampled(invocation_id):
+            record["text"] = _truncate(
+                _content_text(llm_response.content), self.max_field_chars
+            )
+            if llm_response.content and llm_response.content.parts:
+                record["function_calls"] = [
+                    part.function_call.name
+                    for part in llm_response.content.parts
+                    if part.function_call
+                ]
+        self._emit(logging.INFO, record)
+
+    async def on_model_error_callback(
+        self, *, callback_context, llm_request, error
+    ) -> None:
+        self._emit(
+            logging.ERROR,
+            {
+                "event": "model_error",
+                "invocation_id": callback_context.invocation_id,
+                "agent": callback_context.agent_name,
+                "duration_ms": self._elapsed_ms(
+                    ("model", callback_context.invocation_id, callback_context.agent_name)
+                ),
+                "error": _truncate(repr(error), self.max_field_chars),
+            },
+        )
+
+    # ------------------------------------------------------------------------
+    # Tool calls
+    # ------------------------------------------------------------------------
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context) -> None:
+        self._start(("tool", tool_context.function_call_id))
+
+    async def after_tool_callback(
+        self, *, tool, tool_args, tool_context, result
+    ) -> None:
+        record = {
+            "event": "tool_call",
+            "invocation_id": tool_context.invocation_id,
+            "tool": tool.name,
+            "duration_ms": self._elapsed_ms(("tool", tool_context.function_call_id)),
+        }
+        if self._sampled(tool_context.invocation_id):
+            record["args"] = _truncate(tool_args, self.max_field_chars)
+            record["result"] = _truncate(result, self.max_field_chars)
+        self._emit(logging.INFO, record)
+
+    async def on_tool_error_callback(
+        self, *, tool, tool_args, tool_context, error
+    ) -> None:
+        self._emit(
+            logging.ERROR,
+            {
+                "event": "tool_error",
+                "invocation_id": tool_context.invocation_id,
+                "tool": tool.name,
+                "duration_ms": self._elapsed_ms(
+                    ("tool", tool_context.function_call_id)
+                ),
+                "args": _truncate(tool_args, self.max_field_chars),
+                "error": _truncate(repr(error), self.max_field_chars),
+            },
+        )
@@ -0,0 +1,312 @@
+"""
+Day 4b: Evaluation Throughput Benchmark
+
+Measures eval_runner.EvalRunner on a synthetic home-automation evalset
+(1,000 cases by default) without an API key: the agent runs on
+HomeAutomationModel (home_automation_model.py), a deterministic stand-in that
+turns "Turn on the <device> in the <room>" into a set_device_status call and
+confirms it, sleeping `--model-latency` seconds per model call like a real
+model round-trip.
+
+Benchmarks:
+- runner: cases/s with 1 worker (the `adk eval` behaviour; measured on a
+          sample) and with each --concurrency level; a cold and a warm run
+          of the response cache; a rerun after editing a few cases (only
+          those cases run again) and after changing the agent
+- early-abort: multi-turn cases, some of which diverge from the expected
+          trajectory in their first turn; model calls and time with and
+          without EvalRunner(trajectory_threshold=1.0)
+- response-match: response_match_score of many (response, expected) pairs
+          with ADK's reference ROUGE-1 scorer vs response_match.ResponseMatcher
+          one pair at a time and in batches; checks the scores are identical
+
+Usage:
+    python benchmark_evaluation.py runner
+    python benchmark_evaluation.py runner --cases 1000 --model-latency 0.05 --concurrency 8 32 128
+    python benchmark_evaluation.py early-abort --turns 3 --mismatch 0.3
+    python benchmark_evaluation.py response-match --pairs 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+from google.adk.agents import LlmAgent
+
+from eval_runner import EvalRunner, ResponseCache, load_eval_cases, score_results
+from home_automation_model import make_home_agent
+from response_match import ResponseMatcher
+
+ROOMS = ["living room", "kitchen", "bedroom", "garage", "office", "bathroom", "hallway"]
+DEVICES = ["floor lamp", "main light", "desk lamp", "fan", "heater", "speaker", "tv"]
+
+# ============================================================================
+# Synthetic Evalset and Agent
+# ============================================================================
+
+
+def make_synthetic_evalset(
+    path: str,
+    cases: int = 1000,
+    seed: int = 7,
+    turns: int = 1,
+    mismatch: float = 0.0,
+) -> None:
+    """
+    Write an evalset in the eval_cases layout of day_4b_agent_evaluation.py.
+
+    Each case has `turns` turns (like kitchen_on_off_sequence). In a
+    `mismatch` fraction of the cases the first turn expects a registry-style
+    device id ("kitchen_main_light"), so the agent's trajectory diverges there.
+    """
+    rng = random.Random(seed)
+    eval_cases = []
+    for index in range(cases):
+        room, device = rng.choice(ROOMS), rng.choice(DEVICES)
+        diverges = rng.random() < mismatch
+        conversation = []
+        for turn in range(turns):
+            status = "ON" if turn % 2 == 0 else "OFF"
+            expected_device = device
+            if diverges and turn == 0:
+                expected_device = f"{room} {device}".replace(" ", "_")
+            conversation.append(
+                {
+                    "user_content": {
+                        "parts": [{"text": f"Turn {status.lower()} the {device} "
+                                           f"in the {room} (request {index})."}]
+                    },
+                    "final_response": {
+                        "parts": [{"text": f"Successfully set the {device} in "
+                                           f"the {room} to {status.lower()}."}]
+                    },
+                    "intermediate_data": {
+                        "tool_uses": [
+                            {
+                                "name": "set_device_status",
+                                "args": {"location": room, "device_id": expected_device,
+                                         "status": status},
+                            }
+                        ]
+                    },
+                }
+            )
+        eval_cases.append({"eval_id": f"case_{index:05d}", "conversation": conversation})
+    with open(path, "w", encoding="utf-8") as evalset_file:
+        json.dump({"eval_set_id": "synthetic_home_automation", "eval_cases": eval_cases},
+                  evalset_file)
+
+
+def make_agent(
+    latency: float, instruction: str = "Control smart home devices."
+) -> LlmAgent:
+    return make_home_agent(instruction=instruction, latency=latency)
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+
+async def timed_run(agent, cases: List[Dict], concurrency: int, cache=None):
+    runner = EvalRunner(agent, concurrency=concurrency, cache=cache)
+    start = time.perf_counter()
+    results = await runner.run(cases)
+    return results, time.perf_counter() - start, runner.stats
+
+
+def _row(label: str, cases: int, seconds: float, stats: Dict) -> None:
+    print(f"{label:<34} {cases:>6} {seconds:>9.2f} {cases / seconds:>10.1f} "
+          f"{stats['executed']:>9} {stats['cached']:>7}")
+
+
+async def bench_runner(cases_count: int, latency: float, levels: List[int], sample: int):
+    workdir = tempfile.mkdtemp(prefix="eval_bench_")
+    evalset_path = os.path.join(workdir, "synthetic.evalset.json")
+    make_synthetic_evalset(evalset_path, cases_count)
+    cases = load_eval_cases(evalset_path)
+    agent = make_agent(latency)
+
+    print(f"{cases_count} cases, model latency {latency * 1000:.0f} ms per call "
+          f"(2 calls per case)\n")
+    print(f"{'run':<34} {'cases':>6} {'seconds':>9} {'cases/s':>10} "
+          f"{'executed':>9} {'cached':>7}")
+    print("-" * 80)
+
+    sequential = cases[:sample]
+    _, seconds, stats = await timed_run(agent, sequential, concurrency=1)
+    baseline = len(sequential) / seconds
+    _row("sequential (1 worker, sample)", len(sequential), seconds, stats)
+
+    for level in levels:
+        results, seconds, stats = await timed_run(agent, cases, concurrency=level)
+        _row(f"{level} workers", len(cases), seconds, stats)
+    print(f"\nspeedup at {levels[-1]} workers: {len(cases) / seconds / baseline:.1f}x")
+
+    scored = score_results(cases, results)
+    passed = sum(case["passed"] for case in scored)
+    print(f"scores: {passed}/{len(scored)} cases pass\n")
+
+    cache_path = os.path.join(workdir, "eval_cache.jsonl")
+    level = levels[-1]
+    _, seconds, stats = await timed_run(agent, cases, level, ResponseCache(cache_path))
+    _row(f"cache cold ({level} workers)", len(cases), seconds, stats)
+    _, seconds, stats = await timed_run(agent, cases, level, ResponseCache(cache_path))
+    _row(f"cache warm ({level} workers)", len(cases), seconds, stats)
+
+    # Edit 2% of the cases: only those rerun
+    edited = [dict(case) for case in cases]
+    for case in edited[:: 50]:
+        case["turns"] = [
+            dict(turn, user=turn["user"] + " Please.") for turn in case["turns"]
+        ]
+    _, seconds, stats = await timed_run(agent, edited, level, ResponseCache(cache_path))
+    _row("after editing 2% of cases", len(cases), seconds, stats)
+
+    # A changed instruction changes the agent fingerprint: everything reruns
+    changed_agent = make_agent(latency, instruction="Control smart home devices politely.")
+    _, seconds, stats = await timed_run(
+        changed_agent, cases, level, ResponseCache(cache_path)
+    )
+    _row("after changing the agent", len(cases), seconds, stats)
+
+
+async def bench_early_abort(
+    cases_count: int, latency: float, concurrency: int, turns: int, mismatch: float
+):
+    workdir = tempfile.mkdtemp(prefix="eval_bench_")
+    evalset_path = os.path.join(workdir, "synthetic.evalset.json")
+    make_synthetic_evalset(evalset_path, cases_count, turns=turns, mismatch=mismatch)
+    cases = load_eval_cases(evalset_path)
+
+    print(f"{cases_count} cases x {turns} turns, {mismatch:.0%} diverge in turn 0, "
+          f"model latency {latency * 1000:.0f} ms, {concurrency} workers\n")
+    print(f"{'run':<28} {'seconds':>9} {'model calls':>12} {'aborted':>8} {'passed':>7}")
+    print("-" * 68)
+    for label, threshold in [("run every case to the end", None),
+                             ("abort on divergence", 1.0)]:
+        agent = make_agent(latency)
+        runner = EvalRunner(agent, concurrency=concurrency, trajectory_threshold=threshold)
+        start = time.perf_counter()
+        results = await runner.run(cases)
+        seconds = time.perf_counter() - start
+        scored = score_results(cases, results)
+        passed = sum(case["passed"] for case in scored)
+        print(f"{label:<28} {seconds:>9.2f} {agent.model.calls:>12} "
+              f"{runner.stats['aborted']:>8} {passed:>7}")
+
+
+def synthetic_response_pairs(pairs: int, seed: int = 11):
+    """Agent-style responses and the expected responses they are scored against."""
+    rng = random.Random(seed)
+    templates = [
+        "Successfully set the {device} in the {room} to {status}.",
+        "I've turned the {device} in the {room} {status} for you.",
+        "Done! The {room} {device} is now {status}.",
+        "The {device} in your {room} has been switched {status}. Anything else?",
+        "Sorry, I couldn't reach the {device} in the {room}; it may be offline.",
+    ]
+    candidates, references = [], []
+    for _ in range(pairs):
+        room, device = rng.choice(ROOMS), rng.choice(DEVICES)
+        status = rng.choice(["on", "off"])
+        candidates.append(rng.choice(templates).format(room=room, device=device,
+                                                       status=status))
+        references.append(templates[0].format(room=room, device=device, status=status))
+    return candidates, references
+
+
+def bench_response_match(pairs: int, batch_size: int):
+    from google.adk.evaluation.final_response_match_v1 import (
+        _calculate_rouge_1_scores,
+    )
+
+    candidates, references = synthetic_response_pairs(pairs)
+    print(f"{pairs} (response, expected) pairs\n")
+    print(f"{'scorer':<40} {'seconds':>9} {'pairs/s':>11} {'speedup':>8}")
+    print("-" * 72)
+
+    start = time.perf_counter()
+    expected = np.array([
+        _calculate_rouge_1_scores(candidate, reference).fmeasure
+        for candidate, reference in zip(candidates, references)
+    ])
+    reference_seconds = time.perf_counter() - start
+    print(f"{'ADK RougeEvaluator scorer (reference)':<40} {reference_seconds:>9.3f} "
+          f"{pairs / reference_seconds:>11.0f} {1:>7.1f}x")
+
+    def report(label, run):
+        start = time.perf_counter()
+        scores = run()
+        seconds = time.perf_counter() - start
+        identical = bool(np.array_equal(scores, expected))
+        print(f"{label:<40} {seconds:>9.3f} {pairs / seconds:>11.0f} "
+              f"{reference_seconds / seconds:>7.1f}x  identical={identical}")
+
+    def one_by_one(matcher):
+        return np.array([
+            matcher.score(candidate, reference)
+            for candidate, reference in zip(candidates, references)
+        ])
+
+
+    def batched(matcher):
+        return np.concatenate([
+            matcher.score_batch(candidates[i:i + batch_size],
+                                references[i:i + batch_size])
+            for i in range(0, pairs, batch_size)
+        ])
+
+    report("ResponseMatcher.score, one by one", lambda: one_by_one(ResponseMatcher()))
+    warm = ResponseMatcher()
+    report(f"ResponseMatcher.score_batch ({batch_size}/batch)", lambda: batched(warm))
+    report("  same, texts already tokenized", lambda: batched(warm))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluation benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    runner_parser = subparsers.add_parser("runner", help="EvalRunner throughput")
+    runner_parser.add_argument("--cases", type=int, default=1000)
+    runner_parser.add_argument("--model-latency", type=float, default=0.02,
+                               help="Seconds per simulated model call")
+    runner_parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 128])
+    runner_parser.add_argument("--sequential-sample", type=int, default=100,
+                               help="Cases used for the 1-worker baseline")
+
+    abort_parser = subparsers.add_parser(
+        "early-abort", help="Model calls saved by aborting diverged cases"
+    )
+    abort_parser.add_argument("--cases", type=int, default=1000)
+    abort_parser.add_argument("--turns", type=int, default=3)
+    abort_parser.add_argument("--mismatch", type=float, default=0.3,
+                              help="Fraction of cases whose trajectory diverges")
+    abort_parser.add_argument("--model-latency", type=float, default=0.02)
+    abort_parser.add_argument("--concurrency", type=int, default=32)
+
+    match_parser = subparsers.add_parser(
+        "response-match", help="response_match_score: reference vs ResponseMatcher"
+    )
+    match_parser.add_argument("--pairs", type=int, default=5000)
+    match_parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.benchmark == "runner":
+        asyncio.run(bench_runner(args.cases, args.model_latency, args.concurrency,
+                                 args.sequential_sample))
+    elif args.benchmark == "early-abort":
+        asyncio.run(bench_early_abort(args.cases, args.model_latency, args.concurrency,
+                                      args.turns, args.mismatch))
+    elif args.benchmark == "response-match":
+        bench_response_match(args.pairs, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
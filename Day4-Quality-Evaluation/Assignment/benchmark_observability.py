@@ -0,0 +1,461 @@
+"""
+Day 4a: Observability Overhead Benchmarks
+
+Offline benchmarks for the observability plugins used in
+day_4a_agent_observability.py. No API key or network is needed: the agent
+runs on ScriptedModel, which calls count_papers once and then answers.
+
+Benchmarks:
+- metrics: per-turn overhead of MetricsPlugin and the cost of rendering /
+           scraping its Prometheus /metrics endpoint
+- tracing: per-turn overhead of TracingPlugin writing OTLP/JSON spans
+- profiler: per-turn overhead of SamplingProfilerPlugin and the hottest
+            frames / agents / tools it found
+- logging: per-turn latency with no plugin vs LoggingPlugin + synchronous
+           DEBUG file logging (setup_logging; the plugin's console output is
+           written to the same file) vs AsyncLoggingPlugin +
+           setup_async_logging (queue + background writer), full and sampled;
+           --sink-delay-ms simulates a slow log destination
+
+Usage:
+    python benchmark_observability.py logging
+    python benchmark_observability.py logging --turns 500 --payload-chars 20000
+    python benchmark_observability.py logging --sink-delay-ms 0.5
+    python benchmark_observability.py metrics --turns 300
+    python benchmark_observability.py tracing --turns 300
+    python benchmark_observability.py profiler --interval 0.01
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import statistics
+import tempfile
+import time
+import urllib.request
+from typing import Callable, Dict, List
+
+from google.adk.agents import LlmAgent
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.plugins.logging_plugin import LoggingPlugin
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from async_logging_plugin import AsyncLoggingPlugin, setup_async_logging
+from metrics_plugin import MetricsPlugin
+from profiler_plugin import SamplingProfilerPlugin
+from tracing_plugin import OtlpJsonFileExporter, TracingPlugin
+from scripted_model import ScriptedModel
+
+APP_NAME = "benchmark_app"
+USER_ID = "benchmark_user"
+
+# ============================================================================
+# Agent and Runner Helpers
+# ============================================================================
+
+
+def count_papers(papers: List[str]) -> int:
+    """
+    This function counts the number of papers in a list of strings.
+    Args:
+      papers: A list of strings, where each string is a research paper.
+    Returns:
+      The number of papers in the list.
+    """
+    return len(papers)
+
+
+class NoopPlugin(BasePlugin):
+    """Plugin with no callbacks: the cost of plugin dispatch alone."""
+
+    def __init__(self):
+        super().__init__(name="noop")
+
+
+def make_agent(payload_chars: int = 2000, latency: float = 0.0) -> LlmAgent:
+    """Research-style agent on ScriptedModel: one tool call, then an answer."""
+    papers = [f"Paper {i}: quantum computing advances" for i in range(20)]
+    model = ScriptedModel(
+        tool_calls=[("count_papers", {"papers": papers})],
+        final_text="Summary of findings. " * (payload_chars // 21 + 1),
+        latency=latency,
+    )
+    return LlmAgent(
+        name="research_paper_finder_agent",
+        model=model,
+        instruction="Find research papers and count them.",
+        tools=[count_papers],
+    )
+
+
+async def run_turns(
+    runner: InMemoryRunner, turns: int, turns_per_session: int = 5
+) -> List[float]:
+    """
+    Run `turns` user messages; return per-turn latency (ms).
+
+    A new session is started every `turns_per_session` turns so that history
+    growth does not dominate the measurement.
+    """
+    message = types.Content(
+        role="user", parts=[types.Part(text="Find recent papers on quantum computing")]
+    )
+    latencies = []
+    for turn in range(turns):
+        if turn % turns_per_session == 0:
+            session = await runner.session_service.create_session(
+                app_name=runner.app_name, user_id=USER_ID
+            )
+        start = time.perf_counter()
+        async for _event in runner.run_async(
+            user_id=USER_ID, session_id=session.id, new_message=message
+        ):
+            pass
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(latencies: List[float]) -> dict:
+    """p50 / p95 / mean of a latency list (ms)."""
+    ordered = sorted(latencies)
+    return {
+        "p50": statistics.median(ordered),
+        "p95": ordered[max(0, int(len(ordered) * 0.95) - 1)],
+        "mean": statistics.fmean(ordered),
+    }
+
+
+async def compare_plugins(
+    configurations: Dict[str, Callable[[], list]],
+    turns: int,
+    rounds: int,
+    model_latency: float,
+) -> Dict[str, List[float]]:
+    """
+    Per-turn latencies for each plugin configuration (name -> plugin factory).
+
+    Rounds are interleaved so that drift affects all configurations alike.
+    """
+    latencies = {name: [] for name in configurations}
+    for _ in range(rounds):
+        for name, make_plugins in configurations.items():
+            plugins = make_plugins()
+            runner = InMemoryRunner(
+                agent=make_agent(latency=model_latency),
+                app_name=APP_NAME,
+                plugins=plugins,
+            )
+            await run_turns(runner, min(10, turns))  # warm-up
+            latencies[name].extend(await run_turns(runner, turns // rounds))
+            for plugin in plugins:
+                await plugin.close()
+    return latencies
+
+
+def print_latency_table(latencies: Dict[str, List[float]]) -> None:
+    """Print p50 / p95 / mean and the mean added over the first configuration."""
+    print(f"{'configuration':<30} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'mean ms':>9} {'added ms':>9} {'added %':>8}")
+    print("-" * 79)
+    baseline = statistics.fmean(next(iter(latencies.values())))
+    for name, values in latencies.items():
+        stats = summarize(values)
+        added = stats["mean"] - baseline
+        print(f"{name:<30} {stats['p50']:>9.3f} {stats['p95']:>9.3f} "
+              f"{stats['mean']:>9.3f} {added:>9.3f} {added / baseline * 100:>7.1f}%")
+
+
+def slow_down(handler: logging.Handler, delay: float) -> None:
+    """Make every write of a log handler take `delay` extra seconds."""
+    if delay <= 0:
+        return
+    emit = handler.emit
+
+    def slow_emit(record):
+        time.sleep(delay)
+        emit(record)
+
+    handler.emit = slow_emit
+
+
+def reset_root_logging() -> None:
+    """Remove and close all root handlers between configurations."""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(logging.WARNING)
+
+
+# ============================================================================
+# Benchmarks
+# ============================================================================
+
+
+_LOGGING_CONFIGURATIONS = [
+    "no plugin",
+    "LoggingPlugin + sync file",
+    "AsyncLoggingPlugin + queue",
+    "AsyncLoggingPlugin sampled",
+]
+
+
+async def _run_logging_configuration(
+    name: str,
+    log_path: str,
+    turns: int,
+    payload_chars: int,
+    model_latency: float,
+    sink_delay: float,
+    sample_rate: float,
+) -> List[float]:
+    """Run one logging setup; LoggingPlugin's console output goes to log_path."""
+    reset_root_logging()
+    listener = None
+    plugins = []
+    console = open(os.devnull, "w")
+    if name == "LoggingPlugin + sync file":
+        logging.basicConfig(
+            filename=log_path,
+            level=logging.DEBUG,
+            format="%(filename)s:%(lineno)s %(levelname)s:%(message)s",
+        )
+        slow_down(logging.getLogger().handlers[0], sink_delay)
+        console.close()
+        console = open(log_path, "a")
+        plugins = [LoggingPlugin()]
+    elif name.startswith("AsyncLoggingPlugin"):
+        listener = setup_async_logging(log_path)
+        slow_down(listener.handlers[0], sink_delay)
+        rate = sample_rate if name.endswith("sampled") else 1.0
+        plugins = [AsyncLoggingPlugin(sample_rate=rate)]
+
+    runner = InMemoryRunner(
+        agent=make_agent(payload_chars, model_latency),
+        app_name=APP_NAME,
+        plugins=plugins,
+    )
+    try:
+        with contextlib.redirect_stdout(console):
+            await run_turns(runner, min(10, turns))  # warm-up
+            return await run_turns(runner, turns)
+    finally:
+        console.close()
+        if listener is not None:
+            listener.stop()
+        reset_root_logging()
+
+
+async def bench_logging(
+    turns: int,
+    rounds: int,
+    payload_chars: int,
+    model_latency: float,
+    sink_delay: float,
+    sample_rate: float,
+):
+    """Compare per-turn latency of the logging setups (rounds are interleaved)."""
+    workdir = tempfile.mkdtemp(prefix="adk_logging_bench_")
+    latencies = {name: [] for name in _LOGGING_CONFIGURATIONS}
+    for _ in range(rounds):
+        for name in _LOGGING_CONFIGURATIONS:
+            log_path = os.path.join(workdir, name.replace(" ", "_") + ".log")
+            latencies[name].extend(
+                await _run_logging_configuration(
+                    name,
+                    log_path,
+                    turns // rounds,
+                    payload_chars,
+                    model_latency,
+                    sink_delay,
+                    sample_rate,
+                )
+            )
+
+    print(f"{'configuration':<30} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'mean ms':>9} {'added ms':>9} {'log KB':>9}")
+    print("-" * 80)
+    baseline = statistics.fmean(latencies["no plugin"])
+    for name in _LOGGING_CONFIGURATIONS:
+        stats = summarize(latencies[name])
+        added = stats["mean"] - baseline
+        log_path = os.path.join(workdir, name.replace(" ", "_") + ".log")
+        log_kb = os.path.getsize(log_path) / 1024 if os.path.exists(log_path) else 0
+        print(f"{name:<30} {stats['p50']:>9.3f} {stats['p95']:>9.3f} "
+              f"{stats['mean']:>9.3f} {added:>9.3f} {log_kb:>9.0f}")
+
+    print(f"\nLog files: {workdir}")
+
+
+async def bench_metrics(turns: int, rounds: int, model_latency: float, port: int):
+    """MetricsPlugin overhead per turn, then render / scrape cost."""
+    plugin = MetricsPlugin()
+    latencies = await compare_plugins(
+        {"no plugin": lambda: [], "MetricsPlugin": lambda: [plugin]},
+        turns,
+        rounds,
+        model_latency,
+    )
+    print_latency_table(latencies)
+
+    series = sum(len(s) for s in plugin.registry.counters.values()) + sum(
+        len(s) for s in plugin.registry.histograms.values()
+    )
+    start = time.perf_counter()
+    for _ in range(100):
+        body = plugin.render_prometheus()
+    render_ms = (time.perf_counter() - start) * 10
+
+    plugin.serve(port=port)
+    start = time.perf_counter()
+    for _ in range(20):
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            response.read()
+    scrape_ms = (time.perf_counter() - start) * 50
+    await plugin.close()
+
+    print(f"\n{series} series, {len(body.splitlines())} exposition lines")
+    print(f"render: {render_ms:.3f} ms   HTTP scrape: {scrape_ms:.3f} ms")
+    print(f"agent runs: {plugin.agent_count}   LLM requests: "
+          f"{plugin.llm_request_count}   tool calls: {plugin.tool_count}")
+
+
+async def bench_tracing(turns: int, rounds: int, model_latency: float):
+    """TracingPlugin overhead per turn, including the OTLP/JSON file writes."""
+    workdir = tempfile.mkdtemp(prefix="adk_tracing_bench_")
+    trace_path = os.path.join(workdir, "traces.jsonl")
+    exporter = OtlpJsonFileExporter(trace_path)
+    latencies = await compare_plugins(
+        {"no plugin": lambda: [], "TracingPlugin": lambda: [TracingPlugin(exporter)]},
+        turns,
+        rounds,
+        model_latency,
+    )
+    print_latency_table(latencies)
+    with open(trace_path, encoding="utf-8") as trace_file:
+        traces = sum(1 for _ in trace_file)
+    print(f"\n{traces} traces, {os.path.getsize(trace_path) / 1024:.0f} KB: {trace_path}")
+    print(f"Summarize: python trace_summary.py {trace_path}")
+
+
+async def bench_profiler(
+    turns: int, rounds: int, model_latency: float, interval: float
+):
+    """SamplingProfilerPlugin overhead per turn and what it attributed CPU to."""
+    workdir = tempfile.mkdtemp(prefix="adk_profiler_bench_")
+    profilers = []
+
+    def make_profiler():
+        profiler = SamplingProfilerPlugin(
+            interval=interval,
+            output_path=os.path.join(workdir, f"profile_{len(profilers)}.folded"),
+        )
+        profilers.append(profiler)
+        return [profiler]
+
+    latencies = await compare_plugins(
+        {
+            "no plugin": lambda: [],
+            "NoopPlugin (dispatch only)": lambda: [NoopPlugin()],
+            "SamplingProfilerPlugin": make_profiler,
+        },
+        turns,
+        rounds,
+        model_latency,
+    )
+    print_latency_table(latencies)
+
+    samples = sum(p.samples for p in profilers)
+    sampler_cpu = sum(p.sampler_cpu_seconds for p in profilers)
+    attributed = sum(sum(p.stacks.values()) for p in profilers)
+    unattributed = sum(p.unattributed_us for p in profilers)
+    run_ms = sum(latencies["SamplingProfilerPlugin"])
+    print(f"\n{samples} samples; time spent sampling {sampler_cpu * 1000:.1f} ms "
+          f"= {sampler_cpu * 1000 / run_ms * 100:.2f}% of run time")
+    print(f"CPU attributed to stacks: {attributed / 1000:.1f} ms, "
+          f"unattributed (loop idle at sample time): {unattributed / 1000:.1f} ms")
+    print("\nHottest frames / tags (share of sampled CPU, last round):")
+    for frame, share in profilers[-1].top_frames(12):
+        print(f"  {share * 100:>5.1f}%  {frame}")
+    print(f"\nCollapsed stacks: {profilers[-1].output_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Observability overhead benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    logging_parser = subparsers.add_parser("logging", help="Logging plugin overhead")
+    logging_parser.add_argument("--turns", type=int, default=300)
+    logging_parser.add_argument("--rounds", type=int, default=3)
+    logging_parser.add_argument(
+        "--payload-chars",
+        type=int,
+        default=2000,
+        help="Length of the model's final answer",
+    )
+    logging_parser.add_argument(
+        "--model-latency",
+        type=float,
+        default=0.02,
+        help="Simulated seconds per model response (0 = CPU-bound run)",
+    )
+    logging_parser.add_argument(
+        "--sink-delay-ms",
+        type=float,
+        default=0.0,
+        help="Simulated extra latency per log write (slow disk / network share)",
+    )
+    logging_parser.add_argument(
+        "--sample-rate",
+        type=float,
+        default=0.1,
+        help="Sample rate of the 'sampled' AsyncLoggingPlugin configuration",
+    )
+
+    metrics_parser = subparsers.add_parser("metrics", help="Metrics plugin overhead")
+    metrics_parser.add_argument("--turns", type=int, default=300)
+    metrics_parser.add_argument("--rounds", type=int, default=3)
+    metrics_parser.add_argument("--model-latency", type=float, default=0.0)
+    metrics_parser.add_argument("--port", type=int, default=9464)
+
+    tracing_parser = subparsers.add_parser("tracing", help="Tracing plugin overhead")
+    tracing_parser.add_argument("--turns", type=int, default=300)
+    tracing_parser.add_argument("--rounds", type=int, default=3)
+    tracing_parser.add_argument("--model-latency", type=float, default=0.0)
+
+    profiler_parser = subparsers.add_parser("profiler", help="Sampling profiler overhead")
+    profiler_parser.add_argument("--turns", type=int, default=300)
+    profiler_parser.add_argument("--rounds", type=int, default=3)
+    profiler_parser.add_argument("--model-latency", type=float, default=0.0)
+    profiler_parser.add_argument("--interval", type=float, default=0.01)
+
+    args = parser.parse_args()
+
+    if args.benchmark == "logging":
+        asyncio.run(
+            bench_logging(
+                args.turns,
+                args.rounds,
+                args.payload_chars,
+                args.model_latency,
+                args.sink_delay_ms / 1000,
+                args.sample_rate,
+            )
+        )
+    elif args.benchmark == "metrics":
+        asyncio.run(
+            bench_metrics(args.turns, args.rounds, args.model_latency, args.port)
+        )
+    elif args.benchmark == "tracing":
+        asyncio.run(bench_tracing(args.turns, args.rounds, args.model_latency))
+    elif args.benchmark == "profiler":
+        asyncio.run(
+            bench_profiler(args.turns, args.rounds, args.model_latency, args.interval)
+        )
+
+
+if __name__ == "__main__":
+    main()
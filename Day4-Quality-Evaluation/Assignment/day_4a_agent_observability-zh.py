@@ -24,7 +24,14 @@ from google.adk.agents.base_agent import BaseAgent
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.models.llm_request import LlmRequest
 from google.genai import types
-from typing import List
+from typing import List, Optional
+
+from async_logging_plugin import AsyncLoggingPlugin, setup_async_logging
+from event_recorder import EventRecorderPlugin, summarize_recording
+from event_replay import replay_recording
+from metrics_plugin import MetricsPlugin
+from profiler_plugin import SamplingProfilerPlugin
+from tracing_plugin import OtlpJsonFileExporter, TracingPlugin
 
 # ============================================================================
 # 设置和配置
@@ -49,22 +56,35 @@ print("✅ API 密钥从 .env 文件加载")
 # ============================================================================
 
 
-def setup_logging():
-    """设置具有 DEBUG 级别的日志记录配置"""
+def setup_logging(async_writer: bool = False):
+    """
+    设置具有 DEBUG 级别的日志记录配置
+
+    async_writer=True 时，日志记录经队列交给后台线程，写入可轮转的 JSON-lines
+    文件（见 async_logging_plugin.py）。返回需在关闭时 stop() 的 QueueListener，
+    否则返回 None。
+    """
     # 清理任何先前的日志
     for log_file in ["logger.log", "web.log", "tunnel.log"]:
         if os.path.exists(log_file):
             os.remove(log_file)
             print(f"🧹 已清理 {log_file}")
 
-    # 配置具有 DEBUG 日志级别的日志记录
+    if async_writer:
+        listener = setup_async_logging("logger.log", level=logging.DEBUG)
+        print("✅ 异步日志记录已配置")
+        return listener
+
+    # 配置具有 DEBUG 日志级别的日志记录（force 会替换之前的处理器）
     logging.basicConfig(
         filename="logger.log",
         level=logging.DEBUG,
         format="%(filename)s:%(lineno)s %(levelname)s:%(message)s",
+        force=True,
     )
 
     print("✅ 日志记录已配置")
+    return None
 
 
 MODEL_NAME = "volcengine/doubao-1-5-lite-32k-250115"
@@ -213,8 +233,13 @@ class CountInvocationPlugin(BasePlugin):
 # ============================================================================
 
 
-def create_agent_with_logging_plugin():
-    """创建带有 LoggingPlugin 的研究代理以实现全面的可观测性"""
+def create_agent_with_logging_plugin(plugins: Optional[List[BasePlugin]] = None):
+    """
+    创建带有 LoggingPlugin 的研究代理以实现全面的可观测性
+
+    可传入 `plugins` 改用其他可观测性插件，例如 [AsyncLoggingPlugin()]
+    以低开销记录结构化日志。
+    """
 
     # 搜索代理
     search_agent = LlmAgent(
@@ -247,7 +272,8 @@ def create_agent_with_logging_plugin():
     # 创建带有 LoggingPlugin 的运行器
     runner = InMemoryRunner(
         agent=research_agent,
-        plugins=[LoggingPlugin()],  # 处理标准可观测性日志记录
+        # LoggingPlugin 处理标准可观测性日志记录
+        plugins=plugins if plugins is not None else [LoggingPlugin()],
     )
 
     return runner
@@ -304,6 +330,36 @@ async def demo_logging_plugin():
     print("• 此方法可扩展用于生产系统")
 
 
+async def demo_async_logging_plugin():
+    """演示 AsyncLoggingPlugin：在热路径之外写入结构化日志"""
+    print("\n" + "=" * 80)
+    print("演示：带有 AsyncLoggingPlugin 的研究代理")
+    print("=" * 80)
+
+    listener = setup_logging(async_writer=True)
+
+    # 每 4 次调用保留 1 次完整负载；生命周期记录和错误始终记录
+    runner = create_agent_with_logging_plugin(
+        plugins=[AsyncLoggingPlugin(sample_rate=0.25, max_field_chars=500)]
+    )
+
+    print("\n🚀 使用 AsyncLoggingPlugin 运行代理...")
+    response = await runner.run_debug("查找最近的量子计算论文")
+
+    # 停止 listener 会把队列中的记录刷新到 logger.log，并从根日志记录器移除队列处理器
+    listener.stop()
+
+    with open("logger.log", encoding="utf-8") as log_file:
+        records = sum(1 for _ in log_file)
+
+    print("\n✅ 代理执行完成！")
+    print("\n📋 关键观察：")
+    print(f"• 后台线程向 logger.log 写入了 {records} 条 JSON-lines 记录")
+    print("• 每条记录包含 event、invocation_id、agent/tool、duration_ms、token 数")
+    print("• 大负载会被截断；详细记录按比例采样")
+    print("• 比较开销：python benchmark_observability.py logging")
+
+
 async def demo_custom_plugin():
     """演示创建和使用自定义插件"""
     print("\n" + "=" * 80)
@@ -332,6 +388,115 @@ async def demo_custom_plugin():
     print("\n💡 自定义插件允许您添加任何您需要的可观测性逻辑！")
 
 
+async def demo_metrics_plugin():
+    """演示 MetricsPlugin：延迟直方图、token 计数和 /metrics 端点"""
+    print("\n" + "=" * 80)
+    print("演示：指标插件（扩展 CountInvocationPlugin 的计数器）")
+    print("=" * 80)
+
+    agent = create_research_agent_fixed()
+    metrics = MetricsPlugin()
+    metrics.serve(port=9464)
+
+    runner = InMemoryRunner(agent=agent, plugins=[metrics])
+
+    print("\n📈 使用 MetricsPlugin 运行代理...")
+    print("运行期间可抓取：curl http://127.0.0.1:9464/metrics\n")
+
+    response = await runner.run_debug("查找机器学习论文")
+
+    print("\n📊 指标插件统计：")
+    print(f"   • 代理调用：{metrics.agent_count}")
+    print(f"   • LLM 请求：{metrics.llm_request_count}")
+    print(f"   • 工具调用：{metrics.tool_count}")
+    for series, stats in sorted(metrics.summary().items()):
+        print(f"   • {series}: n={stats['count']} p50<={stats['p50']}s p95<={stats['p95']}s")
+
+    print("\n📄 Prometheus 文本格式（前几行）：")
+    for line in metrics.render_prometheus().splitlines()[:12]:
+        print(f"   {line}")
+
+    await metrics.close()
+
+
+async def demo_tracing_plugin():
+    """演示 TracingPlugin：为调用、代理、模型和工具生成 span"""
+    print("\n" + "=" * 80)
+    print("演示：跨代理、工具和子代理的 Span 追踪")
+    print("=" * 80)
+
+    if os.path.exists("traces.jsonl"):
+        os.remove("traces.jsonl")
+
+    # 研究代理通过 AgentTool 调用 search_agent：子代理的 span 嵌套在
+    # execute_tool span 之下
+    tracing = TracingPlugin(OtlpJsonFileExporter("traces.jsonl"))
+    runner = create_agent_with_logging_plugin(plugins=[tracing])
+
+    print("\n🔭 使用 TracingPlugin 运行代理...")
+    response = await runner.run_debug("查找最近的量子计算论文")
+    await tracing.close()
+
+    print("\n✅ Span 已写入 traces.jsonl（OTLP/JSON，每行一个导出请求）")
+    print("👉 查看本轮时间花在哪里：")
+    print("   python trace_summary.py traces.jsonl")
+    print("   python trace_summary.py traces.jsonl --collapsed > stacks.folded")
+
+
+async def demo_profiler_plugin():
+    """演示 SamplingProfilerPlugin（需显式开启：设置 ADK_PROFILE=1）"""
+    print("\n" + "=" * 80)
+    print("演示：采样分析器（按代理 / 工具统计 CPU 时间）")
+    print("=" * 80)
+
+    if os.getenv("ADK_PROFILE") != "1":
+        print("\n⏭️  已跳过。分析器需显式开启：使用 ADK_PROFILE=1 运行")
+        return
+
+    profiler = SamplingProfilerPlugin(interval=0.01, output_path="profile.folded")
+    runner = create_agent_with_logging_plugin(plugins=[profiler])
+
+    print("\n🔬 使用 SamplingProfilerPlugin 运行代理...")
+    response = await runner.run_debug("查找最近的量子计算论文")
+    await profiler.close()
+
+    print(f"\n📊 {profiler.samples} 个样本；最热的帧和代理/工具标签：")
+    for frame, share in profiler.top_frames(10):
+        print(f"   {share * 100:5.1f}%  {frame}")
+    print("\n✅ 折叠栈已写入 profile.folded")
+    print("👉 flamegraph.pl profile.folded > profile.svg（或在 speedscope 中打开）")
+
+
+async def demo_event_recorder():
+    """演示 EventRecorderPlugin 以及录制结果的离线回放"""
+    print("\n" + "=" * 80)
+    print("演示：录制一次运行并离线回放")
+    print("=" * 80)
+
+    recorder = EventRecorderPlugin("research.events.jsonl.gz")
+    runner = create_agent_with_logging_plugin(plugins=[recorder])
+
+    print("\n⏺️  使用 EventRecorderPlugin 录制代理运行...")
+    response = await runner.run_debug("查找最近的量子计算论文")
+    await recorder.close()
+
+    summary = summarize_recording("research.events.jsonl.gz")
+    print(f"\n✅ {recorder.records} 条记录已写入 research.events.jsonl.gz")
+    print(f"   {summary['model_calls']} 次模型调用，{summary['tool_calls']} 次工具调用，"
+          f"墙钟 {summary['wall_ms']:.0f} ms（模型耗时 {summary['model_ms']:.0f} ms）")
+
+    # 同一个代理，模型替换为录制的响应：不调用 API
+    print("\n⏯️  离线回放录制结果（录制的响应，无延迟）...")
+    replay_agent = create_agent_with_logging_plugin(plugins=[]).agent
+    result = await replay_recording(replay_agent, "research.events.jsonl.gz", rounds=3)
+    wall, cpu = result["wall_ms"], result["cpu_ms"]
+    print(f"   {len(wall)} 轮：每轮墙钟 {sum(wall) / len(wall):.1f} ms，"
+          f"CPU {sum(cpu) / len(cpu):.1f} ms，"
+          f"{result['divergences']} 次模型调用与录制不一致")
+    print("👉 对比框架改动：python event_replay.py research.events.jsonl.gz "
+          "--agent day_4a_agent_observability-zh.py:create_research_agent_fixed")
+
+
 # ============================================================================
 # 主函数
 # ============================================================================
@@ -356,16 +521,36 @@ async def main():
     # 演示2：LoggingPlugin
     await demo_logging_plugin()
 
-    # 演示3：自定义插件
+    # 演示3：异步 LoggingPlugin
+    await demo_async_logging_plugin()
+
+    # 演示4：自定义插件
     await demo_custom_plugin()
 
+    # 演示5：指标插件
+    await demo_metrics_plugin()
+
+    # 演示6：追踪插件
+    await demo_tracing_plugin()
+
+    # 演示7：采样分析器（需显式开启）
+    await demo_profiler_plugin()
+
+    # 演示 8：事件录制与回放
+    await demo_event_recorder()
+
     print("\n" + "=" * 80)
     print("总结")
     print("=" * 80)
     print("\n❓ 何时使用哪种类型的日志记录？")
     print("1. 开发调试 → 使用 'adk web --log_level DEBUG'")
     print("2. 常见生产可观测性 → 使用 LoggingPlugin()")
+    print("   高流量生产环境 → AsyncLoggingPlugin() + setup_logging(async_writer=True)")
     print("3. 自定义需求 → 构建自定义回调和插件")
+    print("   延迟 / token 仪表盘 → MetricsPlugin() + Prometheus /metrics")
+    print("   慢的一轮时间花在哪里？→ TracingPlugin() + trace_summary.py")
+    print("   CPU 花在哪里？→ SamplingProfilerPlugin()（ADK_PROFILE=1）")
+    print("   改动是否让每轮变慢？→ EventRecorderPlugin() + event_replay.py")
 
     print("\n🎯 关键要点：")
     print("✅ 核心调试模式：症状 → 日志 → 根本原因 → 修复")
@@ -25,7 +25,14 @@ from google.adk.agents.base_agent import BaseAgent
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.models.llm_request import LlmRequest
 from google.genai import types
-from typing import List
+from typing import List, Optional
+
+from async_logging_plugin import AsyncLoggingPlugin, setup_async_logging
+from event_recorder import EventRecorderPlugin, summarize_recording
+from event_replay import replay_recording
+from metrics_plugin import MetricsPlugin
+from profiler_plugin import SamplingProfilerPlugin
+from tracing_plugin import OtlpJsonFileExporter, TracingPlugin
 
 # ============================================================================
 # Setup and Configuration
@@ -50,22 +57,35 @@ print("✅ API key loaded from .env file")
 # ============================================================================
 
 
-def setup_logging():
-    """Set up logging configuration with DEBUG level"""
+def setup_logging(async_writer: bool = False):
+    """
+    Set up logging configuration with DEBUG level
+
+    With async_writer=True, records go through a queue to a background thread
+    that writes rotating JSON-lines files (see async_logging_plugin.py).
+    Returns the QueueListener to stop() on shutdown, or None.
+    """
     # Clean up any previous logs
     for log_file in ["logger.log", "web.log", "tunnel.log"]:
         if os.path.exists(log_file):
             os.remove(log_file)
             print(f"🧹 Cleaned up {log_file}")
 
-    # Configure logging with DEBUG log level
+    if async_writer:
+        listener = setup_async_logging("logger.log", level=logging.DEBUG)
+        print("✅ Async logging configured")
+        return listener
+
+    # Configure logging with DEBUG log level (force replaces earlier handlers)
     logging.basicConfig(
         filename="logger.log",
         level=logging.DEBUG,
         format="%(filename)s:%(lineno)s %(levelname)s:%(message)s",
+        force=True,
     )
 
     print("✅ Logging configured")
+    return None
 
 
 # ============================================================================
@@ -213,8 +233,13 @@ class CountInvocationPlugin(BasePlugin):
 # ============================================================================
 
 
-def create_agent_with_logging_plugin():
-    """Create research agent with LoggingPlugin for comprehensive observability"""
+def create_agent_with_logging_plugin(plugins: Optional[List[BasePlugin]] = None):
+    """
+    Create research agent with LoggingPlugin for comprehensive observability
+
+    Pass `plugins` to use other observability plugins instead, e.g.
+    [AsyncLoggingPlugin()] for low-overhead structured logs.
+    """
 
     # Google search agent
     google_search_agent = LlmAgent(
@@ -242,7 +267,8 @@ def create_agent_with_logging_plugin():
     # Create runner with LoggingPlugin
     runner = InMemoryRunner(
         agent=research_agent,
-        plugins=[LoggingPlugin()],  # Handles standard Observability logging
+        # LoggingPlugin handles standard Observability logging
+        plugins=plugins if plugins is not None else [LoggingPlugin()],
     )
 
     return runner
@@ -299,6 +325,38 @@ async def demo_logging_plugin():
     print("• This approach scales for production systems")
 
 
+async def demo_async_logging_plugin():
+    """Demonstrate AsyncLoggingPlugin: structured logs written off the hot path"""
+    print("\n" + "=" * 80)
+    print("DEMO: Research Agent with AsyncLoggingPlugin")
+    print("=" * 80)
+
+    listener = setup_logging(async_writer=True)
+
+    # Keep full payloads for 1 in 4 invocations; lifecycle records and errors
+    # are always logged
+    runner = create_agent_with_logging_plugin(
+        plugins=[AsyncLoggingPlugin(sample_rate=0.25, max_field_chars=500)]
+    )
+
+    print("\n🚀 Running agent with AsyncLoggingPlugin...")
+    response = await runner.run_debug("Find recent papers on quantum computing")
+
+    # Stopping the listener flushes the queue to logger.log and removes the
+    # queue handler from the root logger
+    listener.stop()
+
+    with open("logger.log", encoding="utf-8") as log_file:
+        records = sum(1 for _ in log_file)
+
+    print("\n✅ Agent execution complete!")
+    print("\n📋 Key Observations:")
+    print(f"• {records} JSON-lines records written to logger.log by a background thread")
+    print("• Each record has event, invocation_id, agent/tool, duration_ms, tokens")
+    print("• Large payloads are truncated; verbose records are sampled")
+    print("• Compare overhead: python benchmark_observability.py logging")
+
+
 async def demo_custom_plugin():
     """Demonstrate creating and using a custom plugin"""
     print("\n" + "=" * 80)
@@ -327,6 +385,115 @@ async def demo_custom_plugin():
     print("\n💡 Custom plugins allow you to add any observability logic you need!")
 
 
+async def demo_metrics_plugin():
+    """Demonstrate MetricsPlugin: latency histograms, tokens and a /metrics endpoint"""
+    print("\n" + "=" * 80)
+    print("DEMO: Metrics Plugin (extends CountInvocationPlugin's counters)")
+    print("=" * 80)
+
+    agent = create_research_agent_fixed()
+    metrics = MetricsPlugin()
+    metrics.serve(port=9464)
+
+    runner = InMemoryRunner(agent=agent, plugins=[metrics])
+
+    print("\n📈 Running agent with MetricsPlugin...")
+    print("Scrape while it runs: curl http://127.0.0.1:9464/metrics\n")
+
+    response = await runner.run_debug("Find papers on machine learning")
+
+    print("\n📊 Metrics Plugin Statistics:")
+    print(f"   • Agent invocations: {metrics.agent_count}")
+    print(f"   • LLM requests: {metrics.llm_request_count}")
+    print(f"   • Tool calls: {metrics.tool_count}")
+    for series, stats in sorted(metrics.summary().items()):
+        print(f"   • {series}: n={stats['count']} p50<={stats['p50']}s p95<={stats['p95']}s")
+
+    print("\n📄 Prometheus text format (first lines):")
+    for line in metrics.render_prometheus().splitlines()[:12]:
+        print(f"   {line}")
+
+    await metrics.close()
+
+
+async def demo_tracing_plugin():
+    """Demonstrate TracingPlugin: spans for invocations, agents, models and tools"""
+    print("\n" + "=" * 80)
+    print("DEMO: Span Tracing across Agents, Tools and Sub-agents")
+    print("=" * 80)
+
+    if os.path.exists("traces.jsonl"):
+        os.remove("traces.jsonl")
+
+    # The research agent calls google_search_agent through AgentTool: the
+    # sub-agent's spans are nested under the execute_tool span
+    tracing = TracingPlugin(OtlpJsonFileExporter("traces.jsonl"))
+    runner = create_agent_with_logging_plugin(plugins=[tracing])
+
+    print("\n🔭 Running agent with TracingPlugin...")
+    response = await runner.run_debug("Find recent papers on quantum computing")
+    await tracing.close()
+
+    print("\n✅ Spans written to traces.jsonl (OTLP/JSON, one export request per line)")
+    print("👉 See where the turn spent its time:")
+    print("   python trace_summary.py traces.jsonl")
+    print("   python trace_summary.py traces.jsonl --collapsed > stacks.folded")
+
+
+async def demo_profiler_plugin():
+    """Demonstrate SamplingProfilerPlugin (opt-in: set ADK_PROFILE=1)"""
+    print("\n" + "=" * 80)
+    print("DEMO: Sampling Profiler (CPU time by agent / tool)")
+    print("=" * 80)
+
+    if os.getenv("ADK_PROFILE") != "1":
+        print("\n⏭️  Skipped. The profiler is opt-in: run with ADK_PROFILE=1")
+        return
+
+    profiler = SamplingProfilerPlugin(interval=0.01, output_path="profile.folded")
+    runner = create_agent_with_logging_plugin(plugins=[profiler])
+
+    print("\n🔬 Running agent with SamplingProfilerPlugin...")
+    response = await runner.run_debug("Find recent papers on quantum computing")
+    await profiler.close()
+
+    print(f"\n📊 {profiler.samples} samples; hottest frames and agent/tool tags:")
+    for frame, share in profiler.top_frames(10):
+        print(f"   {share * 100:5.1f}%  {frame}")
+    print("\n✅ Collapsed stacks written to profile.folded")
+    print("👉 flamegraph.pl profile.folded > profile.svg  (or open in speedscope)")
+
+
+async def demo_event_recorder():
+    """Demonstrate EventRecorderPlugin and an offline replay of the recording"""
+    print("\n" + "=" * 80)
+    print("DEMO: Record a Run, Replay it Offline")
+    print("=" * 80)
+
+    recorder = EventRecorderPlugin("research.events.jsonl.gz")
+    runner = create_agent_with_logging_plugin(plugins=[recorder])
+
+    print("\n⏺️  Recording agent run with EventRecorderPlugin...")
+    response = await runner.run_debug("Find recent papers on quantum computing")
+    await recorder.close()
+
+    summary = summarize_recording("research.events.jsonl.gz")
+    print(f"\n✅ {recorder.records} records written to research.events.jsonl.gz")
+    print(f"   {summary['model_calls']} model calls, {summary['tool_calls']} tool calls, "
+          f"{summary['wall_ms']:.0f} ms wall ({summary['model_ms']:.0f} ms in the model)")
+
+    # Same agent, models swapped for the recorded responses: no API calls
+    print("\n⏯️  Replaying the recording offline (recorded responses, no latency)...")
+    replay_agent = create_agent_with_logging_plugin(plugins=[]).agent
+    result = await replay_recording(replay_agent, "research.events.jsonl.gz", rounds=3)
+    wall, cpu = result["wall_ms"], result["cpu_ms"]
+    print(f"   {len(wall)} turns: wall {sum(wall) / len(wall):.1f} ms, "
+          f"cpu {sum(cpu) / len(cpu):.1f} ms per turn, "
+          f"{result['divergences']} diverged model calls")
+    print("👉 Compare framework changes: python event_replay.py research.events.jsonl.gz "
+          "--agent day_4a_agent_observability:create_research_agent_fixed")
+
+
 # ============================================================================
 # Main Function
 # ============================================================================
@@ -351,16 +518,36 @@ async def main():
     # Demo 2: LoggingPlugin
     await demo_logging_plugin()
 
-    # Demo 3: Custom Plugin
+    # Demo 3: Async LoggingPlugin
+    await demo_async_logging_plugin()
+
+    # Demo 4: Custom Plugin
     await demo_custom_plugin()
 
+    # Demo 5: Metrics Plugin
+    await demo_metrics_plugin()
+
+    # Demo 6: Tracing Plugin
+    await demo_tracing_plugin()
+
+    # Demo 7: Sampling Profiler (opt-in)
+    await demo_profiler_plugin()
+
+    # Demo 8: Event Recorder and Replay
+    await demo_event_recorder()
+
     print("\n" + "=" * 80)
     print("SUMMARY")
     print("=" * 80)
     print("\n❓ When to use which type of logging?")
     print("1. Development debugging → Use 'adk web --log_level DEBUG'")
     print("2. Common production observability → Use LoggingPlugin()")
+    print("   High-traffic production → AsyncLoggingPlugin() + setup_logging(async_writer=True)")
     print("3. Custom requirements → Build Custom Callbacks and Plugins")
+    print("   Latency / token dashboards → MetricsPlugin() + Prometheus /metrics")
+    print("   Where does a slow turn spend its time? → TracingPlugin() + trace_summary.py")
+    print("   Where does CPU go? → SamplingProfilerPlugin() (ADK_PROFILE=1)")
+    print("   Did a change make turns slower? → EventRecorderPlugin() + event_replay.py")
 
     print("\n🎯 Key Takeaways:")
     print("✅ Core debugging pattern: symptom → logs → root cause → fix")
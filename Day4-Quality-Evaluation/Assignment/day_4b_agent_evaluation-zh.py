@@ -19,6 +19,8 @@ from google.adk.models.lite_llm import LiteLlm
 from google.adk.runners import InMemoryRunner
 from google.genai import types
 
+from evalset_stream import EvalsetWriter
+
 # ============================================================================
 # 设置和配置
 # ============================================================================
@@ -171,16 +173,12 @@ def create_test_cases(output_dir: str = "."):
         }
     ]
 
-    # 创建评估集
-    eval_set = {
-        "description": "家庭自动化代理的集成测试",
-        "test_cases": test_cases
-    }
-
-    # 写入文件
+    # 逐个用例写入评估集：生成的评估集可能有数万个用例
     eval_path = os.path.join(output_dir, "integration.evalset.json")
-    with open(eval_path, "w") as f:
-        json.dump(eval_set, f, indent=2)
+    metadata = {"description": "家庭自动化代理的集成测试"}
+    with EvalsetWriter(eval_path, metadata, cases_key="test_cases", indent=2) as writer:
+        for case in test_cases:
+            writer.write(case)
 
     return eval_path
 
@@ -223,6 +221,13 @@ async def run_evaluation_demo():
     print(f"              --config_file_path={config_path} \\")
     print(f"              --print_detailed_results")
 
+    print("\n⚡ 大型评估集：并发运行用例并跳过未改动的用例：")
+    print(f"   python eval_runner.py {test_cases_path} \\")
+    print(f"              --agent day_4b_agent_evaluation-zh.py:create_home_automation_agent \\")
+    print(f"              --config {config_path} --concurrency 8")
+    print("   • 代理响应按用例 + 代理指纹缓存")
+    print("   • 只有用户输入（或代理）发生变化的用例才会重新运行")
+
 
 # ============================================================================
 # 第5节：评估指标解释
@@ -356,6 +361,11 @@ async def main():
     print("• Pytest 集成：https://google.github.io/adk-docs/evaluate/#2-pytest-run-tests-programmatically")
     print("• 用户模拟：https://google.github.io/adk-docs/evaluate/user-sim/")
 
+    print("\n📈 用模拟用户做负载测试：")
+    print("   python load_generator.py --users 50 200 1000 2000 --stage-seconds 10")
+    print("   • 成千上万个并发用户，来自脚本化和由 LLM 扮演的用户画像")
+    print("   • 每个负载级别的 p50/p95/p99 轮次延迟、吞吐量和错误率")
+
     print("\n🚀 下一步：")
     print("• 将评估应用于您自己的代理")
     print("• 构建全面的测试套件")
@@ -19,6 +19,8 @@ from google.adk.agents import LlmAgent
 from google.adk.models.google_llm import Gemini
 from google.genai import types
 
+from evalset_stream import EvalsetWriter
+
 # ============================================================================
 # Setup and Configuration
 # ============================================================================
@@ -222,9 +224,12 @@ def create_evaluation_test_cases(output_dir: str = "."):
         ],
     }
 
+    # Written case by case: generated evalsets can have tens of thousands
     evalset_path = os.path.join(output_dir, "integration.evalset.json")
-    with open(evalset_path, "w") as f:
-        json.dump(test_cases, f, indent=2)
+    metadata = {"eval_set_id": test_cases["eval_set_id"]}
+    with EvalsetWriter(evalset_path, metadata, indent=2) as writer:
+        for case in test_cases["eval_cases"]:
+            writer.write(case)
 
     print("✅ Evaluation test cases created")
     print(f"   Saved to: {evalset_path}")
@@ -340,6 +345,13 @@ def demo_systematic_evaluation():
     print(f"            --config_file_path={config_path} \\")
     print(f"            --print_detailed_results")
 
+    print("\n⚡ Large evalsets: run cases concurrently and skip unchanged ones:")
+    print(f"   python eval_runner.py {evalset_path} \\")
+    print(f"            --agent day_4b_agent_evaluation:create_home_automation_agent \\")
+    print(f"            --config {config_path} --concurrency 8")
+    print("   • Agent responses are cached per case + agent fingerprint")
+    print("   • Only cases whose user turns (or the agent) changed run again")
+
 
 def demo_user_simulation():
     """Demonstrate advanced user simulation concepts"""
@@ -379,6 +391,13 @@ def demo_user_simulation():
     print("   • Implement ConversationScenario for your agent")
     print("   • Test against dynamic, realistic conversations")
 
+    print("\n📈 Load Testing with Simulated Users:")
+    print("   python load_generator.py --users 50 200 1000 2000 --stage-seconds 10")
+    print("   • Thousands of concurrent users from scripted and LLM-played personas")
+    print("   • p50/p95/p99 turn latency, throughput and error rate per load level")
+    print("   • Offline by default (fake model); --agent day_4b_agent_evaluation:"
+          "create_home_automation_agent --fake-model")
+
 
 def demo_best_practices():
     """Share evaluation best practices"""
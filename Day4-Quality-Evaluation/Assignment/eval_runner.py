@@ -0,0 +1,551 @@
+"""
+Day 4b: Parallel, Cached Evaluation Runner
+
+`adk eval` runs eval cases one after another and reruns every case each time.
+Agent turns mostly wait on the model, so a suite of a few hundred cases spends
+nearly all of its time idle. EvalRunner:
+
+- runs cases concurrently on a bounded pool of worker tasks (`concurrency`),
+  each case in its own session
+- caches the agent's responses (final text + tool calls per turn) keyed by
+  the case's user turns and a fingerprint of the agent (models, instructions,
+  tool source code, sub-agents). Unchanged cases are answered from the cache;
+  editing the agent or a case's user turns reruns only what changed. Expected
+  responses are not part of the key: changing them only rescores.
+- optionally checks each tool call against the expected trajectory as soon
+  as the model requests it, and aborts a case once its
+  tool_trajectory_avg_score can no longer reach the threshold (TrajectoryCheck)
+- scores the responses (tool_trajectory_avg_score with ADK's evaluator,
+  response_match_score in one batch with response_match.ResponseMatcher),
+  using the thresholds of test_config.json
+
+Reads both evalset layouts used in this course: ADK's `eval_cases` /
+`conversation` format (day_4b_agent_evaluation.py) and the simpler
+`test_cases` format (day_4b_agent_evaluation-zh.py).
+
+Usage:
+    python eval_runner.py home_automation_agent/integration.evalset.json \\
+        --agent day_4b_agent_evaluation:create_home_automation_agent \\
+        --config home_automation_agent/test_config.json --concurrency 8
+
+    # In code
+    runner = EvalRunner(create_home_automation_agent(), concurrency=8,
+                        cache=ResponseCache("eval_cache.jsonl"))
+    results = await runner.run(load_eval_cases("integration.evalset.json"))
+    scores = score_results(cases, results, {"response_match_score": 0.8})
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import inspect
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from google.adk import version as adk_version
+from google.adk.agents import LlmAgent
+from google.adk.runners import InMemoryRunner
+from google.adk.tools.agent_tool import AgentTool
+from google.adk.tools.function_tool import FunctionTool
+from google.genai import types
+
+from evalset_stream import iter_eval_cases
+from response_match import ResponseMatcher
+
+APP_NAME = "eval_app"
+USER_ID = "eval_user"
+
+DEFAULT_CRITERIA = {"tool_trajectory_avg_score": 1.0, "response_match_score": 0.8}
+_METRICS = ("tool_trajectory_avg_score", "response_match_score")
+
+# ============================================================================
+# Loading Eval Cases
+# ============================================================================
+
+
+def _parts_text(content: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not content:
+        return None
+    return "\n".join(part["text"] for part in content.get("parts", []) if part.get("text"))
+
+
+def normalize_case(raw: Dict[str, Any], index: int = 0) -> Dict[str, Any]:
+    """
+    One eval case in either layout ->
+    {"eval_id", "turns": [{"user", "expected_response", "expected_tool_uses"}]}
+    """
+    if "conversation" in raw:
+        turns = [
+            {
+                "user": _parts_text(turn["user_content"]) or "",
+                "expected_response": _parts_text(turn.get("final_response")),
+                "expected_tool_uses": [
+                    {"name": use["name"], "args": use.get("args", {})}
+                    for use in (turn.get("intermediate_data") or {}).get("tool_uses", [])
+                ],
+            }
+            for turn in raw["conversation"]
+        ]
+        return {"eval_id": raw["eval_id"], "turns": turns}
+
+    return {
+        "eval_id": raw.get("eval_id", f"case_{index}"),
+        "turns": [
+            {
+                "user": raw["user_input"],
+                "expected_response": raw.get("expected_response"),
+                "expected_tool_uses": [
+                    {"name": call["name"], "args": call.get("parameters", {})}
+                    for call in raw.get("expected_tool_calls", [])
+                ],
+            }
+        ],
+    }
+
+
+def load_eval_cases(path: str) -> List[Dict[str, Any]]:
+    """Read an evalset file (.json or .jsonl, see evalset_stream) as normalized cases."""
+    return [normalize_case(raw, index) for index, raw in enumerate(iter_eval_cases(path))]
+
+
+def load_criteria(config_path: Optional[str]) -> Dict[str, float]:
+    """Thresholds from a test_config.json, or the course defaults."""
+    if not config_path:
+        return dict(DEFAULT_CRITERIA)
+    with open(config_path, encoding="utf-8") as config_file:
+        criteria = json.load(config_file).get("criteria", {})
+    # A criterion may be a bare threshold or {"threshold": ...}
+    return {
+        name: value["threshold"] if isinstance(value, dict) else value
+        for name, value in criteria.items()
+    }
+
+
+# ============================================================================
+# Fingerprints and Cache
+# ============================================================================
+
+
+def _digest(value: Any) -> str:
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+
+def case_key(case: Dict[str, Any]) -> str:
+    """Hash of what the agent sees: the case's user turns."""
+    return _digest([turn["user"] for turn in case["turns"]])
+
+
+def _describe_tool(tool) -> Dict[str, Any]:
+    if isinstance(tool, AgentTool):
+        return {"agent_tool": _describe_agent(tool.agent)}
+    func = tool.func if isinstance(tool, FunctionTool) else tool
+    if callable(func) and not hasattr(func, "name"):
+        try:
+            source = inspect.getsource(func)
+        except (OSError, TypeError):
+            source = getattr(func, "__qualname__", repr(func))
+        return {"function": getattr(func, "__name__", ""), "source": _digest(source)}
+    return {"tool": type(tool).__name__, "name": getattr(tool, "name", "")}
+
+
+def _describe_agent(agent) -> Dict[str, Any]:
+    description: Dict[str, Any] = {
+        "class": type(agent).__name__,
+        "name": agent.name,
+        "description": getattr(agent, "description", ""),
+        "sub_agents": [_describe_agent(sub) for sub in agent.sub_agents or []],
+    }
+    if isinstance(agent, LlmAgent):
+        model = agent.model
+        description["model"] = model if isinstance(model, str) else {
+            "class": type(model).__name__,
+            "model": getattr(model, "model", ""),
+        }
+        # Callable instructions are described by their source
+        instruction = agent.instruction
+        description["instruction"] = (
+            instruction if isinstance(instruction, str) else _describe_tool(instruction)
+        )
+        config = agent.generate_content_config
+        description["config"] = config.model_dump(exclude_none=True) if config else None
+        description["tools"] = [_describe_tool(tool) for tool in agent.tools]
+    return description
+
+
+def agent_fingerprint(agent) -> str:
+    """
+    Hash of everything that changes the agent's behaviour: models, instructions,
+    generation config, tool source code and sub-agents (recursively), plus the
+    ADK version.
+    """
+    return _digest({"adk": adk_version.__version__, "agent": _describe_agent(agent)})
+
+
+class ResponseCache:
+    """Agent responses per (case, agent fingerprint), persisted as JSON lines."""
+
+    def __init__(self, path: Optional[str] = "eval_cache.jsonl"):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as cache_file:
+                for line in cache_file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry["result"]
+
+    @staticmethod
+    def key(case: Dict[str, Any], fingerprint: str) -> str:
+        return f"{fingerprint}:{case_key(case)}"
+
+    def get(self, *keys: str) -> Optional[Dict[str, Any]]:
+        """Result stored under the first of `keys` that is present."""
+        for key in keys:
+            result = self.entries.get(key)
+            if result is not None:
+                self.hits += 1
+                return result
+        self.misses += 1
+        return None
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        self.entries[key] = result
+        if self.path:
+            # One short append per case; a later line wins on reload
+            with open(self.path, "a", encoding="utf-8") as cache_file:
+                cache_file.write(json.dumps({"key": key, "result": result}) + "\n")
+
+
+# ============================================================================
+# Eval Runner
+# ============================================================================
+
+
+class TrajectoryCheck:
+    """
+    Incremental tool_trajectory_avg_score (EXACT match) of one case.
+
+    Each tool call is compared with the expected call at the same position as
+    soon as the model requests it. A turn fails on the first wrong or extra
+    call, or when it ends with calls missing. The case is hopeless once even
+    perfect remaining turns could not reach `threshold`; with the usual
+    threshold of 1.0 that is the first divergence.
+    """
+
+    def __init__(self, case: Dict[str, Any], threshold: float):
+        self.expected = [turn["expected_tool_uses"] for turn in case["turns"]]
+        self.threshold = threshold
+        self.failed_turns = 0
+        self.turn = 0
+        self.position = 0
+        self.turn_failed = False
+        self.reason: Optional[str] = None
+
+    def start_turn(self, turn: int) -> None:
+        self.turn, self.position, self.turn_failed = turn, 0, False
+
+    def _fail(self, reason: str) -> None:
+        if not self.turn_failed:
+            self.turn_failed = True
+            self.reason = f"turn {self.turn}: {reason}"
+
+    def on_call(self, name: str, args: Dict[str, Any]) -> None:
+        expected = self.expected[self.turn]
+        if self.position >= len(expected):
+            self._fail(f"unexpected extra call {name}")
+        elif expected[self.position]["name"] != name:
+            self._fail(f"expected {expected[self.position]['name']}, got {name}")
+        elif expected[self.position]["args"] != args:
+            self._fail(f"{name} called with {args}, expected "
+                       f"{expected[self.position]['args']}")
+        self.position += 1
+
+    def end_turn(self) -> None:
+        if self.position < len(self.expected[self.turn]):
+            self._fail(f"{len(self.expected[self.turn]) - self.position} calls missing")
+        self.failed_turns += self.turn_failed
+        self.turn_failed = False
+
+    @property
+    def best_score(self) -> float:
+        """Highest tool_trajectory_avg_score still reachable."""
+        failed = self.failed_turns + self.turn_failed
+        return (len(self.expected) - failed) / len(self.expected)
+
+    @property
+    def hopeless(self) -> bool:
+        return self.best_score < self.threshold
+
+
+class EvalRunner:
+    """Runs eval cases on a bounded pool of workers, with a response cache."""
+
+    def __init__(
+        self,
+        agent,
+        concurrency: int = 8,
+        cache: Optional[ResponseCache] = None,
+        app_name: str = APP_NAME,
+        trajectory_threshold: Optional[float] = None,
+    ):
+        """
+        With `trajectory_threshold` set, a case is aborted as soon as its tool
+        trajectory can no longer reach the threshold: the model calls and
+        tool calls left in that case are not made.
+        """
+        self.agent = agent
+        self.concurrency = max(1, concurrency)
+        self.cache = cache
+        self.trajectory_threshold = trajectory_threshold
+        self.fingerprint = agent_fingerprint(agent)
+        self.runner = InMemoryRunner(agent=agent, app_name=app_name)
+        self.stats = {"cases": 0, "cached": 0, "executed": 0, "aborted": 0,
+                      "errors": 0, "seconds": 0.0}
+
+    async def run_case(self, case: Dict[str, Any]) -> Dict[str, Any]:
+        """Run every user turn of a case in a fresh session."""
+        session = await self.runner.session_service.create_session(
+            app_name=self.runner.app_name, user_id=USER_ID
+        )
+        check = None
+        if self.trajectory_threshold is not None:
+            check = TrajectoryCheck(case, self.trajectory_threshold)
+        turns = []
+        aborted = None
+        start = time.perf_counter()
+        try:
+            for index, turn in enumerate(case["turns"]):
+                message = types.Content(role="user", parts=[types.Part(text=turn["user"])])
+                response, tool_uses = "", []
+                if check:
+                    check.start_turn(index)
+                events = self.runner.run_async(
+                    user_id=USER_ID, session_id=session.id, new_message=message
+                )
+                # Closing the event stream early cancels the rest of the turn
+                async with contextlib.aclosing(events):
+                    async for event in events:
+                        for call in event.get_function_calls():
+                            tool_uses.append({"name": call.name, "args": call.args or {}})
+                            if check:
+                                check.on_call(call.name, call.args or {})
+                        if check and check.hopeless:
+                            break
+                        if event.is_final_response() and event.content:
+                            response = "\n".join(
+                                part.text for part in event.content.parts or [] if part.text
+                            )
+                turns.append({"response": response, "tool_uses": tool_uses})
+                if check:
+                    if not check.hopeless:
+                        check.end_turn()
+                    if check.hopeless:
+                        aborted = {"reason": check.reason, "max_score": check.best_score}
+                        break
+            error = None
+        except Exception as exc:  # one failing case must not stop the suite
+            error = f"{type(exc).__name__}: {exc}"
+        finally:
+            await self.runner.session_service.delete_session(
+                app_name=self.runner.app_name, user_id=USER_ID, session_id=session.id
+            )
+        result = {
+            "eval_id": case["eval_id"],
+            "turns": turns,
+            "error": error,
+            "seconds": time.perf_counter() - start,
+        }
+        if aborted and not error:
+            result["aborted"] = aborted
+        return result
+
+    async def _worker(self, queue: asyncio.Queue, results: List) -> None:
+        while True:
+            try:
+                index, case = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            key = ResponseCache.key(case, self.fingerprint)
+            # An aborted run is only valid for the expectations and threshold
+            # it was checked against, so it is cached under a key that
+            # includes them
+            expected = [turn["expected_tool_uses"] for turn in case["turns"]]
+            aborted_key = f"{key}:{_digest([expected, self.trajectory_threshold])}"
+            keys = [key]
+            if self.trajectory_threshold is not None:
+                keys.append(aborted_key)
+            result = self.cache.get(*keys) if self.cache else None
+            if result is not None:
+                self.stats["cached"] += 1
+            else:
+                result = await self.run_case(case)
+                self.stats["executed"] += 1
+                if result["error"]:
+                    self.stats["errors"] += 1
+                elif self.cache:
+                    self.cache.put(aborted_key if "aborted" in result else key, result)
+            if "aborted" in result:
+                self.stats["aborted"] += 1
+            results[index] = result
+
+    async def run(self, cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Results in the order of `cases`."""
+        start = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in enumerate(cases):
+            queue.put_nowait(item)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(cases)
+        workers = min(self.concurrency, len(cases)) or 1
+        await asyncio.gather(*(self._worker(queue, results) for _ in range(workers)))
+        self.stats["cases"] += len(cases)
+        self.stats["seconds"] += time.perf_counter() - start
+        return results
+
+
+# ============================================================================
+# Scoring
+# ============================================================================
+
+
+def score_results(
+    cases: List[Dict[str, Any]],
+    results: List[Dict[str, Any]],
+    criteria: Optional[Dict[str, float]] = None,
+    matcher: Optional[ResponseMatcher] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Score each case; a case passes when every metric reaches its threshold.
+    Cases that errored score 0.
+
+    tool_trajectory_avg_score uses ADK's TrajectoryEvaluator.
+    response_match_score is scored for every turn of every case in one
+    ResponseMatcher batch, with the same numbers as ADK's RougeEvaluator.
+    """
+    from google.adk.evaluation.eval_case import IntermediateData, Invocation
+    from google.adk.evaluation.trajectory_evaluator import TrajectoryEvaluator
+
+    criteria = criteria or DEFAULT_CRITERIA
+
+    def invocation(user: str, tool_uses: List[Dict]) -> Invocation:
+        return Invocation(
+            user_content=types.Content(role="user", parts=[types.Part(text=user)]),
+            intermediate_data=IntermediateData(
+                tool_uses=[
+                    types.FunctionCall(name=use["name"], args=use["args"])
+                    for use in tool_uses
+                ]
+            ),
+        )
+
+    def completed(case, result) -> bool:
+        return not result["error"] and len(result["turns"]) == len(case["turns"])
+
+    # All response pairs in one batch; per case, the mean over its turns
+    response_scores: Dict[int, float] = {}
+    if "response_match_score" in criteria:
+        matcher = matcher or ResponseMatcher()
+        spans, candidates, references = [], [], []
+        for index, (case, result) in enumerate(zip(cases, results)):
+            if "aborted" in result or not completed(case, result) or any(
+                turn["expected_response"] is None for turn in case["turns"]
+            ):
+                continue
+            spans.append((index, len(candidates), len(case["turns"])))
+            candidates.extend(got["response"] for got in result["turns"])
+            references.extend(turn["expected_response"] for turn in case["turns"])
+        turn_scores = matcher.score_batch(candidates, references).tolist()
+        for index, start, count in spans:
+            response_scores[index] = sum(turn_scores[start:start + count]) / count
+
+    trajectory = None
+    if "tool_trajectory_avg_score" in criteria:
+        trajectory = TrajectoryEvaluator(threshold=criteria["tool_trajectory_avg_score"])
+
+    scored = []
+    for index, (case, result) in enumerate(zip(cases, results)):
+        scores: Dict[str, float] = {}
+        if "aborted" in result:
+            # Best score the case could still have reached: below the threshold
+            if trajectory is not None:
+                scores["tool_trajectory_avg_score"] = result["aborted"]["max_score"]
+        elif not completed(case, result):
+            scores = {name: 0.0 for name in criteria if name in _METRICS}
+        else:
+            if trajectory is not None:
+                expected = [
+                    invocation(turn["user"], turn["expected_tool_uses"])
+                    for turn in case["turns"]
+                ]
+                actual = [
+                    invocation(turn["user"], got["tool_uses"])
+                    for turn, got in zip(case["turns"], result["turns"])
+                ]
+                scores["tool_trajectory_avg_score"] = trajectory.evaluate_invocations(
+                    actual, expected
+                ).overall_score
+            if index in response_scores:
+                scores["response_match_score"] = response_scores[index]
+        scored.append(
+            {
+                "eval_id": case["eval_id"],
+                "scores": scores,
+                "passed": all(scores[name] >= criteria[name] for name in scores),
+                "error": result["error"],
+                "aborted": (result.get("aborted") or {}).get("reason"),
+            }
+        )
+    return scored
+
+
+def main():
+    from event_replay import load_agent
+
+    parser = argparse.ArgumentParser(description="Run an evalset concurrently with caching")
+    parser.add_argument("evalset", help="*.evalset.json (eval_cases or test_cases layout)")
+    parser.add_argument("--agent", required=True,
+                        help="module:attribute or file.py:attribute building the agent")
+    parser.add_argument("--config", help="test_config.json with criteria thresholds")
+    parser.add_argument("--concurrency", type=int, default=8, help="Worker tasks")
+    parser.add_argument("--cache", default="eval_cache.jsonl",
+                        help="Response cache file ('' disables caching)")
+    parser.add_argument("--no-early-abort", action="store_true",
+                        help="Run every case to the end even after its tool "
+                             "trajectory has failed")
+    args = parser.parse_args()
+
+    agent = load_agent(args.agent)
+    cases = load_eval_cases(args.evalset)
+    criteria = load_criteria(args.config)
+    cache = ResponseCache(args.cache) if args.cache else None
+    runner = EvalRunner(
+        agent,
+        concurrency=args.concurrency,
+        cache=cache,
+        trajectory_threshold=None if args.no_early_abort
+        else criteria.get("tool_trajectory_avg_score"),
+    )
+    results = asyncio.run(runner.run(cases))
+    scored = score_results(cases, results, criteria)
+
+    for case in scored:
+        status = "✅ PASS" if case["passed"] else "❌ FAIL"
+        metrics = ", ".join(f"{name}={score:.2f}" for name, score in case["scores"].items())
+        detail = case["error"] or (case["aborted"] and f"aborted at {case['aborted']}")
+        suffix = f"  ({detail})" if detail else ""
+        print(f"{status} {case['eval_id']}: {metrics}{suffix}")
+    stats = runner.stats
+    throughput = stats["cases"] / max(stats["seconds"], 1e-9)
+    passed = sum(case["passed"] for case in scored)
+    print(f"\n{passed}/{len(scored)} passed; {stats['executed']} cases run, "
+          f"{stats['cached']} from cache, {stats['aborted']} aborted early, "
+          f"{stats['errors']} errors, {stats['seconds']:.1f}s ({throughput:.1f} cases/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Day 4b: Streaming Evalset Writer and Reader
+
+create_evaluation_test_cases builds the whole evalset as one dict and
+json.dumps it; json.load reads it back the same way. That is fine for a
+handful of cases, but evalsets generated from production logs have tens of
+thousands. This module writes and reads evalsets one case at a time, so
+memory stays constant however large the file is:
+
+- EvalsetWriter: appends cases to
+  - *.jsonl - one eval case per line, or
+  - *.json  - the usual evalset object, with the case array written
+    incrementally (json.dump-identical output with indent=2), so ADK and
+    existing tools still read it
+  Files are written to a temporary name and renamed on close, so a crashed
+  generator never leaves a truncated evalset behind. A .gz suffix compresses.
+- iter_eval_cases: yields raw cases from either format, parsing a JSON
+  evalset element by element (both the `eval_cases` layout of
+  day_4b_agent_evaluation.py and the `test_cases` layout of the -zh script)
+- cases_from_recording: turns an event_recorder.py recording of real traffic
+  into eval cases (user message, final response, tool calls), one per run
+
+Usage:
+    with EvalsetWriter("big.evalset.jsonl") as writer:
+        for case in generate_cases():
+            writer.write(case)
+
+    for case in iter_eval_cases("home_automation_agent/integration.evalset.json"):
+        ...
+
+    # python evalset_stream.py convert big.evalset.jsonl big.evalset.json
+    # python evalset_stream.py from-recording traffic.events.jsonl.gz traffic.evalset.jsonl
+    # python evalset_stream.py count big.evalset.json
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import os
+import textwrap
+from typing import Any, Dict, Iterator, Optional
+
+CASE_KEYS = ("eval_cases", "test_cases")
+_CHUNK_SIZE = 1 << 16
+_WHITESPACE = " \t\n\r"
+
+# ============================================================================
+# Helpers
+# ============================================================================
+
+
+def _open(path: str, mode: str, compress: Optional[bool] = None):
+    if path.endswith(".gz") if compress is None else compress:
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def is_jsonl(path: str) -> bool:
+    """JSONL evalsets end in .jsonl (optionally .jsonl.gz)."""
+    return path.removesuffix(".gz").endswith(".jsonl")
+
+
+# ============================================================================
+# Writer
+# ============================================================================
+
+
+class EvalsetWriter:
+    """
+    Writes an evalset one case at a time.
+
+    `metadata` (e.g. {"eval_set_id": ...}) goes before the case array in a
+    .json evalset; JSONL files hold only cases.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        cases_key: str = "eval_cases",
+        indent: Optional[int] = None,
+    ):
+        self.path = path
+        self.jsonl = is_jsonl(path)
+        self.cases_key = cases_key
+        self.indent = indent
+        self.count = 0
+        self._tmp_path = f"{path}.tmp"
+        self._file = _open(self._tmp_path, "wt", compress=path.endswith(".gz"))
+        if not self.jsonl:
+            self._write_header(metadata or {})
+
+    def _write_header(self, metadata: Dict[str, Any]) -> None:
+        # Same layout as json.dump({**metadata, cases_key: [...]}, indent=...)
+        if self.indent is None:
+            fields = [f"{json.dumps(key)}: {json.dumps(value)}"
+                      for key, value in metadata.items()]
+            self._file.write("{" + "".join(f"{field}, " for field in fields))
+            self._file.write(f"{json.dumps(self.cases_key)}: [")
+            return
+        pad = " " * self.indent
+        self._file.write("{\n")
+        for key, value in metadata.items():
+            encoded = json.dumps(value, indent=self.indent).replace("\n", "\n" + pad)
+            self._file.write(f"{pad}{json.dumps(key)}: {encoded},\n")
+        self._file.write(f"{pad}{json.dumps(self.cases_key)}: [")
+
+    def write(self, case: Dict[str, Any]) -> None:
+        """Append one eval case."""
+        if self.jsonl:
+            self._file.write(json.dumps(case, separators=(",", ":")) + "\n")
+        elif self.indent is None:
+            self._file.write((", " if self.count else "") + json.dumps(case))
+        else:
+            prefix = " " * (2 * self.indent)
+            encoded = textwrap.indent(json.dumps(case, indent=self.indent), prefix)
+            self._file.write(("," if self.count else "") + "\n" + encoded)
+        self.count += 1
+
+    def close(self) -> None:
+        """Finish the file and move it into place."""
+        if self._file.closed:
+            return
+        if not self.jsonl:
+            if self.indent is None:
+                self._file.write("]}")
+            elif not self.count:
+                self._file.write("]\n}")
+            else:
+                pad = " " * self.indent
+                self._file.write(f"\n{pad}]\n}}")
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        """Discard the partial file."""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self) -> "EvalsetWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+# ============================================================================
+# Reader
+# ============================================================================
+
+
+class _JsonStream:
+    """Decodes JSON values one at a time from a file read in chunks."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int = _CHUNK_SIZE) -> bool:
+        """Read more input, dropping what has been consumed; False at EOF."""
+        if self._eof:
+            return False
+        chunk = self._stream.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at the end of input)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in evalset, found {found or 'end of file'!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode the next JSON value, reading more input until it is complete."""
+        self.peek()
+        size = _CHUNK_SIZE
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Incomplete value: read more (in growing chunks) and retry
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            # A number at the buffer end may continue in the next chunk
+            if end == len(self._buffer) and not self._eof and not isinstance(
+                value, (dict, list, str)
+            ):
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+
+def _iter_json_cases(stream) -> Iterator[Dict[str, Any]]:
+    """Yield the elements of the evalset object's case array one by one."""
+    tokens = _JsonStream(stream)
+    tokens.expect("{")
+    while tokens.peek() != "}":
+        key = tokens.value()
+        tokens.expect(":")
+        if key in CASE_KEYS and tokens.peek() == "[":
+            tokens.expect("[")
+            while tokens.peek() != "]":
+                yield tokens.value()
+                if tokens.peek() == ",":
+                    tokens.expect(",")
+            tokens.expect("]")
+        else:
+            tokens.value()  # metadata such as eval_set_id or description
+        if tokens.peek() == ",":
+            tokens.expect(",")
+    tokens.expect("}")
+
+
+def iter_eval_cases(path: str) -> Iterator[Dict[str, Any]]:
+    """Raw eval cases of a .json or .jsonl evalset (optionally .gz), in order."""
+    with _open(path, "rt") as stream:
+        if is_jsonl(path):
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_cases(stream)
+
+
+# ============================================================================
+# Cases from Recorded Traffic
+# ============================================================================
+
+
+def _response_text(response: Dict[str, Any]) -> Optional[str]:
+    """Text of a recorded model response that ends a turn (None otherwise)."""
+    parts = (response.get("content") or {}).get("parts") or []
+    if response.get("partial") or any("function_call" in part for part in parts):
+        return None
+    text = "".join(part.get("text", "") for part in parts if not part.get("thought"))
+    return text or None
+
+
+def cases_from_recording(
+    path: str, root_agent: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    One single-turn eval case (eval_cases layout) per run of the root agent
+    in an event_recorder.py recording, yielded as each run ends.
+
+    The agent's actual behaviour becomes the expectation, so the result is a
+    regression suite of real traffic. Only runs in progress are kept in memory.
+    """
+    from event_recorder import read_recording
+
+    runs: Dict[str, Dict[str, Any]] = {}
+    for record in read_recording(path):
+        kind = record["type"]
+        invocation_id = record.get("invocation_id")
+        if kind == "run_start":
+            root_agent = root_agent or record["agent"]
+            if record["agent"] == root_agent:
+                runs[invocation_id] = {"start": record, "tool_uses": [], "response": None}
+            continue
+        run = runs.get(invocation_id)
+        if run is None:
+            continue
+        if kind == "tool_call" and record["agent"] == root_agent:
+            run["tool_uses"].append({"name": record["tool"], "args": record["args"]})
+        elif kind == "model_response" and record["agent"] == root_agent:
+            text = _response_text(record["response"])
+            if text is not None:
+                run["response"] = text
+        elif kind == "run_end":
+            del runs[invocation_id]
+            start = run["start"]
+            turn = {
+                "invocation_id": invocation_id,
+                "user_content": {"role": "user", "parts": [{"text": start["user_message"]}]},
+            }
+            if run["response"] is not None:
+                turn["final_response"] = {"role": "model",
+                                          "parts": [{"text": run["response"]}]}
+            turn["intermediate_data"] = {"tool_uses": run["tool_uses"]}
+            yield {
+                "eval_id": f"{start['session_id']}_{invocation_id}",
+                "conversation": [turn],
+                "session_input": {"app_name": root_agent, "user_id": start["user_id"]},
+            }
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream evalsets between formats")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser("convert", help="Rewrite an evalset (.json <-> .jsonl)")
+    convert.add_argument("source")
+    convert.add_argument("target")
+    convert.add_argument("--eval-set-id", help="eval_set_id of a .json target")
+    convert.add_argument("--indent", type=int, help="Pretty-print a .json target")
+
+    record = subparsers.add_parser("from-recording",
+                                   help="Eval cases from an event_recorder.py recording")
+    record.add_argument("recording")
+    record.add_argument("target")
+    record.add_argument("--root-agent", help="Agent whose runs become cases "
+                                             "(default: the first one recorded)")
+    record.add_argument("--eval-set-id", help="eval_set_id of a .json target")
+
+    count = subparsers.add_parser("count", help="Count the cases of an evalset")
+    count.add_argument("evalset")
+    args = parser.parse_args()
+
+    if args.command == "count":
+        total = sum(1 for _ in iter_eval_cases(args.evalset))
+        print(f"{args.evalset}: {total} cases")
+        return
+
+    if args.command == "convert":
+        cases = iter_eval_cases(args.source)
+        indent = args.indent
+    else:
+        cases = cases_from_recording(args.recording, args.root_agent)
+        indent = None
+    first = next(cases, None)
+    # Keep the -zh script's simpler layout under its own key
+    cases_key = "test_cases" if first and "user_input" in first else "eval_cases"
+    eval_set_id = args.eval_set_id or os.path.basename(args.target).split(".")[0]
+    with EvalsetWriter(
+        args.target, {"eval_set_id": eval_set_id}, cases_key=cases_key, indent=indent
+    ) as writer:
+        for case in itertools.chain([first] if first else [], cases):
+            writer.write(case)
+    print(f"Wrote {writer.count} cases to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
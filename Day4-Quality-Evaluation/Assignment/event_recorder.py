@@ -0,0 +1,295 @@
+"""
+Day 4a: Event Recorder Plugin
+
+logger.log and printed output are hard to compare between runs.
+EventRecorderPlugin writes every step of a run to a compact JSONL file
+(gzip-compressed when the path ends in .gz):
+
+- run_start / run_end: invocation, session, user message, wall and CPU time
+- model_request: agent, model, fingerprint of the request contents
+- model_response: the full LlmResponse, so it can be replayed later
+- tool_call: tool, arguments, result or error, duration
+- event: every event yielded to the caller (author, id, partial/final)
+
+event_replay.py feeds the recorded model responses back as a fake model,
+so a recorded run can be rerun offline - no API key, no network - to compare
+latency and CPU of framework or plugin changes.
+
+Usage:
+    from event_recorder import EventRecorderPlugin
+
+    recorder = EventRecorderPlugin("runs/research.jsonl.gz")
+    runner = InMemoryRunner(agent=agent, plugins=[recorder])
+    await runner.run_debug("Find recent papers on quantum computing")
+    await recorder.close()
+
+    # python event_replay.py runs/research.jsonl.gz \\
+    #     --agent day_4a_agent_observability:create_research_agent_fixed
+"""
+
+import gzip
+import hashlib
+import json
+import time
+from typing import Any, Dict, Iterator
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+FORMAT_VERSION = 1
+
+# ============================================================================
+# Helpers
+# ============================================================================
+
+
+def open_recording(path: str, mode: str = "rt"):
+    """Open a recording, transparently handling .gz."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def read_recording(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the records of a recording in order."""
+    with open_recording(path) as recording:
+        for line in recording:
+            if line.strip():
+                yield json.loads(line)
+
+
+def content_text(content) -> str:
+    """Text parts of a types.Content, joined."""
+    if not content or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text)
+
+
+def request_fingerprint(contents) -> str:
+    """
+    Short hash of a request's conversation: roles, texts, function call and
+    response names. Used by the replayer to notice when a rerun diverges.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for content in contents or []:
+        digest.update((content.role or "").encode("utf-8"))
+        for part in content.parts or []:
+            if part.text:
+                digest.update(part.text.encode("utf-8"))
+            if part.function_call:
+                name = part.function_call.name or ""
+                digest.update(b"call:" + name.encode("utf-8"))
+            if part.function_response:
+                name = part.function_response.name or ""
+                digest.update(b"response:" + name.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _jsonable(value: Any) -> Any:
+    """Tool args / results as JSON-friendly values."""
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+# ============================================================================
+# Recorder Plugin
+# ============================================================================
+
+
+class EventRecorderPlugin(BasePlugin):
+    """Write model requests/responses, tool calls, events and timings to JSONL."""
+
+    def __init__(
+        self,
+        path: str = "run.events.jsonl",
+        name: str = "event_recorder",
+        record_events: bool = True,
+    ):
+        super().__init__(name=name)
+        self.path = path
+        self.record_events = record_events
+        self.records = 0
+        self._file = open_recording(path, "wt")
+        self._write({"type": "header", "version": FORMAT_VERSION, "created": time.time()})
+        self._runs: Dict[str, tuple] = {}
+        self._model_calls: Dict[tuple, tuple] = {}
+        self._call_seq: Dict[str, int] = {}
+        self._tools: Dict[str, float] = {}
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, separators=(",", ":"), default=str))
+        self._file.write("\n")
+        self.records += 1
+
+    # ------------------------------------------------------------------------
+    # Runs and events
+    # ------------------------------------------------------------------------
+
+    async def before_run_callback(self, *, invocation_context) -> None:
+        self._runs[invocation_context.invocation_id] = (
+            time.perf_counter(),
+            time.process_time(),
+        )
+        self._write(
+            {
+                "type": "run_start",
+                "ts": time.time(),
+                "invocation_id": invocation_context.invocation_id,
+                "session_id": invocation_context.session.id,
+                "user_id": invocation_context.user_id,
+                "agent": invocation_context.agent.name,
+                "user_message": content_text(invocation_context.user_content),
+            }
+        )
+
+    async def after_run_callback(self, *, invocation_context) -> None:
+        started = self._runs.pop(invocation_context.invocation_id, None)
+        record = {"type": "run_end", "invocation_id": invocation_context.invocation_id}
+        if started:
+            record["wall_ms"] = round((time.perf_counter() - started[0]) * 1000, 3)
+            record["cpu_ms"] = round((time.process_time() - started[1]) * 1000, 3)
+        self._write(record)
+        self._file.flush()
+
+    async def on_event_callback(self, *, invocation_context, event) -> None:
+        if not self.record_events:
+            return None
+        self._write(
+            {
+                "type": "event",
+                "invocation_id": invocation_context.invocation_id,
+                "id": event.id,
+                "author": event.author,
+                "partial": bool(event.partial),
+                "final": event.is_final_response(),
+                "text_chars": len(content_text(event.content)),
+            }
+        )
+        return None
+
+    # ------------------------------------------------------------------------
+    # Model calls
+    # ------------------------------------------------------------------------
+
+    async def before_model_callback(self, *, callback_context, llm_request) -> None:
+        agent = callback_context.agent_name
+        seq = self._call_seq.get(agent, 0)
+        self._call_seq[agent] = seq + 1
+        self._model_calls[(callback_context.invocation_id, agent)] = (
+            seq,
+            time.perf_counter(),
+        )
+        self._write(
+            {
+                "type": "model_request",
+                "invocation_id": callback_context.invocation_id,
+                "agent": agent,
+                "seq": seq,
+                "model": llm_request.model,
+                "num_contents": len(llm_request.contents),
+                "fingerprint": request_fingerprint(llm_request.contents),
+            }
+        )
+
+    async def after_model_callback(self, *, callback_context, llm_response) -> None:
+        key = (callback_context.invocation_id, callback_context.agent_name)
+        seq, start = self._model_calls.get(key, (None, None))
+        record = {
+            "type": "model_response",
+            "invocation_id": callback_context.invocation_id,
+            "agent": callback_context.agent_name,
+            "seq": seq,
+            "response": llm_response.model_dump(mode="json", exclude_none=True),
+        }
+        if start is not None:
+            record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        self._write(record)
+        if not llm_response.partial:
+            self._model_calls.pop(key, None)
+
+    async def on_model_error_callback(
+        self, *, callback_context, llm_request, error
+    ) -> None:
+        key = (callback_context.invocation_id, callback_context.agent_name)
+        seq, _ = self._model_calls.pop(key, (None, None))
+        self._write(
+            {
+                "type": "model_error",
+                "invocation_id": callback_context.invocation_id,
+                "agent": callback_context.agent_name,
+                "seq": seq,
+                "error": repr(error),
+            }
+        )
+
+    # ------------------------------------------------------------------------
+    # Tool calls
+    # ------------------------------------------------------------------------
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context) -> None:
+        self._tools[tool_context.function_call_id] = time.perf_counter()
+
+    async def after_tool_callback(
+        self, *, tool, tool_args, tool_context, result
+    ) -> None:
+        self._write_tool(tool, tool_args, tool_context, result=_jsonable(result))
+
+    async def on_tool_error_callback(
+        self, *, tool, tool_args, tool_context, error
+    ) -> None:
+        self._write_tool(tool, tool_args, tool_context, error=repr(error))
+
+    def _write_tool(self, tool, tool_args, tool_context, **outcome) -> None:
+        start = self._tools.pop(tool_context.function_call_id, None)
+        record = {
+            "type": "tool_call",
+            "invocation_id": tool_context.invocation_id,
+            "agent": tool_context.agent_name,
+            "tool": tool.name,
+            "args": _jsonable(tool_args),
+            **outcome,
+        }
+        if start is not None:
+            record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        self._write(record)
+
+    async def close(self) -> None:
+        """Flush and close the recording."""
+        if not self._file.closed:
+            self._file.close()
+
+
+def summarize_recording(path: str) -> Dict[str, Any]:
+    """Counts and total timings of a recording (top-level runs only)."""
+    summary: Dict[str, Any] = {
+        "runs": 0,
+        "model_calls": 0,
+        "tool_calls": 0,
+        "events": 0,
+        "wall_ms": 0.0,
+        "cpu_ms": 0.0,
+        "model_ms": 0.0,
+    }
+    open_runs: Dict[str, bool] = {}  # invocation_id -> nested in another run
+    for record in read_recording(path):
+        kind = record["type"]
+        if kind == "run_start":
+            open_runs[record["invocation_id"]] = bool(open_runs)
+        elif kind == "run_end" and open_runs.pop(record["invocation_id"], True):
+            # Sub-agent runs (AgentTool) are already inside their parent's time
+            continue
+        if kind == "run_end" and "wall_ms" in record:
+            summary["runs"] += 1
+            summary["wall_ms"] += record["wall_ms"]
+            summary["cpu_ms"] += record["cpu_ms"]
+        elif kind == "model_request":
+            summary["model_calls"] += 1
+        elif kind == "model_response" and not record["response"].get("partial"):
+            summary["model_ms"] += record.get("duration_ms", 0.0)
+        elif kind == "tool_call":
+            summary["tool_calls"] += 1
+        elif kind == "event":
+            summary["events"] += 1
+    return summary
@@ -0,0 +1,274 @@
+"""
+Day 4a: Event Replay (offline performance regression runs)
+
+Reruns a recording made by event_recorder.EventRecorderPlugin without a model:
+ReplayModel answers every model call of an agent with the responses that were
+recorded for it, in order. Tools, callbacks, plugins, session handling and the
+rest of the framework run for real, so two replays of the same recording -
+before and after a framework, plugin or tool change - can be compared for
+latency and CPU cost. No API key or network is needed.
+
+- --latency none:     responses come back immediately; the run measures only
+                      our side (framework + tools + plugins)
+- --latency recorded: each call sleeps as long as it took when recorded, to
+                      reproduce end-to-end wall time
+
+If the replayed conversation no longer matches the recording (a changed
+instruction, tool result or tool order), ReplayModel still returns the recorded
+responses but counts the call as diverged.
+
+Usage:
+    python event_replay.py runs/research.jsonl.gz \\
+        --agent day_4a_agent_observability:create_research_agent_fixed
+    python event_replay.py runs/home.jsonl.gz \\
+        --agent day_4b_agent_evaluation.py:create_home_automation_agent --rounds 5
+    python event_replay.py runs/research.jsonl.gz --summary
+
+    # In code
+    models = install_replay_models(agent, "runs/research.jsonl.gz")
+    result = await replay_recording(agent, "runs/research.jsonl.gz")
+"""
+
+import argparse
+import asyncio
+import importlib
+import importlib.util
+import os
+import statistics
+import sys
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.adk.tools.agent_tool import AgentTool
+from google.genai import types
+
+from event_recorder import read_recording, request_fingerprint, summarize_recording
+
+APP_NAME = "replay_app"
+USER_ID = "replay_user"
+
+# ============================================================================
+# Loading a Recording
+# ============================================================================
+
+
+def load_model_calls(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Recorded model calls per agent, in call order.
+
+    Each call: {"fingerprint", "duration_ms", "responses": [LlmResponse dicts]}
+    - a streamed call has several responses.
+    """
+    calls: Dict[str, Dict[int, Dict[str, Any]]] = {}
+    for record in read_recording(path):
+        if record["type"] == "model_request":
+            calls.setdefault(record["agent"], {})[record["seq"]] = {
+                "fingerprint": record["fingerprint"],
+                "duration_ms": 0.0,
+                "responses": [],
+            }
+        elif record["type"] == "model_response" and record.get("seq") is not None:
+            call = calls.get(record["agent"], {}).get(record["seq"])
+            if call is not None:
+                call["responses"].append(record["response"])
+                call["duration_ms"] = record.get("duration_ms", call["duration_ms"])
+    return {
+        agent: [by_seq[seq] for seq in sorted(by_seq)]
+        for agent, by_seq in calls.items()
+    }
+
+
+def recorded_turns(path: str, root_agent: str) -> List[List[str]]:
+    """User messages of the root agent's runs, grouped by session in order."""
+    sessions: Dict[str, List[str]] = {}
+    for record in read_recording(path):
+        if record["type"] == "run_start" and record["agent"] == root_agent:
+            sessions.setdefault(record["session_id"], []).append(
+                record["user_message"]
+            )
+    return list(sessions.values())
+
+
+# ============================================================================
+# Replay Model
+# ============================================================================
+
+
+class ReplayModel(BaseLlm):
+    """BaseLlm that returns one agent's recorded responses in order."""
+
+    model: str = "replay-model"
+    calls: List[Dict[str, Any]] = []
+    latency: str = "none"  # "none" or "recorded"
+    position: int = 0
+    divergences: int = 0
+
+    def reset(self) -> None:
+        self.position = 0
+        self.divergences = 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.position >= len(self.calls):
+            raise RuntimeError(
+                f"Recording has only {len(self.calls)} model calls for this agent"
+            )
+        call = self.calls[self.position]
+        self.position += 1
+        if request_fingerprint(llm_request.contents) != call["fingerprint"]:
+            self.divergences += 1
+        if self.latency == "recorded" and call["duration_ms"]:
+            await asyncio.sleep(call["duration_ms"] / 1000)
+        for response in call["responses"]:
+            yield LlmResponse.model_validate(response)
+
+
+def _walk_agents(agent):
+    """The agent, its sub-agents and agents wrapped in AgentTool, recursively."""
+    yield agent
+    for sub_agent in getattr(agent, "sub_agents", None) or []:
+        yield from _walk_agents(sub_agent)
+    for tool in getattr(agent, "tools", None) or []:
+        if isinstance(tool, AgentTool):
+            yield from _walk_agents(tool.agent)
+
+
+def install_replay_models(
+    agent, path: str, latency: str = "none"
+) -> Dict[str, ReplayModel]:
+    """Swap the model of every recorded LlmAgent in the tree for a ReplayModel."""
+    calls = load_model_calls(path)
+    models: Dict[str, ReplayModel] = {}
+    for node in _walk_agents(agent):
+        if isinstance(node, LlmAgent) and node.name in calls:
+            node.model = models[node.name] = ReplayModel(
+                calls=calls[node.name], latency=latency
+            )
+    return models
+
+
+# ============================================================================
+# Replay Runs
+# ============================================================================
+
+
+async def replay_recording(
+    agent,
+    path: str,
+    plugins: Optional[list] = None,
+    latency: str = "none",
+    rounds: int = 1,
+) -> Dict[str, Any]:
+    """
+    Rerun every recorded turn `rounds` times against ReplayModels.
+
+    Returns per-turn wall and CPU times (ms) and the number of diverged calls.
+    """
+    models = install_replay_models(agent, path, latency)
+    sessions = recorded_turns(path, agent.name)
+    runner = InMemoryRunner(agent=agent, app_name=APP_NAME, plugins=plugins or [])
+    wall_ms: List[float] = []
+    cpu_ms: List[float] = []
+    divergences = 0
+    for _ in range(rounds):
+        for model in models.values():
+            model.reset()
+        for messages in sessions:
+            session = await runner.session_service.create_session(
+                app_name=APP_NAME, user_id=USER_ID
+            )
+            for message in messages:
+                content = types.Content(role="user", parts=[types.Part(text=message)])
+                wall_start, cpu_start = time.perf_counter(), time.process_time()
+                async for _event in runner.run_async(
+                    user_id=USER_ID, session_id=session.id, new_message=content
+                ):
+                    pass
+                wall_ms.append((time.perf_counter() - wall_start) * 1000)
+                cpu_ms.append((time.process_time() - cpu_start) * 1000)
+        divergences += sum(model.divergences for model in models.values())
+    await runner.close()
+    return {"wall_ms": wall_ms, "cpu_ms": cpu_ms, "divergences": divergences}
+
+
+def load_agent(spec: str):
+    """
+    Load "module:attribute" or "path/to/file.py:attribute".
+
+    A callable attribute (e.g. create_research_agent_fixed) is called.
+    """
+    target, _, attribute = spec.rpartition(":")
+    if not target or not attribute:
+        raise ValueError(f"Expected module:attribute, got {spec!r}")
+    if target.endswith(".py"):
+        sys.path.insert(0, os.path.dirname(os.path.abspath(target)))
+        module_spec = importlib.util.spec_from_file_location("replayed_agent", target)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(target)
+    agent = getattr(module, attribute)
+    return agent() if callable(agent) and not isinstance(agent, LlmAgent) else agent
+
+
+def _print_summary(path: str) -> Dict[str, Any]:
+    summary = summarize_recording(path)
+    print(f"Recording {path}")
+    print(f"  runs {summary['runs']}, model calls {summary['model_calls']}, "
+          f"tool calls {summary['tool_calls']}, events {summary['events']}")
+    if summary["runs"]:
+        print(f"  recorded wall {summary['wall_ms'] / summary['runs']:.2f} ms/run, "
+              f"cpu {summary['cpu_ms'] / summary['runs']:.2f} ms/run, "
+              f"model {summary['model_ms'] / summary['runs']:.2f} ms/run")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded agent run offline")
+    parser.add_argument("path", help="File written by EventRecorderPlugin")
+    parser.add_argument("--agent", help="module:attribute or file.py:attribute")
+    parser.add_argument("--latency", choices=["none", "recorded"], default="none",
+                        help="Sleep for the recorded model latency or not at all")
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="Replays of the whole recording")
+    parser.add_argument("--summary", action="store_true",
+                        help="Only summarize the recording")
+    args = parser.parse_args()
+
+    summary = _print_summary(args.path)
+    if args.summary:
+        return
+    if not args.agent:
+        parser.error("--agent is required unless --summary is given")
+
+    # Day scripts refuse to import without a key; replay never calls the API
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-replay")
+    agent = load_agent(args.agent)
+    result = asyncio.run(
+        replay_recording(agent, args.path, latency=args.latency, rounds=args.rounds)
+    )
+
+    wall, cpu = result["wall_ms"], result["cpu_ms"]
+    if not wall:
+        print("No turns of this agent in the recording")
+        return
+    print(f"Replay ({args.rounds} rounds, latency={args.latency}, {len(wall)} turns)")
+    print(f"  wall p50 {statistics.median(wall):.2f} ms, "
+          f"mean {statistics.fmean(wall):.2f} ms")
+    print(f"  cpu  p50 {statistics.median(cpu):.2f} ms, "
+          f"mean {statistics.fmean(cpu):.2f} ms")
+    if summary["runs"]:
+        print(f"  recorded framework time (wall - model): "
+              f"{(summary['wall_ms'] - summary['model_ms']) / summary['runs']:.2f} ms/run")
+    if result["divergences"]:
+        print(f"  ⚠️ {result['divergences']} model calls diverged from the recording")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Day 4b: Offline Home Automation Agent
+
+A deterministic stand-in for Gemini behind home_automation_agent, so the
+evaluation benchmark and the load generator run without an API key or network.
+
+For every user turn HomeAutomationModel:
+1. parses "Turn on/off the <device> in the <room>" (a "(request N)" tag, used
+   to make synthetic cases unique, is ignored) and calls set_device_status
+2. then answers with the tool's message
+
+Text it cannot parse gets a fixed question back. Each call sleeps a
+log-normally distributed latency (median `latency`, spread `jitter`; the
+default jitter of 0 sleeps exactly `latency`) and fails with probability
+`failure_rate`. usage_metadata is filled with token estimates.
+
+Usage:
+    from home_automation_model import HomeAutomationModel, make_home_agent
+
+    agent = make_home_agent(latency=0.05, jitter=0.3, failure_rate=0.01)
+    print(agent.model.calls)
+"""
+
+import asyncio
+import random
+import re
+from typing import AsyncGenerator
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+COMMAND = re.compile(r"turn (on|off) the (.+?) in the (.+?)[.!?]*$", re.IGNORECASE)
+REQUEST_TAG = re.compile(r" \(request \d+\)")
+
+
+def set_device_status(location: str, device_id: str, status: str) -> dict:
+    """Sets the status of a smart home device (quiet copy for offline runs)."""
+    return {
+        "success": True,
+        "message": f"Successfully set the {device_id} in {location} to {status.lower()}.",
+    }
+
+
+def estimate_usage(prompt: str, output: str) -> types.GenerateContentResponseUsageMetadata:
+    """~4 characters per token."""
+    prompt_tokens, output_tokens = max(1, len(prompt) // 4), max(1, len(output) // 4)
+    return types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=prompt_tokens,
+        candidates_token_count=output_tokens,
+        total_token_count=prompt_tokens + output_tokens,
+    )
+
+
+class HomeAutomationModel(BaseLlm):
+    """Parses the command, calls set_device_status, echoes the tool's message."""
+
+    model: str = "home-automation-scripted"
+    latency: float = 0.0
+    jitter: float = 0.0
+    failure_rate: float = 0.0
+    calls: int = 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        if self.latency:
+            delay = self.latency
+            if self.jitter:
+                delay *= random.lognormvariate(0.0, self.jitter)
+            await asyncio.sleep(delay)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError("simulated model error (503 UNAVAILABLE)")
+
+        last = llm_request.contents[-1]
+        parts = last.parts or []
+        tool_result = next(
+            (part.function_response for part in parts if part.function_response), None
+        )
+        text = " ".join(part.text or "" for part in parts)
+        if tool_result is not None:
+            part = types.Part(text=tool_result.response.get("message", "Done."))
+        elif (match := COMMAND.search(REQUEST_TAG.sub("", text).strip())) is not None:
+            status, device, room = match.groups()
+            part = types.Part(
+                function_call=types.FunctionCall(
+                    name="set_device_status",
+                    args={"location": room, "device_id": device, "status": status.upper()},
+                )
+            )
+        else:
+            part = types.Part(text="I can turn devices on or off in any room. "
+                                   "Which device would you like me to control?")
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=estimate_usage(text, part.text or ""),
+        )
+
+
+def make_home_agent(
+    instruction: str = "You are a home automation assistant.", **model_options
+) -> LlmAgent:
+    """home_automation_agent with HomeAutomationModel(**model_options) and a quiet tool."""
+    return LlmAgent(
+        name="home_automation_agent",
+        model=HomeAutomationModel(**model_options),
+        description="An agent to control smart devices in a home.",
+        instruction=instruction,
+        tools=[set_device_status],
+    )
@@ -0,0 +1,497 @@
+"""
+Day 4b: User-Simulation Load Generator
+
+Evaluation tells you whether one conversation goes well; it does not tell you
+how the agent behaves when thousands of users talk to it at once. This module
+simulates many concurrent conversational users against an agent and reports,
+for each load level:
+
+- turn latency percentiles (p50 / p95 / p99): user message -> final response
+- throughput (turns/s, and conversations/s completed without a failed turn)
+- error rate, by error type (model errors, timeouts, turns without a reply)
+
+Users are drawn from a weighted mix of personas:
+
+- ScriptedPersona: fixed turns with {room} / {device} placeholders
+- ModelPersona: an LLM plays the user, following a starting prompt and a
+  conversation plan like ADK's ConversationScenario, until it answers
+  </finished>. Any BaseLlm works; FakeUserModel is an offline stand-in.
+
+Load ramps up in stages (e.g. 50 -> 200 -> 1000 -> 2000 users). In a stage
+every user runs conversations back to back, in a fresh session each, until
+the stage time is up. The ramp stops early once a stage exceeds
+--max-error-rate.
+
+By default the agent is an offline copy of home_automation_agent driven by
+HomeAutomationModel (home_automation_model.py: simulated latency with jitter
+and an optional failure rate),
+so the framework itself is what gets load tested. --agent loads a real agent;
+add --fake-model to keep it offline. Without --fake-model every simulated turn
+is a real (billed) model request.
+
+Usage:
+    python load_generator.py --users 50 200 1000 2000 --stage-seconds 10
+    python load_generator.py --model-latency 0.3 --failure-rate 0.01 --json load.json
+    python load_generator.py --agent day_4b_agent_evaluation:create_home_automation_agent \\
+        --fake-model --users 100 500 --personas personas.json
+
+    # personas.json: [{"name": "direct", "weight": 3, "think_time": 0.5,
+    #                  "turns": ["Turn on the {device} in the {room}."]}]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Any, AsyncGenerator, Dict, List, Optional, Sequence
+
+import numpy as np
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from home_automation_model import HomeAutomationModel, estimate_usage, make_home_agent
+
+APP_NAME = "load_test_app"
+FINISHED = "</finished>"
+
+ROOMS = ["living room", "kitchen", "bedroom", "garage", "office", "bathroom"]
+DEVICES = ["floor lamp", "main light", "desk lamp", "fan", "heater", "speaker"]
+
+# ============================================================================
+# Offline Agent
+# ============================================================================
+
+
+def install_fake_models(agent, **model_options) -> List[HomeAutomationModel]:
+    """Swap the model of every LlmAgent in the tree for a HomeAutomationModel."""
+    from event_replay import _walk_agents
+
+    models = []
+    for node in _walk_agents(agent):
+        if isinstance(node, LlmAgent):
+            node.model = HomeAutomationModel(**model_options)
+            models.append(node.model)
+    return models
+
+
+# ============================================================================
+# Personas
+# ============================================================================
+
+
+class ScriptedPersona:
+    """A user who sends fixed turns; {room} and {device} vary per conversation."""
+
+    def __init__(
+        self,
+        name: str,
+        turns: Sequence[str],
+        weight: float = 1.0,
+        think_time: float = 0.0,
+    ):
+        self.name = name
+        self.turns = list(turns)
+        self.weight = weight
+        self.think_time = think_time
+
+    def start(self, rng: random.Random) -> Dict[str, Any]:
+        """Per-conversation state."""
+        slots = {"room": rng.choice(ROOMS), "device": rng.choice(DEVICES)}
+        return {"slots": slots, "turn": 0, "history": []}
+
+    async def next_message(self, state: Dict[str, Any], reply: Optional[str]) -> Optional[str]:
+        """The next user message given the agent's last reply, or None when done."""
+        if state["turn"] >= len(self.turns):
+            return None
+        message = self.turns[state["turn"]].format(**state["slots"])
+        state["turn"] += 1
+        return message
+
+
+class FakeUserModel(BaseLlm):
+    """
+    Offline simulated user for ModelPersona: asks for `turns` device changes,
+    rephrases when the agent asks back, then answers </finished>.
+    """
+
+    model: str = "fake-user-model"
+    latency: float = 0.0
+    turns: int = 3
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        # The simulated user's own messages are the "model" turns
+        sent = [content for content in llm_request.contents if content.role == "model"]
+        reply = llm_request.contents[-1].parts[0].text or ""
+        rng = random.Random(f"{sent[0].parts[0].text}|{len(sent)}")
+        if len(sent) >= self.turns:
+            text = FINISHED
+        elif reply.rstrip().endswith("?"):
+            text = f"Sorry, I meant: turn on the {rng.choice(DEVICES)} in the {rng.choice(ROOMS)}."
+        else:
+            status = rng.choice(["on", "off"])
+            text = f"Now turn {status} the {rng.choice(DEVICES)} in the {rng.choice(ROOMS)}."
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            usage_metadata=estimate_usage(reply, text),
+        )
+
+
+class ModelPersona:
+    """
+    A user played by an LLM: opens with `starting_prompt`, then follows
+    `conversation_plan`, reacting to the agent's replies, until it answers
+    </finished> or reaches `max_turns`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: BaseLlm,
+        starting_prompt: str,
+        conversation_plan: str,
+        weight: float = 1.0,
+        think_time: float = 0.0,
+        max_turns: int = 8,
+    ):
+        self.name = name
+        self.model = model
+        self.starting_prompt = starting_prompt
+        self.conversation_plan = conversation_plan
+        self.weight = weight
+        self.think_time = think_time
+        self.max_turns = max_turns
+        self.instruction = (
+            "You are simulating a user talking to a home automation assistant. "
+            f"Follow this plan:\n{conversation_plan}\n"
+            "Reply with only the user's next message, one short sentence. "
+            f"When the plan is complete, reply with exactly {FINISHED}"
+        )
+
+    def start(self, rng: random.Random) -> Dict[str, Any]:
+        slots = {"room": rng.choice(ROOMS), "device": rng.choice(DEVICES)}
+        return {"slots": slots, "turn": 0, "history": []}
+
+    async def next_message(self, state: Dict[str, Any], reply: Optional[str]) -> Optional[str]:
+        history: List[types.Content] = state["history"]
+        if state["turn"] == 0:
+            message = self.starting_prompt.format(**state["slots"])
+        elif state["turn"] >= self.max_turns:
+            return None
+        else:
+            # Roles are swapped: the simulated user is the "model" here
+            history.append(types.Content(role="user", parts=[types.Part(text=reply or "")]))
+            request = LlmRequest(
+                model=self.model.model,
+                contents=list(history),
+                config=types.GenerateContentConfig(system_instruction=self.instruction),
+            )
+            message = ""
+            async for response in self.model.generate_content_async(request):
+                if not response.partial and response.content:
+                    message = "".join(part.text or "" for part in response.content.parts or [])
+            message = message.strip()
+            if not message or FINISHED in message:
+                return None
+        history.append(types.Content(role="model", parts=[types.Part(text=message)]))
+        state["turn"] += 1
+        return message
+
+
+def default_personas(user_latency: float = 0.0) -> List:
+    """A mix of home automation users: direct, chatty, multi-step and simulated."""
+    return [
+        ScriptedPersona(
+            "direct", ["Turn on the {device} in the {room}."], weight=4, think_time=0.5
+        ),
+        ScriptedPersona(
+            "chatty",
+            ["Hi! What can you do?", "Turn on the {device} in the {room}.", "Thanks!"],
+            weight=2,
+            think_time=1.0,
+        ),
+        ScriptedPersona(
+            "on_off_sequence",
+            ["Turn on the {device} in the {room}.", "Turn off the {device} in the {room}."],
+            weight=2,
+            think_time=0.5,
+        ),
+        ModelPersona(
+            "simulated",
+            FakeUserModel(latency=user_latency),
+            starting_prompt="Turn on the {device} in the {room}.",
+            conversation_plan="Set up the house for the evening, one device at a time. "
+                              "If the assistant asks a question, answer it.",
+            weight=2,
+            think_time=0.5,
+        ),
+    ]
+
+
+def load_personas(path: str) -> List[ScriptedPersona]:
+    """Scripted personas from a JSON list of {name, turns, weight, think_time}."""
+    with open(path, encoding="utf-8") as personas_file:
+        specs = json.load(personas_file)
+    return [
+        ScriptedPersona(
+            spec["name"],
+            spec["turns"],
+            weight=spec.get("weight", 1.0),
+            think_time=spec.get("think_time", 0.0),
+        )
+        for spec in specs
+    ]
+
+
+# ============================================================================
+# Load Generator
+# ============================================================================
+
+
+class StageStats:
+    """Turn latencies, throughput and errors of one load level."""
+
+    def __init__(self, users: int):
+        self.users = users
+        self.latencies: List[float] = []
+        self.persona_latencies: Dict[str, List[float]] = {}
+        self.errors: Counter = Counter()
+        self.turns = 0
+        self.conversations = 0
+        self.seconds = 0.0
+
+    def record_turn(self, persona: str, seconds: float, error: Optional[str]) -> None:
+        self.turns += 1
+        if error:
+            self.errors[error] += 1
+            return
+        self.latencies.append(seconds)
+        self.persona_latencies.setdefault(persona, []).append(seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        def percentiles(values: List[float]) -> Dict[str, float]:
+            if not values:
+                return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+            p50, p95, p99 = np.percentile(np.array(values) * 1000, [50, 95, 99])
+            return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+        errors = sum(self.errors.values())
+        seconds = max(self.seconds, 1e-9)
+        return {
+            "users": self.users,
+            "seconds": self.seconds,
+            "turns": self.turns,
+            "conversations": self.conversations,
+            "turns_per_second": self.turns / seconds,
+            "conversations_per_second": self.conversations / seconds,
+            "error_rate": errors / self.turns if self.turns else 0.0,
+            "errors": dict(self.errors),
+            **percentiles(self.latencies),
+            "personas": {
+                name: percentiles(values) for name, values in self.persona_latencies.items()
+            },
+        }
+
+
+class LoadGenerator:
+    """Ramps simulated users against an agent, one stage per load level."""
+
+    def __init__(
+        self,
+        agent,
+        personas: Sequence,
+        turn_timeout: float = 30.0,
+        seed: int = 7,
+        app_name: str = APP_NAME,
+    ):
+        self.agent = agent
+        self.personas = list(personas)
+        self.weights = [persona.weight for persona in self.personas]
+        self.turn_timeout = turn_timeout
+        self.seed = seed
+        self.app_name = app_name
+
+    async def _turn(self, runner: InMemoryRunner, user_id: str, session_id: str, text: str):
+        """Run one user turn; returns the agent's final reply (None if it gave none)."""
+        message = types.Content(role="user", parts=[types.Part(text=text)])
+        reply = None
+        events = runner.run_async(user_id=user_id, session_id=session_id, new_message=message)
+        async with contextlib.aclosing(events):
+            async for event in events:
+                if event.error_code:
+                    raise RuntimeError(event.error_code)
+                if event.is_final_response() and event.content:
+                    reply = "".join(part.text or "" for part in event.content.parts or [])
+        return reply
+
+    async def _conversation(self, runner, stats, user_id, rng, deadline) -> None:
+        persona = rng.choices(self.personas, weights=self.weights)[0]
+        session = await runner.session_service.create_session(
+            app_name=self.app_name, user_id=user_id
+        )
+        state = persona.start(rng)
+        reply = None
+        failed = False
+        try:
+            while time.perf_counter() < deadline:
+                text = await persona.next_message(state, reply)
+                if text is None:
+                    break
+                start = time.perf_counter()
+                error = None
+                try:
+                    reply = await asyncio.wait_for(
+                        self._turn(runner, user_id, session.id, text), self.turn_timeout
+                    )
+                    if reply is None:
+                        error = "no final response"
+                except asyncio.TimeoutError:
+                    error = "timeout"
+                except Exception as exc:  # one failing user must not stop the test
+                    error = type(exc).__name__
+                stats.record_turn(persona.name, time.perf_counter() - start, error)
+                if error:
+                    failed = True
+                    break
+                if persona.think_time:
+                    await asyncio.sleep(persona.think_time * rng.uniform(0.5, 1.5))
+            if not failed:
+                stats.conversations += 1
+        finally:
+            await runner.session_service.delete_session(
+                app_name=self.app_name, user_id=user_id, session_id=session.id
+            )
+
+    async def _user(self, runner, stats, index, deadline, spawn_seconds) -> None:
+        rng = random.Random(f"{self.seed}:{stats.users}:{index}")
+        # Stagger arrivals instead of starting every user at the same instant
+        await asyncio.sleep(rng.uniform(0, spawn_seconds))
+        while time.perf_counter() < deadline:
+            await self._conversation(runner, stats, f"user_{index}", rng, deadline)
+
+    async def run_stage(
+        self, users: int, seconds: float, spawn_seconds: float = 1.0
+    ) -> Dict[str, Any]:
+        """Run `users` concurrent users for `seconds`; users finish their turn."""
+        runner = InMemoryRunner(agent=self.agent, app_name=self.app_name)
+        stats = StageStats(users)
+        start = time.perf_counter()
+        deadline = start + seconds
+        spawn_seconds = min(spawn_seconds, seconds)
+        await asyncio.gather(
+            *(self._user(runner, stats, index, deadline, spawn_seconds)
+              for index in range(users))
+        )
+        stats.seconds = time.perf_counter() - start
+        return stats.summary()
+
+    async def ramp(
+        self,
+        levels: Sequence[int],
+        seconds: float,
+        spawn_seconds: float = 1.0,
+        max_error_rate: float = 1.0,
+        on_stage=None,
+    ) -> List[Dict[str, Any]]:
+        """One stage per load level; stops after a stage above max_error_rate."""
+        stages = []
+        for users in levels:
+            summary = await self.run_stage(users, seconds, spawn_seconds)
+            stages.append(summary)
+            if on_stage:
+                on_stage(summary)
+            if summary["error_rate"] > max_error_rate:
+                break
+        return stages
+
+
+def print_stage(summary: Dict[str, Any], file=None) -> None:
+    errors = ", ".join(f"{name}: {count}" for name, count in summary["errors"].items())
+    print(f"{summary['users']:>6} {summary['turns']:>8} {summary['turns_per_second']:>8.1f} "
+          f"{summary['p50_ms']:>8.0f} {summary['p95_ms']:>8.0f} {summary['p99_ms']:>8.0f} "
+          f"{summary['error_rate'] * 100:>7.2f}%  {errors}", file=file, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent users against an agent")
+    parser.add_argument("--agent", help="module:attribute or file.py:attribute building "
+                                        "the agent (default: offline home_automation_agent)")
+    parser.add_argument("--fake-model", action="store_true",
+                        help="Replace the --agent's models with HomeAutomationModel")
+    parser.add_argument("--users", type=int, nargs="+", default=[50, 200, 1000, 2000],
+                        help="Concurrent users per stage")
+    parser.add_argument("--stage-seconds", type=float, default=10.0)
+    parser.add_argument("--spawn-seconds", type=float, default=1.0,
+                        help="Users of a stage arrive spread over this many seconds")
+    parser.add_argument("--model-latency", type=float, default=0.05,
+                        help="Median fake model latency per call (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.3,
+                        help="Log-normal spread of the fake model latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Probability that a fake model call fails")
+    parser.add_argument("--personas", help="JSON file of scripted personas")
+    parser.add_argument("--turn-timeout", type=float, default=30.0)
+    parser.add_argument("--max-error-rate", type=float, default=0.2,
+                        help="Stop ramping after a stage with more errors than this")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Keep tool output and ADK error logs (silenced by "
+                             "default; errors are still counted)")
+    parser.add_argument("--json", help="Write the stage summaries to this file")
+    args = parser.parse_args()
+
+    model_options = {"latency": args.model_latency, "jitter": args.jitter,
+                     "failure_rate": args.failure_rate}
+    if args.agent:
+        from event_replay import load_agent
+
+        if args.fake_model:
+            # The course scripts exit at import time without an API key
+            os.environ.setdefault("GOOGLE_API_KEY", "offline-load-test")
+        agent = load_agent(args.agent)
+        if args.fake_model:
+            install_fake_models(agent, **model_options)
+    else:
+        agent = make_home_agent(**model_options)
+    personas = load_personas(args.personas) if args.personas else default_personas()
+    generator = LoadGenerator(agent, personas, turn_timeout=args.turn_timeout)
+
+    print(f"Personas: {', '.join(persona.name for persona in personas)}; "
+          f"{args.stage_seconds:.0f}s per stage\n")
+    print(f"{'users':>6} {'turns':>8} {'turns/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'errors':>8}")
+    print("-" * 72)
+    # Bound to the real stdout: tool output may be redirected during the run
+    on_stage = functools.partial(print_stage, file=sys.stdout)
+    ramp = generator.ramp(args.users, args.stage_seconds, args.spawn_seconds,
+                          args.max_error_rate, on_stage=on_stage)
+    if args.verbose:
+        stages = asyncio.run(ramp)
+    else:
+        logging.getLogger("google_adk").setLevel(logging.CRITICAL)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            stages = asyncio.run(ramp)
+    if stages and stages[-1]["error_rate"] > args.max_error_rate:
+        print(f"\nStopped: error rate above {args.max_error_rate:.0%}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as json_file:
+            json.dump(stages, json_file, indent=2)
+        print(f"\nStage summaries written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Day 4a: Metrics Plugin (Prometheus)
+
+CountInvocationPlugin only counts agent runs and LLM requests. MetricsPlugin
+keeps those counters (agent_count, tool_count, llm_request_count) and adds:
+
+- latency histograms per agent, per tool and per model
+- prompt and completion token counters per agent/model
+- error counters for model and tool calls, and retry counters (a model or
+  tool call repeated in the same invocation after it failed)
+
+Counters are plain in-process dicts updated from the event loop: callbacks do
+not await between reading and writing a value, so no locks are needed. The
+metrics can be rendered in the Prometheus text format and served from a local
+/metrics endpoint.
+
+Note: HTTP retries done inside the model client (HttpRetryOptions) happen
+below the plugin layer and are not visible here; only calls that reach the
+plugin callbacks are counted.
+
+Usage:
+    from metrics_plugin import MetricsPlugin
+
+    metrics = MetricsPlugin()
+    runner = InMemoryRunner(agent=agent, plugins=[metrics])
+    metrics.serve(port=9464)           # curl http://127.0.0.1:9464/metrics
+    print(metrics.render_prometheus())
+"""
+
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+# Seconds; covers fast local tools up to slow model calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# ============================================================================
+# Metric Types
+# ============================================================================
+
+
+class Histogram:
+    """Fixed-bucket histogram; cumulative counts are computed on export."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile: upper bound of the bucket holding rank q."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r'\"').replace("\n", r"\n")
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Named counters and histograms with labels, rendered for Prometheus."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.help: Dict[str, str] = {}
+
+    def describe(self, name: str, text: str) -> None:
+        self.help[name] = text
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1) -> None:
+        series = self.counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        series = self.histograms.setdefault(name, {})
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4).
+
+        Called from the /metrics thread while the event loop keeps updating:
+        every dict is copied with list() first, which does not release the GIL.
+        """
+        lines: List[str] = []
+        for name, series in sorted(list(self.counters.items())):
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(list(series.items())):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for name, series in sorted(list(self.histograms.items())):
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(list(series.items()), key=lambda x: x[0]):
+                cumulative = 0
+                bounds = list(histogram.buckets) + [float("inf")]
+                for bound, count in zip(bounds, list(histogram.counts)):
+                    cumulative += count
+                    le = ("le", _format_value(bound))
+                    lines.append(
+                        f"{name}_bucket{_format_labels(labels, le)} {cumulative}"
+                    )
+                lines.append(
+                    f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}"
+                )
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+# ============================================================================
+# Metrics Plugin
+# ============================================================================
+
+
+class MetricsPlugin(BasePlugin):
+    """Latency, token, error and retry metrics for agents, tools and models."""
+
+    def __init__(
+        self, name: str = "metrics", buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name=name)
+        # Same counters as CountInvocationPlugin
+        self.agent_count: int = 0
+        self.tool_count: int = 0
+        self.llm_request_count: int = 0
+
+        self.registry = MetricsRegistry(buckets)
+        for metric, text in [
+            ("adk_agent_runs_total", "Agent runs"),
+            ("adk_agent_duration_seconds", "Agent run latency"),
+            ("adk_model_requests_total", "LLM requests"),
+            ("adk_model_duration_seconds", "LLM request latency"),
+            ("adk_prompt_tokens_total", "Prompt tokens reported by the model"),
+            ("adk_completion_tokens_total", "Completion tokens reported by the model"),
+            ("adk_tool_calls_total", "Tool calls"),
+            ("adk_tool_duration_seconds", "Tool call latency"),
+            ("adk_errors_total", "Failed model and tool calls"),
+            ("adk_retries_total", "Model and tool calls repeated after a failure"),
+        ]:
+            self.registry.describe(metric, text)
+
+        self._started: Dict[tuple, tuple] = {}
+        self._failed: Dict[tuple, int] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # ------------------------------------------------------------------------
+    # Agents
+    # ------------------------------------------------------------------------
+
+    async def before_agent_callback(self, *, agent, callback_context) -> None:
+        self.agent_count += 1
+        self._started[("agent", callback_context.invocation_id, agent.name)] = (
+            time.perf_counter(),
+        )
+
+    async def after_agent_callback(self, *, agent, callback_context) -> None:
+        started = self._started.pop(
+            ("agent", callback_context.invocation_id, agent.name), None
+        )
+        labels = (("agent", agent.name),)
+        self.registry.inc("adk_agent_runs_total", labels)
+        if started:
+            self.registry.observe(
+                "adk_agent_duration_seconds", labels, time.perf_counter() - started[0]
+            )
+
+    async def after_run_callback(self, *, invocation_context) -> None:
+        # Drop bookkeeping left behind by failed steps of this invocation
+        invocation_id = invocation_context.invocation_id
+        for pending in (self._failed, self._started):
+            for key in [key for key in pending if key[1] == invocation_id]:
+                del pending[key]
+
+    # ------------------------------------------------------------------------
+    # Models
+    # ------------------------------------------------------------------------
+
+    async def before_model_callback(self, *, callback_context, llm_request) -> None:
+        self.llm_request_count += 1
+        key = ("model", callback_context.invocation_id, callback_context.agent_name)
+        model = llm_request.model or "unknown"
+        if self._failed.pop(key, 0):
+            self.registry.inc(
+                "adk_retries_total",
+                (("agent", callback_context.agent_name), ("kind", "model"),
+                 ("name", model)),
+            )
+        self._started[key] = (time.perf_counter(), model)
+
+    async def after_model_callback(self, *, callback_context, llm_response) -> None:
+        key = ("model", callback_context.invocation_id, callback_context.agent_name)
+        started = self._started.pop(key, None)
+        if started is None:
+            return
+        start, model = started
+        labels = (("agent", callback_context.agent_name), ("model", model))
+        self.registry.inc("adk_model_requests_total", labels)
+        self.registry.observe(
+            "adk_model_duration_seconds", labels, time.perf_counter() - start
+        )
+        usage = llm_response.usage_metadata
+        if usage:
+            self.registry.inc(
+                "adk_prompt_tokens_total", labels, usage.prompt_token_count or 0
+            )
+            self.registry.inc(
+                "adk_completion_tokens_total", labels, usage.candidates_token_count or 0
+            )
+
+    async def on_model_error_callback(
+        self, *, callback_context, llm_request, error
+    ) -> None:
+        key = ("model", callback_context.invocation_id, callback_context.agent_name)
+        self._started.pop(key, None)
+        self._failed[key] = 1
+        self.registry.inc(
+            "adk_errors_total",
+            (("agent", callback_context.agent_name), ("kind", "model"),
+             ("name", llm_request.model or "unknown")),
+        )
+
+    # ------------------------------------------------------------------------
+    # Tools
+    # ------------------------------------------------------------------------
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context) -> None:
+        self.tool_count += 1
+        retry_key = ("tool", tool_context.invocation_id, tool.name)
+        if self._failed.pop(retry_key, 0):
+            self.registry.inc(
+                "adk_retries_total",
+                (("agent", tool_context.agent_name), ("kind", "tool"),
+                 ("name", tool.name)),
+            )
+        self._started[("call", tool_context.function_call_id)] = (time.perf_counter(),)
+
+    async def after_tool_callback(
+        self, *, tool, tool_args, tool_context, result
+    ) -> None:
+        started = self._started.pop(("call", tool_context.function_call_id), None)
+        labels = (("tool", tool.name),)
+        self.registry.inc("adk_tool_calls_total", labels)
+        if started:
+            self.registry.observe(
+                "adk_tool_duration_seconds", labels, time.perf_counter() - started[0]
+            )
+
+    async def on_tool_error_callback(
+        self, *, tool, tool_args, tool_context, error
+    ) -> None:
+        self._started.pop(("call", tool_context.function_call_id), None)
+        self._failed[("tool", tool_context.invocation_id, tool.name)] = 1
+        self.registry.inc(
+            "adk_errors_total",
+            (("agent", tool_context.agent_name), ("kind", "tool"), ("name", tool.name)),
+        )
+
+    # ------------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------------
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text format."""
+        return self.registry.render()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """p50 / p95 latency (seconds, bucket upper bounds) per histogram series."""
+        summary = {}
+        for name, series in self.registry.histograms.items():
+            for labels, histogram in series.items():
+                key = name + _format_labels(labels)
+                summary[key] = {
+                    "count": histogram.count,
+                    "p50": histogram.quantile(0.5),
+                    "p95": histogram.quantile(0.95),
+                }
+        return summary
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve /metrics from a daemon thread. Returns the running server."""
+        plugin = self
+
+        class _MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = plugin.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+    async def close(self) -> None:
+        """Stop the /metrics endpoint, if running."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
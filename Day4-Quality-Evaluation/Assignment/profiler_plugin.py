@@ -0,0 +1,250 @@
+"""
+Day 4a: Sampling Profiler Plugin
+
+Spans (tracing_plugin.py) show wall-clock time, which for an agent is mostly
+waiting on the model. SamplingProfilerPlugin shows where *CPU* goes: our tool
+code (count_papers_fixed, set_device_status, ...), event handling, and the
+framework itself.
+
+How it works:
+- A CPU-time timer (setitimer(ITIMER_PROF)) delivers SIGPROF after every
+  `interval` seconds of CPU used by the process; the handler records the
+  Python stack of the event loop. Time spent awaiting the model or network
+  uses no CPU and is not sampled. Samples that land while the loop waits in
+  its selector (CPU used by another thread) are counted in `unattributed_us`.
+- Where SIGPROF is unavailable (Windows) or the loop is not on the main
+  thread, a sampler thread reads the loop thread's stack every `interval`
+  seconds instead.
+- Samples are tagged with the active agent and tool: plugin callbacks record
+  them per asyncio task, and the sampler looks up the task running on the
+  loop at that moment. Samples in a task without tags (or outside any task)
+  are tagged "(unattributed)" rather than charged to another agent or tool.
+- On stop()/close() the samples are written as collapsed stacks
+  ("agent:x;tool:y;module:function;... <cpu µs>") for flamegraph.pl or
+  speedscope.
+
+Opt-in: nothing is sampled unless the plugin is added to a runner.
+
+Usage:
+    from profiler_plugin import SamplingProfilerPlugin
+
+    profiler = SamplingProfilerPlugin(output_path="profile.folded")
+    runner = InMemoryRunner(agent=agent, plugins=[profiler])
+    ...
+    await profiler.close()        # writes profile.folded
+    print(profiler.top_frames())
+"""
+
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+# Task currently running on each loop; not exposed publicly by asyncio
+_CURRENT_TASKS = getattr(asyncio.tasks, "_current_tasks", None)
+
+# Tag of samples taken in a task the plugin has no agent/tool tags for
+UNATTRIBUTED = "(unattributed)"
+
+# Leaf frames of an event loop that is waiting for I/O
+_IDLE_LEAVES = {"selectors:select", "windows_events:select"}
+
+# ============================================================================
+# Sampling Profiler Plugin
+# ============================================================================
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = os.path.basename(code.co_filename)
+    if module.endswith(".py"):
+        module = module[:-3]
+    return f"{module}:{code.co_name}"
+
+
+class SamplingProfilerPlugin(BasePlugin):
+    """Samples the event-loop thread and attributes CPU time to agents/tools."""
+
+    def __init__(
+        self,
+        name: str = "sampling_profiler",
+        interval: float = 0.01,
+        max_depth: int = 64,
+        output_path: Optional[str] = "profile.folded",
+    ):
+        super().__init__(name=name)
+        self.interval = interval
+        self.max_depth = max_depth
+        self.output_path = output_path
+        # collapsed stack -> CPU microseconds
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self.unattributed_us = 0
+        self.sampler_cpu_seconds = 0.0
+
+        self._labels: Dict[asyncio.Task, List[str]] = {}
+        # Tags of the task that pushed or popped last: a new task (e.g. a
+        # parallel tool call) starts from them
+        self._thread_labels: List[str] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._mode: Optional[str] = None
+        self._previous_handler = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ------------------------------------------------------------------------
+    # Sampling
+    # ------------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start sampling the current thread (must run on the event loop)."""
+        if self._mode is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if (
+            hasattr(signal, "SIGPROF")
+            and threading.current_thread() is threading.main_thread()
+        ):
+            self._mode = "signal"
+            self._previous_handler = signal.signal(signal.SIGPROF, self._on_sigprof)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self._mode = "thread"
+            self._stop.clear()
+            self._sampler = threading.Thread(
+                target=self._sample_loop, name="sampling-profiler", daemon=True
+            )
+            self._sampler.start()
+
+    def stop(self) -> None:
+        """Stop sampling and write the collapsed stacks, if configured."""
+        if self._mode is None:
+            return
+        if self._mode == "signal":
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        else:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+        self._mode = None
+        if self.output_path:
+            self.write_collapsed(self.output_path)
+
+    def _on_sigprof(self, signum, frame) -> None:
+        # ITIMER_PROF fires after every `interval` of process CPU time, so
+        # each sample stands for `interval` of CPU
+        handler_start = time.perf_counter()
+        if frame is not None:
+            self._record(frame, int(self.interval * 1_000_000))
+        self.sampler_cpu_seconds += time.perf_counter() - handler_start
+
+    def _sample_loop(self) -> None:
+        # Fallback when the loop is not on the main thread (or no SIGPROF):
+        # a sampler thread can only look at the loop thread when that thread
+        # releases the GIL, so samples lean towards I/O and C calls
+        while not self._stop.wait(self.interval):
+            sampler_start = time.thread_time()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._record(frame, int(self.interval * 1_000_000))
+            self.sampler_cpu_seconds += time.thread_time() - sampler_start
+
+    def _record(self, frame, used_us: int) -> None:
+        names: List[str] = []
+        while frame is not None and len(names) < self.max_depth:
+            names.append(_frame_label(frame))
+            frame = frame.f_back
+        if names and names[0] in _IDLE_LEAVES:
+            self.unattributed_us += used_us
+            return
+        names.reverse()
+
+        task = _CURRENT_TASKS.get(self._loop) if _CURRENT_TASKS is not None else None
+        labels = self._labels.get(task) if task is not None else None
+        key = ";".join((labels or [UNATTRIBUTED]) + names)
+        self.stacks[key] = self.stacks.get(key, 0) + used_us
+        self.samples += 1
+
+    # ------------------------------------------------------------------------
+    # Tags
+    # ------------------------------------------------------------------------
+
+    def _push(self, label: str) -> None:
+        task = asyncio.current_task()
+        # A new task (e.g. a parallel tool call) inherits its creator's tags
+        stack = self._labels.get(task)
+        if stack is None:
+            stack = self._labels[task] = list(self._thread_labels)
+        stack.append(label)
+        self._thread_labels = list(stack)
+
+    def _pop(self, label: str) -> None:
+        task = asyncio.current_task()
+        stack = self._labels.get(task)
+        if stack and label in stack:
+            del stack[len(stack) - 1 - stack[::-1].index(label):]
+            self._thread_labels = list(stack)
+            if not stack:
+                del self._labels[task]
+
+    async def before_run_callback(self, *, invocation_context) -> None:
+        self.start()
+
+    async def before_agent_callback(self, *, agent, callback_context) -> None:
+        self._push(f"agent:{agent.name}")
+
+    async def after_agent_callback(self, *, agent, callback_context) -> None:
+        self._pop(f"agent:{agent.name}")
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context) -> None:
+        self._push(f"tool:{tool.name}")
+
+    async def after_tool_callback(
+        self, *, tool, tool_args, tool_context, result
+    ) -> None:
+        self._pop(f"tool:{tool.name}")
+
+    async def on_tool_error_callback(
+        self, *, tool, tool_args, tool_context, error
+    ) -> None:
+        self._pop(f"tool:{tool.name}")
+
+    async def after_run_callback(self, *, invocation_context) -> None:
+        # Forget tags of finished tasks
+        for task in [task for task in self._labels if task.done()]:
+            del self._labels[task]
+
+    async def close(self) -> None:
+        self.stop()
+
+    # ------------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------------
+
+    def write_collapsed(self, path: str) -> None:
+        """Write "frame;frame;... <cpu µs>" lines."""
+        with open(path, "w", encoding="utf-8") as output:
+            for stack, weight in sorted(self.stacks.items()):
+                output.write(f"{stack} {weight}\n")
+
+    def top_frames(self, limit: int = 15) -> List[Tuple[str, float]]:
+        """Leaf frames (and agent/tool tags) by share of sampled CPU time."""
+        total = sum(self.stacks.values()) or 1
+        leaves: Dict[str, int] = {}
+        tags: Dict[str, int] = {}
+        for stack, weight in self.stacks.items():
+            frames = stack.split(";")
+            leaves[frames[-1]] = leaves.get(frames[-1], 0) + weight
+            for frame in set(frames):
+                if frame.startswith(("agent:", "tool:")):
+                    tags[frame] = tags.get(frame, 0) + weight
+        ranked = sorted({**leaves, **tags}.items(), key=lambda item: item[1], reverse=True)
+        return [(frame, weight / total) for frame, weight in ranked[:limit]]
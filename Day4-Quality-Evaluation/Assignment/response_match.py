@@ -0,0 +1,196 @@
+"""
+Day 4b: Fast response_match_score (ROUGE-1) with Batch Scoring
+
+response_match_score in test_config.json is ROUGE-1 F-measure between the
+agent's final response and the expected one (ADK's RougeEvaluator). The
+reference builds a new scorer and Porter stemmer for every response and
+tokenizes both texts character by character, which dominates scoring time
+for large evalsets.
+
+ResponseMatcher produces the same numbers faster:
+
+- the same tokenization (NFKC + lowercase, CJK split per character, Porter
+  stemming of ASCII words longer than 3 characters), with an ASCII fast path
+  and caches per word and per text - expected responses repeat a lot
+- score_batch(): every text becomes an array of token ids; unigram counts,
+  overlaps and F-measures of all pairs are computed together with NumPy,
+  using the same float operations as the reference
+
+Needs NumPy, and NLTK for the Porter stemmer (installed with ADK's eval
+extras, like the reference scorer).
+
+Usage:
+    from response_match import ResponseMatcher
+
+    matcher = ResponseMatcher()
+    matcher.score("Set the lamp to on.", "Successfully set the lamp to on.")
+    scores = matcher.score_batch(responses, expected_responses)   # np.ndarray
+
+    # python benchmark_evaluation.py response-match --pairs 5000
+"""
+
+import re
+import unicodedata
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+_ASCII_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# ============================================================================
+# Tokenization (same rules as ADK's _UnicodeAwareTokenizer + rouge_score)
+# ============================================================================
+
+
+def _is_cjk(code: int) -> bool:
+    return (
+        0x4E00 <= code <= 0x9FFF  # CJK Unified Ideographs
+        or 0x3040 <= code <= 0x309F  # Hiragana
+        or 0x30A0 <= code <= 0x30FF  # Katakana
+        or 0xAC00 <= code <= 0xD7AF  # Hangul Syllables
+    )
+
+
+def _is_non_spaced_script(code: int) -> bool:
+    return (
+        0x0E00 <= code <= 0x0E7F  # Thai
+        or 0x0E80 <= code <= 0x0EFF  # Lao
+        or 0x1780 <= code <= 0x17FF  # Khmer
+        or 0x1000 <= code <= 0x109F  # Myanmar
+    )
+
+
+def _split_words(text: str) -> List[str]:
+    """Words of a text; non-ASCII text goes through the per-character rules."""
+    if text.isascii():
+        # NFKC leaves ASCII unchanged and ASCII word characters are [a-z0-9]
+        return _ASCII_WORD_RE.findall(text.lower())
+
+    text = unicodedata.normalize("NFKC", text).lower()
+    chars: List[str] = []
+    for char in text:
+        code = ord(char)
+        if _is_cjk(code):
+            chars.extend((" ", char, " "))
+        elif _is_non_spaced_script(code):
+            if unicodedata.category(char).startswith("M"):
+                chars.append(char)  # combining mark stays with its base
+            else:
+                chars.extend((" ", char))
+        elif char.isalnum() or unicodedata.category(char).startswith("M"):
+            chars.append(char)
+        else:
+            chars.append(" ")
+    return "".join(chars).split()
+
+
+class ResponseMatcher:
+    """ROUGE-1 precision / recall / F-measure matching ADK's RougeEvaluator."""
+
+    def __init__(self, use_stemmer: bool = True):
+        self._stemmer = None
+        if use_stemmer:
+            try:
+                from nltk.stem import porter
+            except ImportError as exc:
+                raise ImportError(
+                    "Stemming requires NLTK: pip install nltk "
+                    "(or ResponseMatcher(use_stemmer=False))"
+                ) from exc
+            self._stemmer = porter.PorterStemmer()
+        self._vocabulary: Dict[str, int] = {}
+        self._word_ids: Dict[str, int] = {}
+        self._text_ids: Dict[str, np.ndarray] = {}
+
+    def _token(self, word: str):
+        """Token of one word (stemmed ASCII words), or None if it is dropped."""
+        if not word.isascii():
+            return word
+        if self._stemmer is not None and len(word) > 3:
+            word = self._stemmer.stem(word)
+        return word if _ASCII_WORD_RE.fullmatch(word) else None
+
+    def tokenize(self, text: str) -> List[str]:
+        """Tokens exactly as the reference scorer produces them."""
+        tokens = (self._token(word) for word in _split_words(text))
+        return [token for token in tokens if token is not None]
+
+    def _word_id(self, word: str) -> int:
+        """Vocabulary id of a word's token, or -1 if it yields no token."""
+        token = self._token(word)
+        if token is None:
+            return -1
+        return self._vocabulary.setdefault(token, len(self._vocabulary))
+
+    def token_ids(self, text: str) -> np.ndarray:
+        """Token ids of a text (cached per distinct text and per word)."""
+        ids = self._text_ids.get(text)
+        if ids is None:
+            word_ids = self._word_ids
+            ids = []
+            for word in _split_words(text):
+                word_id = word_ids.get(word)
+                if word_id is None:
+                    word_id = word_ids[word] = self._word_id(word)
+                if word_id >= 0:
+                    ids.append(word_id)
+            ids = self._text_ids[text] = np.array(ids, dtype=np.int64)
+        return ids
+
+    # ------------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------------
+
+    def score_batch_prf(
+        self, candidates: Sequence[str], references: Sequence[str]
+    ) -> np.ndarray:
+        """(n, 3) array of ROUGE-1 precision, recall, F-measure per pair."""
+        if len(candidates) != len(references):
+            raise ValueError("candidates and references must have the same length")
+        n = len(candidates)
+        if n == 0:
+            return np.zeros((0, 3))
+
+        candidate_ids = [self.token_ids(text) for text in candidates]
+        reference_ids = [self.token_ids(text) for text in references]
+        candidate_counts = np.array([len(ids) for ids in candidate_ids], dtype=np.int64)
+        reference_counts = np.array([len(ids) for ids in reference_ids], dtype=np.int64)
+
+        # Key every token by (pair, token id); unique keys give per-pair counts
+        width = max(len(self._vocabulary), 1)
+        pairs = np.arange(n, dtype=np.int64)
+
+        def unique_keys(ids_list, counts):
+            if not counts.sum():
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+            keys = np.repeat(pairs, counts) * width + np.concatenate(ids_list)
+            return np.unique(keys, return_counts=True)
+
+        cand_keys, cand_counts = unique_keys(candidate_ids, candidate_counts)
+        ref_keys, ref_counts = unique_keys(reference_ids, reference_counts)
+        _, cand_index, ref_index = np.intersect1d(
+            cand_keys, ref_keys, assume_unique=True, return_indices=True
+        )
+        overlap = np.bincount(
+            cand_keys[cand_index] // width,
+            weights=np.minimum(cand_counts[cand_index], ref_counts[ref_index]),
+            minlength=n,
+        )
+
+        # Same float operations as rouge_score._score_ngrams / scoring.fmeasure
+        precision = overlap / np.maximum(candidate_counts, 1)
+        recall = overlap / np.maximum(reference_counts, 1)
+        total = precision + recall
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fmeasure = np.where(total > 0, 2 * precision * recall / total, 0.0)
+        return np.stack([precision, recall, fmeasure], axis=1)
+
+    def score_batch(
+        self, candidates: Sequence[str], references: Sequence[str]
+    ) -> np.ndarray:
+        """ROUGE-1 F-measure per (candidate, reference) pair."""
+        return self.score_batch_prf(candidates, references)[:, 2]
+
+    def score(self, candidate: str, reference: str) -> float:
+        """ROUGE-1 F-measure of one pair (response_match_score of one turn)."""
+        return float(self.score_batch([candidate], [reference])[0])
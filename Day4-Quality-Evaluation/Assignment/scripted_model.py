@@ -0,0 +1,87 @@
+"""
+Day 4: Scripted Model for Offline Runs
+
+A deterministic stand-in for Gemini that lets the Day 4 agents run without an
+API key or network - used by the observability benchmarks.
+
+For every user turn ScriptedModel:
+1. calls each tool in `tool_calls` in order (one model response per call)
+2. then answers with `final_text`
+
+It sleeps `latency` seconds per response to simulate model round-trips and
+fills usage_metadata with token estimates, so plugins that read token counts
+see realistic numbers.
+
+Usage:
+    from scripted_model import ScriptedModel
+
+    model = ScriptedModel(
+        tool_calls=[("count_papers", {"papers": ["a", "b"]})],
+        final_text="Found 2 papers.",
+        latency=0.01,
+    )
+    agent = LlmAgent(name="agent", model=model, tools=[count_papers_fixed])
+"""
+
+import asyncio
+from typing import Any, AsyncGenerator, Dict, List, Tuple
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+
+def _estimate_tokens(text: str) -> int:
+    """~4 characters per token."""
+    return max(1, len(text) // 4)
+
+
+class ScriptedModel(BaseLlm):
+    """BaseLlm that replays a fixed tool-call plan and final answer."""
+
+    model: str = "scripted-model"
+    tool_calls: List[Tuple[str, Dict[str, Any]]] = []
+    final_text: str = "Done."
+    latency: float = 0.0
+
+    def _completed_tool_calls(self, llm_request: LlmRequest) -> int:
+        """Count function responses since the last user text message."""
+        completed = 0
+        for content in reversed(llm_request.contents):
+            parts = content.parts or []
+            if any(part.function_response for part in parts):
+                completed += 1
+            elif content.role == "user" and any(part.text for part in parts):
+                break
+        return completed
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        completed = self._completed_tool_calls(llm_request)
+        if completed < len(self.tool_calls):
+            name, args = self.tool_calls[completed]
+            part = types.Part(function_call=types.FunctionCall(name=name, args=args))
+            output_text = f"{name}({args})"
+        else:
+            part = types.Part(text=self.final_text)
+            output_text = self.final_text
+
+        prompt_text = " ".join(
+            part.text or ""
+            for content in llm_request.contents
+            for part in content.parts or []
+        )
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=_estimate_tokens(prompt_text),
+                candidates_token_count=_estimate_tokens(output_text),
+                total_token_count=_estimate_tokens(prompt_text)
+                + _estimate_tokens(output_text),
+            ),
+        )
@@ -0,0 +1,39 @@
+"""
+Tests for async_logging_plugin.AsyncLoggingPlugin with the offline home
+automation agent.
+
+Run: python -m pytest test_async_logging_plugin.py
+"""
+
+import asyncio
+import logging
+
+import pytest
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from async_logging_plugin import AsyncLoggingPlugin
+from home_automation_model import make_home_agent
+
+
+def test_model_error_logs_and_clears_the_model_timer(caplog):
+    plugin = AsyncLoggingPlugin()
+    runner = InMemoryRunner(agent=make_home_agent(failure_rate=1.0), plugins=[plugin])
+
+    async def failing_turn():
+        session = await runner.session_service.create_session(
+            app_name=runner.app_name, user_id="user"
+        )
+        message = types.Content(role="user", parts=[types.Part(text="Turn on the fan "
+                                                                    "in the kitchen.")])
+        async for _ in runner.run_async(user_id="user", session_id=session.id,
+                                        new_message=message):
+            pass
+
+    with caplog.at_level(logging.INFO, logger="agent_events"), pytest.raises(RuntimeError):
+        asyncio.run(failing_turn())
+
+    records = [record.msg for record in caplog.records if record.name == "agent_events"]
+    [error] = [record for record in records if record["event"] == "model_error"]
+    assert error["duration_ms"] >= 0
+    assert not [key for key in plugin._started if key[0] == "model"]
@@ -0,0 +1,64 @@
+"""
+Tests for eval_runner.py, with the offline ScriptedModel.
+
+Run: python -m pytest test_eval_runner.py
+"""
+
+import asyncio
+
+from google.adk.agents import LlmAgent
+
+from eval_runner import EvalRunner, ResponseCache
+from scripted_model import ScriptedModel
+
+CALL = {"location": "kitchen", "device_id": "fan", "status": "ON"}
+
+
+def set_device_status(location: str, device_id: str, status: str) -> dict:
+    """Sets the status of a smart home device."""
+    return {"success": True}
+
+
+def make_agent() -> LlmAgent:
+    return LlmAgent(
+        name="home_automation_agent",
+        model=ScriptedModel(tool_calls=[("set_device_status", CALL)], final_text="Done."),
+        tools=[set_device_status],
+    )
+
+
+# The agent makes the same call every turn: turn 0 matches, turn 1 does not,
+# so the best reachable tool_trajectory_avg_score is 0.5
+CASE = {
+    "eval_id": "case_1",
+    "turns": [
+        {"user": "Turn on the fan in the kitchen.",
+         "expected_tool_uses": [{"name": "set_device_status", "args": CALL}]},
+        {"user": "Turn off the fan in the kitchen.",
+         "expected_tool_uses": [{"name": "set_device_status",
+                                 "args": {**CALL, "status": "OFF"}}]},
+    ],
+}
+
+
+def run(cache: ResponseCache, threshold: float):
+    runner = EvalRunner(make_agent(), cache=cache, trajectory_threshold=threshold)
+    [result] = asyncio.run(runner.run([CASE]))
+    return result, runner.stats
+
+
+def test_aborted_result_is_not_reused_at_a_lower_threshold():
+    cache = ResponseCache(None)
+
+    result, stats = run(cache, 1.0)
+    assert result["aborted"]["max_score"] == 0.5
+    assert stats["executed"] == 1
+
+    result, stats = run(cache, 0.5)
+    assert "aborted" not in result
+    assert len(result["turns"]) == 2
+    assert stats["cached"] == 0 and stats["executed"] == 1
+
+    # Each result is reused at its own threshold
+    assert run(cache, 1.0)[1]["cached"] == 1
+    assert run(cache, 0.5)[1]["cached"] == 1
@@ -0,0 +1,28 @@
+"""
+Tests for load_generator.py with the offline home automation agent.
+
+Run: python -m pytest test_load_generator.py
+"""
+
+import asyncio
+
+from home_automation_model import make_home_agent
+from load_generator import LoadGenerator, default_personas
+
+
+def run_stage(failure_rate: float):
+    agent = make_home_agent(latency=0.001, failure_rate=failure_rate)
+    generator = LoadGenerator(agent, default_personas())
+    return asyncio.run(generator.run_stage(users=4, seconds=0.5, spawn_seconds=0.1))
+
+
+def test_conversations_are_completed_without_errors():
+    summary = run_stage(failure_rate=0.0)
+    assert summary["error_rate"] == 0.0
+    assert summary["conversations"] > 0
+
+
+def test_conversation_with_a_failed_turn_is_not_completed():
+    summary = run_stage(failure_rate=1.0)
+    assert summary["turns"] > 0 and summary["error_rate"] == 1.0
+    assert summary["conversations"] == 0
@@ -0,0 +1,181 @@
+"""
+Day 4a: Trace Summary (flame-graph style)
+
+Reads the OTLP/JSON lines written by tracing_plugin.OtlpJsonFileExporter and
+shows where time goes:
+
+- a timeline tree per trace: every span indented under its parent, with a bar
+  placed on the trace's time axis (like a flame chart)
+- a table of span names by self time (time not covered by child spans)
+- --collapsed: folded stacks ("a;b;c <self µs>") for flamegraph.pl or
+  speedscope
+
+Usage:
+    python trace_summary.py traces.jsonl
+    python trace_summary.py traces.jsonl --slowest 5 --width 60
+    python trace_summary.py traces.jsonl --trace 4bf92f3577b34da6a3ce929d0e0e4736
+    python trace_summary.py traces.jsonl --collapsed > stacks.folded
+"""
+
+import argparse
+import json
+from typing import Dict, List, Optional
+
+# ============================================================================
+# Loading
+# ============================================================================
+
+
+def load_spans(path: str) -> List[Dict]:
+    """Flatten every span of every export request in an OTLP/JSON lines file."""
+    spans = []
+    with open(path, encoding="utf-8") as trace_file:
+        for line in trace_file:
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            for resource_spans in request.get("resourceSpans", []):
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    for span in scope_spans.get("spans", []):
+                        spans.append(
+                            {
+                                "trace_id": span["traceId"],
+                                "span_id": span["spanId"],
+                                "parent_id": span.get("parentSpanId", ""),
+                                "name": span["name"],
+                                "start": int(span["startTimeUnixNano"]),
+                                "end": int(span["endTimeUnixNano"]),
+                                "error": span.get("status", {}).get("code") == 2,
+                                "children": [],
+                            }
+                        )
+    return spans
+
+
+def build_traces(spans: List[Dict]) -> Dict[str, List[Dict]]:
+    """Link children to parents; return root spans per trace id."""
+    by_id = {span["span_id"]: span for span in spans}
+    roots: Dict[str, List[Dict]] = {}
+    for span in spans:
+        parent = by_id.get(span["parent_id"])
+        if parent is not None:
+            parent["children"].append(span)
+        else:
+            roots.setdefault(span["trace_id"], []).append(span)
+    for span in spans:
+        span["children"].sort(key=lambda child: child["start"])
+    return roots
+
+
+def self_time(span: Dict) -> int:
+    """Span duration minus the union of its children's intervals (ns)."""
+    covered = 0
+    cursor = span["start"]
+    for child in span["children"]:
+        start, end = max(child["start"], cursor), min(child["end"], span["end"])
+        if end > start:
+            covered += end - start
+            cursor = end
+    return max(0, span["end"] - span["start"] - covered)
+
+
+def _walk(span: Dict, depth: int = 0, stack: Optional[List[str]] = None):
+    stack = (stack or []) + [span["name"]]
+    yield span, depth, stack
+    for child in span["children"]:
+        yield from _walk(child, depth + 1, stack)
+
+
+# ============================================================================
+# Output
+# ============================================================================
+
+
+def print_timeline(roots: List[Dict], width: int) -> None:
+    """Indented span tree with bars on the trace's time axis."""
+    trace_start = min(root["start"] for root in roots)
+    trace_end = max(root["end"] for root in roots)
+    total = max(1, trace_end - trace_start)
+    print(f"trace {roots[0]['trace_id']}  {total / 1e6:.1f} ms")
+
+    for root in roots:
+        for span, depth, _ in _walk(root):
+            duration = span["end"] - span["start"]
+            offset = int((span["start"] - trace_start) / total * width)
+            length = max(1, int(duration / total * width))
+            bar = " " * offset + "█" * min(length, width - offset)
+            label = ("  " * depth + span["name"])[:48]
+            marker = " !" if span["error"] else ""
+            print(f"  {label:<48} {duration / 1e6:>10.1f} ms "
+                  f"{self_time(span) / 1e6:>9.1f} self |{bar:<{width}}|{marker}")
+    print()
+
+
+def print_self_time_table(traces: Dict[str, List[Dict]], top: int) -> None:
+    """Aggregate count / total / self time by span name."""
+    totals: Dict[str, Dict[str, float]] = {}
+    for roots in traces.values():
+        for root in roots:
+            for span, _, _ in _walk(root):
+                entry = totals.setdefault(span["name"], {"count": 0, "total": 0, "self": 0})
+                entry["count"] += 1
+                entry["total"] += span["end"] - span["start"]
+                entry["self"] += self_time(span)
+
+    all_self = sum(entry["self"] for entry in totals.values()) or 1
+    print(f"{'span':<48} {'count':>7} {'total ms':>11} {'self ms':>11} {'self %':>7}")
+    print("-" * 88)
+    ranked = sorted(totals.items(), key=lambda item: item[1]["self"], reverse=True)
+    for name, entry in ranked[:top]:
+        print(f"{name[:48]:<48} {entry['count']:>7} {entry['total'] / 1e6:>11.1f} "
+              f"{entry['self'] / 1e6:>11.1f} {entry['self'] / all_self * 100:>6.1f}%")
+
+
+def print_collapsed(traces: Dict[str, List[Dict]]) -> None:
+    """Folded stacks weighted by self time in microseconds."""
+    folded: Dict[str, int] = {}
+    for roots in traces.values():
+        for root in roots:
+            for span, _, stack in _walk(root):
+                key = ";".join(name.replace(";", ",") for name in stack)
+                folded[key] = folded.get(key, 0) + self_time(span) // 1000
+    for key, weight in sorted(folded.items()):
+        if weight:
+            print(f"{key} {weight}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize OTLP/JSON trace files")
+    parser.add_argument("path", help="File written by OtlpJsonFileExporter")
+    parser.add_argument("--trace", help="Only show this trace id")
+    parser.add_argument("--slowest", type=int, default=3,
+                        help="Timelines of the N slowest traces")
+    parser.add_argument("--top", type=int, default=20,
+                        help="Rows in the self-time table")
+    parser.add_argument("--width", type=int, default=40, help="Bar width")
+    parser.add_argument("--collapsed", action="store_true",
+                        help="Print folded stacks instead")
+    args = parser.parse_args()
+
+    traces = build_traces(load_spans(args.path))
+    if args.trace:
+        traces = {args.trace: traces.get(args.trace, [])}
+        if not traces[args.trace]:
+            parser.error(f"trace {args.trace} not found")
+
+    if args.collapsed:
+        print_collapsed(traces)
+        return
+
+    def duration(roots):
+        return max(r["end"] for r in roots) - min(r["start"] for r in roots)
+
+    slowest = sorted(traces.values(), key=duration, reverse=True)[: args.slowest]
+    print(f"{len(traces)} traces; slowest {len(slowest)}:\n")
+    for roots in slowest:
+        print_timeline(roots, args.width)
+    print_self_time_table(traces, args.top)
+
+
+if __name__ == "__main__":
+    main()
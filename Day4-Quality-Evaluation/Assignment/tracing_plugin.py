@@ -0,0 +1,332 @@
+"""
+Day 4a: Span Tracing Plugin (OTLP JSON)
+
+Log lines do not show where a slow turn spends its time once agents call
+other agents through AgentTool. TracingPlugin records a span for every
+
+- invocation (runner.run_async / run_debug)
+- agent run
+- model call (with token usage)
+- tool call - including AgentTool, whose sub-agent invocation becomes a
+  child of the tool span
+
+with trace / span / parent ids, and writes them with OtlpJsonFileExporter:
+one OTLP/JSON ExportTraceServiceRequest per line, the format of the
+OpenTelemetry Collector's file exporter, so the file can be replayed into
+any OTLP-compatible backend. Summarize a file with trace_summary.py.
+
+No OpenTelemetry SDK is required.
+
+Usage:
+    from tracing_plugin import OtlpJsonFileExporter, TracingPlugin
+
+    tracing = TracingPlugin(OtlpJsonFileExporter("traces.jsonl"))
+    runner = InMemoryRunner(agent=agent, plugins=[tracing])
+    ...
+    await tracing.close()
+
+    # python trace_summary.py traces.jsonl
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+SERVICE_NAME = "adk-agents"
+SCOPE_NAME = "day4.tracing_plugin"
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# Span of the tool call currently executing in this task; a sub-agent
+# invocation started by that tool (AgentTool) is parented to it
+_current_tool_span: contextvars.ContextVar = contextvars.ContextVar(
+    "current_tool_span", default=None
+)
+
+# ============================================================================
+# Spans and Exporter
+# ============================================================================
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """Python value -> OTLP AnyValue."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """A finished or in-flight span."""
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent.span_id if parent else ""
+        self.attributes: Dict[str, Any] = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = STATUS_UNSET
+        self.status_message = ""
+
+    def end(self, status: int = STATUS_OK, message: str = "") -> None:
+        self.end_ns = time.time_ns()
+        self.status = status
+        self.status_message = message
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+                if value is not None
+            ],
+            "status": {"code": self.status},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class OtlpJsonFileExporter:
+    """Append spans to a file, one OTLP/JSON export request per line."""
+
+    def __init__(self, path: str = "traces.jsonl", service_name: str = SERVICE_NAME):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        if not spans:
+            return
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name",
+                             "value": {"stringValue": self.service_name}}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": SCOPE_NAME},
+                            "spans": [span.to_otlp() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        line = json.dumps(request, separators=(",", ":"))
+        with self._lock, open(self.path, "a", encoding="utf-8") as trace_file:
+            trace_file.write(line + "\n")
+
+
+# ============================================================================
+# Tracing Plugin
+# ============================================================================
+
+
+class TracingPlugin(BasePlugin):
+    """Invocation / agent / model / tool spans with parent-child linkage."""
+
+    def __init__(
+        self,
+        exporter: Optional[OtlpJsonFileExporter] = None,
+        name: str = "tracing",
+        max_batch: int = 512,
+    ):
+        super().__init__(name=name)
+        self.exporter = exporter or OtlpJsonFileExporter()
+        self.max_batch = max_batch
+        self._runs: Dict[str, Span] = {}
+        self._agents: Dict[str, List[Span]] = {}  # invocation_id -> open agent spans
+        self._models: Dict[tuple, Span] = {}
+        self._tools: Dict[str, Span] = {}
+        self._finished: List[Span] = []
+
+    # ------------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------------
+
+    def _parent_for(self, invocation_id: str) -> Optional[Span]:
+        """Innermost open agent span of an invocation, else its run span."""
+        agents = self._agents.get(invocation_id)
+        if agents:
+            return agents[-1]
+        return self._runs.get(invocation_id)
+
+    def _start(
+        self, name: str, parent: Optional[Span], attributes: Dict[str, Any]
+    ) -> Span:
+        trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        return Span(name, trace_id, parent, attributes)
+
+    def _finish(self, span: Span, status: int = STATUS_OK, message: str = "") -> None:
+        span.end(status, message)
+        self._finished.append(span)
+        if len(self._finished) >= self.max_batch:
+            self.flush()
+
+    def flush(self) -> None:
+        """Export all finished spans."""
+        spans, self._finished = self._finished, []
+        self.exporter.export(spans)
+
+    # ------------------------------------------------------------------------
+    # Invocations and agents
+    # ------------------------------------------------------------------------
+
+    async def before_run_callback(self, *, invocation_context) -> None:
+        parent = _current_tool_span.get()
+        if parent is not None and parent.end_ns is not None:
+            parent = None
+        self._runs[invocation_context.invocation_id] = self._start(
+            f"invocation {invocation_context.agent.name}",
+            parent,
+            {
+                "adk.invocation_id": invocation_context.invocation_id,
+                "adk.session_id": invocation_context.session.id,
+                "adk.user_id": invocation_context.user_id,
+                "adk.app_name": invocation_context.app_name,
+            },
+        )
+
+    async def after_run_callback(self, *, invocation_context) -> None:
+        invocation_id = invocation_context.invocation_id
+        # Close spans left open by failures, innermost first
+        for span in reversed(self._agents.pop(invocation_id, [])):
+            self._finish(span, STATUS_ERROR, "not completed")
+        for key in [key for key in self._models if key[0] == invocation_id]:
+            self._finish(self._models.pop(key), STATUS_ERROR, "not completed")
+
+        span = self._runs.pop(invocation_id, None)
+        if span is None:
+            return
+        self._finish(span)
+        if not span.parent_span_id:
+            # End of a top-level trace
+            self.flush()
+
+    async def before_agent_callback(self, *, agent, callback_context) -> None:
+        invocation_id = callback_context.invocation_id
+        span = self._start(
+            f"agent {agent.name}",
+            self._parent_for(invocation_id),
+            {"gen_ai.agent.name": agent.name},
+        )
+        self._agents.setdefault(invocation_id, []).append(span)
+
+    async def after_agent_callback(self, *, agent, callback_context) -> None:
+        agents = self._agents.get(callback_context.invocation_id)
+        if not agents:
+            return
+        for index in range(len(agents) - 1, -1, -1):
+            if agents[index].attributes.get("gen_ai.agent.name") == agent.name:
+                self._finish(agents.pop(index))
+                break
+
+    # ------------------------------------------------------------------------
+    # Model calls
+    # ------------------------------------------------------------------------
+
+    async def before_model_callback(self, *, callback_context, llm_request) -> None:
+        invocation_id = callback_context.invocation_id
+        model = llm_request.model or "unknown"
+        self._models[(invocation_id, callback_context.agent_name)] = self._start(
+            f"call_llm {model}",
+            self._parent_for(invocation_id),
+            {
+                "gen_ai.request.model": model,
+                "gen_ai.agent.name": callback_context.agent_name,
+            },
+        )
+
+    async def after_model_callback(self, *, callback_context, llm_response) -> None:
+        span = self._models.pop(
+            (callback_context.invocation_id, callback_context.agent_name), None
+        )
+        if span is None:
+            return
+        usage = llm_response.usage_metadata
+        if usage:
+            span.attributes["gen_ai.usage.input_tokens"] = usage.prompt_token_count
+            span.attributes["gen_ai.usage.output_tokens"] = usage.candidates_token_count
+        if llm_response.error_code:
+            self._finish(span, STATUS_ERROR, str(llm_response.error_code))
+        else:
+            self._finish(span)
+
+    async def on_model_error_callback(
+        self, *, callback_context, llm_request, error
+    ) -> None:
+        span = self._models.pop(
+            (callback_context.invocation_id, callback_context.agent_name), None
+        )
+        if span is not None:
+            span.attributes["error.type"] = type(error).__name__
+            self._finish(span, STATUS_ERROR, str(error)[:200])
+
+    # ------------------------------------------------------------------------
+    # Tool calls
+    # ------------------------------------------------------------------------
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context) -> None:
+        span = self._start(
+            f"execute_tool {tool.name}",
+            self._parent_for(tool_context.invocation_id),
+            {
+                "gen_ai.tool.name": tool.name,
+                "gen_ai.tool.call.id": tool_context.function_call_id,
+                "gen_ai.agent.name": tool_context.agent_name,
+            },
+        )
+        self._tools[tool_context.function_call_id] = span
+        _current_tool_span.set(span)
+
+    async def after_tool_callback(
+        self, *, tool, tool_args, tool_context, result
+    ) -> None:
+        span = self._tools.pop(tool_context.function_call_id, None)
+        _current_tool_span.set(None)
+        if span is not None:
+            self._finish(span)
+
+    async def on_tool_error_callback(
+        self, *, tool, tool_args, tool_context, error
+    ) -> None:
+        span = self._tools.pop(tool_context.function_call_id, None)
+        _current_tool_span.set(None)
+        if span is not None:
+            span.attributes["error.type"] = type(error).__name__
+            self._finish(span, STATUS_ERROR, str(error)[:200])
+
+    async def close(self) -> None:
+        """Export everything finished so far."""
+        self.flush()
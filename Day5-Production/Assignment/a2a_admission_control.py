@@ -0,0 +1,235 @@
+"""
+Day 5a: Admission Control for A2A Servers
+
+A to_a2a() server accepts every request it receives. Under load it starts an
+agent run - and model calls - for all of them at once. The model API answers
+429, Gemini's retry options back off (exp_base=7), and every request gets
+slower, including the ones that were admitted first.
+
+AdmissionControl decides before a request reaches the agent:
+
+- per-client rate limit: a token bucket per client refills at `rate`
+  requests per second up to `burst`. A client over its limit gets 429 with
+  Retry-After. Clients are told apart by their IP address. The X-Client-Id
+  header is only used with trust_client_header=True: clients set it
+  themselves, so any caller could change it to dodge its limit, or copy
+  another client's to use up their tokens. Enable it only behind a proxy that
+  sets the header itself (and strips it from incoming requests)
+- bounded concurrency: at most `max_concurrent` requests run at once. Up to
+  `max_queue` more wait for a slot, each for at most `max_wait` seconds
+- load shedding: a request that finds the queue full, or waits too long, gets
+  503 with Retry-After (estimated from recent request times) instead of
+  making everyone else slower
+
+Only A2A calls (POST) are limited; the agent card and metrics endpoints are
+always served. Counters are served as JSON at GET /admission/metrics to local
+clients only. With a2a_launcher.py the limits apply per worker.
+
+Usage (in the server file):
+    from a2a_admission_control import AdmissionControl, add_admission_control
+
+    app = to_a2a(product_catalog_agent, port=8001)
+    add_admission_control(app, AdmissionControl(rate=5, burst=10, max_concurrent=32))
+
+    # python benchmark_a2a.py admission --rate 100
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+METRICS_PATH = "/admission/metrics"
+LOCAL_CLIENTS = {"127.0.0.1", "::1"}
+CLIENT_HEADER = b"x-client-id"
+
+
+def peer_address(scope: Dict[str, Any]) -> str:
+    """The IP address of the connected client, the default client key."""
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def client_header(scope: Dict[str, Any]) -> str:
+    """The X-Client-Id header, or the IP address if there is none."""
+    for name, value in scope.get("headers", []):
+        if name == CLIENT_HEADER:
+            return value.decode("latin-1")
+    return peer_address(scope)
+
+
+class TokenBucket:
+    """`rate` tokens per second, at most `burst` saved up."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> float:
+        """Take a token: 0.0 if there was one, else seconds until there is."""
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    @property
+    def full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.burst
+
+
+class AdmissionControl:
+    """Per-client token buckets, a concurrency limit and a bounded wait queue."""
+
+    def __init__(
+        self,
+        rate: Optional[float] = 5.0,
+        burst: float = 10,
+        max_concurrent: int = 8,
+        max_queue: int = 16,
+        max_wait: float = 2.0,
+        trust_client_header: bool = False,
+        client_key: Optional[Callable[[Dict[str, Any]], str]] = None,
+        max_clients: int = 10000,
+    ):
+        """
+        rate=None turns off per-client rate limiting (concurrency limit only).
+        trust_client_header: rate-limit by the X-Client-Id header instead of
+            the IP address (only behind a proxy that sets it)
+        client_key: any other ASGI scope -> client function
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        if client_key is None:
+            client_key = client_header if trust_client_header else peer_address
+        self.client_key = client_key
+        self.max_clients = max_clients
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self._request_seconds = 1.0  # moving average, for Retry-After
+        self.stats = {"admitted": 0, "queued": 0, "rate_limited": 0, "shed": 0, "timed_out": 0}
+
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) >= self.max_clients:
+                # Forget clients whose buckets have refilled: they start full anyway
+                self._buckets = {key: b for key, b in self._buckets.items() if not b.full}
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def _retry_after(self) -> int:
+        """Seconds until the queue ahead of a new request has likely drained."""
+        backlog = (self.waiting + 1) / self.max_concurrent
+        return max(1, math.ceil(backlog * self._request_seconds))
+
+    async def acquire(self, scope: Dict[str, Any]) -> Optional[Tuple[int, int, str]]:
+        """
+        Wait for a slot. Returns None once admitted (call release() when done),
+        or the rejection: (status code, Retry-After seconds, reason).
+        """
+        if self.rate is not None:
+            wait = self._bucket(self.client_key(scope)).take()
+            if wait:
+                self.stats["rate_limited"] += 1
+                return 429, max(1, math.ceil(wait)), "rate limit exceeded"
+
+        if self._slots.locked():
+            if self.waiting >= self.max_queue:
+                self.stats["shed"] += 1
+                return 503, self._retry_after(), "server overloaded"
+            self.stats["queued"] += 1
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            self.stats["timed_out"] += 1
+            return 503, self._retry_after(), "server overloaded"
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self.stats["admitted"] += 1
+        return None
+
+    def release(self, seconds: float) -> None:
+        """Free the slot of a request that took `seconds`."""
+        self.active -= 1
+        self._request_seconds = 0.9 * self._request_seconds + 0.1 * seconds
+        self._slots.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "active": self.active,
+            "waiting": self.waiting,
+            "clients": len(self._buckets),
+            "avg_request_seconds": round(self._request_seconds, 3),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "pid": os.getpid(),
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that runs A2A calls (POST requests) through AdmissionControl."""
+
+    def __init__(self, app, control: AdmissionControl):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        rejection = await self.control.acquire(scope)
+        if rejection is not None:
+            status, retry_after, reason = rejection
+            body = json.dumps({"error": reason, "retry_after": retry_after}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        # The slot is held until the response (including a stream) is complete
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.control.release(time.monotonic() - started)
+
+
+def add_admission_control(app, control: AdmissionControl, path: str = METRICS_PATH) -> None:
+    """Limit the A2A calls of a to_a2a() app, and serve control.metrics() at `path`."""
+
+    async def metrics(request: Request) -> JSONResponse:
+        if request.client is None or request.client.host not in LOCAL_CLIENTS:
+            return JSONResponse({"error": "metrics are only available locally"}, status_code=403)
+        return JSONResponse(control.metrics())
+
+    app.add_middleware(AdmissionMiddleware, control=control)
+    app.add_route(path, metrics, methods=["GET"])
@@ -0,0 +1,242 @@
+"""
+Day 5a: Pooled A2A Client Connections
+
+Every RemoteA2aAgent creates its own httpx.AsyncClient and fetches the remote
+agent card the first time it runs. When agents are built per request or per
+session (or there are several remote agents), each delegation pays for a new
+TCP (and TLS) connection and another agent-card download.
+
+A2AConnectionPool shares one HTTP client between all remote agents:
+
+- keep-alive connections are reused across agents and requests (bounded by
+  max_connections / max_keepalive); HTTP/2 is negotiated with https servers
+  when the optional `h2` package is installed (pip install "httpx[http2]")
+- agent cards are cached per URL. A cached card is served without a request
+  for `card_max_age` seconds (or the server's Cache-Control max-age); after
+  that it is revalidated with If-None-Match, and a 304 reuses the cached card
+- concurrent lookups of the same card share one request
+
+Agents keep the client they were built with, so a closed pool stays closed:
+its agents fail fast instead of sending through a closed client. Build new
+agents from a new pool (get_default_pool() replaces a closed default pool).
+
+PooledRemoteA2aAgent overrides RemoteA2aAgent._resolve_agent_card_from_url,
+which is private ADK API; test_a2a_client_pool.py fails if it changes.
+
+Usage:
+    from a2a_client_pool import get_default_pool
+
+    pool = get_default_pool()
+    remote_agent = pool.remote_agent(
+        "product_catalog_agent",
+        f"http://localhost:8001{AGENT_CARD_WELL_KNOWN_PATH}",
+        description="Remote product catalog agent",
+    )
+    ...
+    await pool.aclose()
+
+    # python benchmark_a2a.py pool --requests 200 --concurrency 1 16
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from a2a.client.client import ClientConfig
+from a2a.client.client_factory import ClientFactory
+from a2a.types import AgentCard
+from google.adk.agents.remote_a2a_agent import (
+    DEFAULT_TIMEOUT,
+    AgentCardResolutionError,
+    RemoteA2aAgent,
+)
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def parse_agent_card(data: Dict[str, Any]) -> AgentCard:
+    """AgentCard from its JSON (pydantic in a2a-sdk 0.3, protobuf in 1.x)."""
+    if hasattr(AgentCard, "model_validate"):
+        return AgentCard.model_validate(data)
+    from google.protobuf.json_format import ParseDict
+
+    return ParseDict(data, AgentCard(), ignore_unknown_fields=True)
+
+
+# ============================================================================
+# Agent Card Cache
+# ============================================================================
+
+
+class AgentCardCache:
+    """Agent cards by URL, revalidated with ETag once they are older than max_age."""
+
+    def __init__(self, max_age: float = 300.0):
+        self.max_age = max_age
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.stats = {"hits": 0, "revalidated": 0, "fetched": 0}
+
+    def _fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.monotonic() - entry["checked"] < entry["max_age"]
+
+    async def get(self, client: httpx.AsyncClient, url: str) -> Dict[str, Any]:
+        """The card JSON at `url`, from the cache when it is still valid."""
+        entry = self._entries.get(url)
+        if entry and self._fresh(entry):
+            self.stats["hits"] += 1
+            return entry["card"]
+
+        lock = self._locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            # Another task may have refreshed it while we waited
+            entry = self._entries.get(url)
+            if entry and self._fresh(entry):
+                self.stats["hits"] += 1
+                return entry["card"]
+
+            headers = {}
+            if entry and entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            response = await client.get(url, headers=headers)
+            if response.status_code == 304 and entry:
+                self.stats["revalidated"] += 1
+            else:
+                response.raise_for_status()
+                self.stats["fetched"] += 1
+                entry = {"card": response.json(), "etag": response.headers.get("etag")}
+            match = _MAX_AGE_RE.search(response.headers.get("cache-control", ""))
+            entry["max_age"] = int(match.group(1)) if match else self.max_age
+            entry["checked"] = time.monotonic()
+            self._entries[url] = entry
+            return entry["card"]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# ============================================================================
+# Connection Pool
+# ============================================================================
+
+
+class A2AConnectionPool:
+    """One shared httpx.AsyncClient and agent-card cache for all remote agents."""
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 60.0,
+        http2: Optional[bool] = None,
+        card_max_age: float = 300.0,
+    ):
+        """
+        http2=None enables HTTP/2 when `h2` is installed. Plain http servers
+        such as a local uvicorn speak HTTP/1.1 either way; HTTP/2 is
+        negotiated with https servers.
+        """
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = _http2_available() if http2 is None else http2
+        self.cards = AgentCardCache(card_max_age)
+        self._client: Optional[httpx.AsyncClient] = None
+        self.closed = False
+
+    def check_open(self) -> None:
+        if self.closed:
+            raise RuntimeError(
+                "A2AConnectionPool is closed; build remote agents from a new pool"
+            )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client (created on first use; use one pool per event loop)."""
+        self.check_open()
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=self.limits,
+                http2=self.http2,
+            )
+        return self._client
+
+    def client_factory(self) -> ClientFactory:
+        """An A2A ClientFactory bound to the shared client."""
+        return ClientFactory(config=ClientConfig(httpx_client=self.client))
+
+    async def agent_card(self, url: str) -> AgentCard:
+        """The agent card at `url`, cached and revalidated with ETag."""
+        return parse_agent_card(await self.cards.get(self.client, url))
+
+    def remote_agent(
+        self, name: str, agent_card_url: str, description: str = "", **kwargs
+    ) -> "PooledRemoteA2aAgent":
+        """A RemoteA2aAgent that uses the shared client and card cache."""
+        return PooledRemoteA2aAgent(
+            name=name,
+            agent_card=agent_card_url,
+            description=description,
+            pool=self,
+            **kwargs,
+        )
+
+    async def aclose(self) -> None:
+        """Close the shared client and its connections. The pool cannot be reused."""
+        self.closed = True
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+class PooledRemoteA2aAgent(RemoteA2aAgent):
+    """RemoteA2aAgent whose HTTP client and agent card come from an A2AConnectionPool."""
+
+    def __init__(self, *, pool: A2AConnectionPool, **kwargs):
+        kwargs.setdefault("timeout", pool.timeout)
+        super().__init__(a2a_client_factory=pool.client_factory(), **kwargs)
+        self._pool = pool
+
+    async def _run_async_impl(self, ctx):
+        # The client this agent was built with is closed with the pool
+        self._pool.check_open()
+        async for event in super()._run_async_impl(ctx):
+            yield event
+
+    async def _resolve_agent_card_from_url(self, url: str, ctx=None) -> AgentCard:
+        # Authenticated cards are per session: leave them to RemoteA2aAgent
+        if self._config.card_request_interceptors:
+            return await super()._resolve_agent_card_from_url(url, ctx)
+        self._pool.check_open()
+        try:
+            return await self._pool.agent_card(url)
+        except Exception as e:
+            raise AgentCardResolutionError(
+                f"Failed to resolve AgentCard from URL {url}: {e}"
+            ) from e
+
+
+_default_pool: Optional[A2AConnectionPool] = None
+
+
+def get_default_pool() -> A2AConnectionPool:
+    """The process-wide pool shared by the course's remote agents."""
+    global _default_pool
+    if _default_pool is None or _default_pool.closed:
+        _default_pool = A2AConnectionPool()
+    return _default_pool
@@ -0,0 +1,357 @@
+"""
+Day 5a: Multi-Worker A2A Server Launcher
+
+start_product_catalog_server used to run a single `uvicorn
+product_catalog_server:app` process and poll the agent card URL once a second
+until it answered. One process serves every request on one CPU core, and each
+failed poll adds up to a second of dead time.
+
+This launcher runs a to_a2a() app the way pre-forking servers do:
+
+- preloaded app: the master process imports the app and loads the uvicorn
+  config once and binds the port, then forks N workers. The workers inherit
+  the imported modules and the listening socket, and the kernel hands each
+  new connection to one of them. Each startup phase is logged with its
+  duration (see `python benchmark_a2a.py startup` for a per-module profile)
+- readiness is signalled, not polled: each worker reports when its ASGI
+  startup (lifespan) has finished. Once all N have reported, the master writes
+  "ready" to a pipe passed in by the launching process (--ready-fd), and
+  start_server() returns as soon as it reads that line
+- graceful shutdown: SIGTERM/SIGINT is forwarded to the workers. They stop
+  accepting connections and finish in-flight requests (up to
+  --graceful-timeout seconds) before exiting; stragglers are killed
+- a worker that dies while the server is running is replaced
+
+Workers do not share memory. to_a2a()'s in-memory session and task stores are
+per worker, so a follow-up message in a multi-turn A2A conversation may land
+on a worker that has not seen the earlier ones. For multi-turn use, pass
+to_a2a() a runner with a shared session service (e.g. DatabaseSessionService).
+
+Windows has no os.fork, and subprocess cannot pass it the pipe. There the
+launcher serves the app from a single uvicorn process whatever --workers says,
+start_server() polls the agent card (every 50 ms) to detect readiness, and
+terminate() stops the server at once instead of gracefully.
+
+Usage:
+    python a2a_launcher.py product_catalog_server:app --app-dir /tmp --port 8001 --workers 4
+
+    from a2a_launcher import start_server
+
+    server = start_server("product_catalog_server:app", port=8001, workers=4, app_dir="/tmp")
+    ...
+    server.terminate()  # graceful
+    server.wait()
+
+    # python benchmark_a2a.py workers --workers 1 2 4
+"""
+
+import argparse
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+READY = b"ready\n"
+AGENT_CARD_PATH = "/.well-known/agent-card.json"
+# Forked workers and the readiness pipe need POSIX (not Windows)
+CAN_FORK = hasattr(os, "fork")
+
+# ============================================================================
+# Launching a Server
+# ============================================================================
+
+
+class ServerStartError(RuntimeError):
+    """The server exited or timed out before all workers were ready."""
+
+    def __init__(self, message: str, process: subprocess.Popen):
+        super().__init__(message)
+        self.process = process
+
+
+def start_server(
+    app: str,
+    port: int,
+    workers: int = 1,
+    host: str = "localhost",
+    app_dir: Optional[str] = None,
+    stdout=None,
+    env: Optional[Dict[str, str]] = None,
+    timeout: float = 30.0,
+    graceful_timeout: float = 10.0,
+) -> subprocess.Popen:
+    """
+    Launch `app` ("module:attribute") with `workers` worker processes and
+    return once every worker is ready to accept requests. Without os.fork
+    (Windows) the app runs in one process, ready once it serves the agent card.
+
+    Raises:
+        ServerStartError: the server exited during startup, or was not ready
+            within `timeout` seconds (it is terminated then)
+    """
+    command = [
+        sys.executable, os.path.abspath(__file__), app,
+        "--host", host,
+        "--port", str(port),
+        "--workers", str(workers),
+        "--graceful-timeout", str(graceful_timeout),
+    ]
+    if app_dir:
+        command += ["--app-dir", app_dir]
+    output = {"stdout": stdout, "stderr": subprocess.STDOUT if stdout is not None else None}
+
+    if CAN_FORK:
+        ready_read, ready_write = os.pipe()
+        process = subprocess.Popen(
+            command + ["--ready-fd", str(ready_write)],
+            pass_fds=(ready_write,),
+            env=env,
+            **output,
+        )
+        os.close(ready_write)
+        try:
+            readable, _, _ = select.select([ready_read], [], [], timeout)
+            # EOF (b"") means the master exited without signalling readiness
+            signal_line = os.read(ready_read, len(READY)) if readable else None
+        finally:
+            os.close(ready_read)
+    else:
+        process = subprocess.Popen(command, env=env, **output)
+        signal_line = _poll_agent_card(process, f"http://{host}:{port}{AGENT_CARD_PATH}",
+                                       timeout)
+
+    if signal_line == READY:
+        return process
+    if signal_line is None:
+        process.terminate()
+        process.wait()
+        raise ServerStartError(f"A2A server was not ready after {timeout:.0f}s", process)
+    process.wait()
+    raise ServerStartError(
+        f"A2A server exited with code {process.returncode} during startup", process
+    )
+
+
+def _poll_agent_card(process: subprocess.Popen, url: str, timeout: float) -> Optional[bytes]:
+    """
+    Readiness without the pipe: READY once `url` answers, b"" if the server
+    exited first, None after `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return b""
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return READY
+        except OSError:  # not listening yet (URLError), or startup is still running
+            time.sleep(0.05)
+    return None
+
+
+# ============================================================================
+# Master and Workers
+# ============================================================================
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _load_config(app, args):
+    """Build and load the uvicorn config in the master, so workers skip it."""
+    import uvicorn
+
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+    config.load()
+    return config
+
+
+def _run_worker(config, sock: Optional[socket.socket] = None,
+                notify_fd: Optional[int] = None) -> None:
+    """
+    Serve the loaded config's app on the shared socket (runs in the fork), or
+    on the config's host and port without one.
+    """
+    import uvicorn
+
+    class NotifyingServer(uvicorn.Server):
+        async def startup(self, sockets=None):
+            await super().startup(sockets=sockets)
+            if self.started and notify_fd is not None:
+                os.write(notify_fd, f"{os.getpid()}\n".encode())
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, signal.SIG_DFL)
+    try:
+        from sse_starlette.sse import AppStatus
+    except ImportError:
+        pass
+    else:
+        # A2A streams task updates over SSE. sse-starlette ends every stream as
+        # soon as shutdown starts; let them finish like other in-flight
+        # requests (uvicorn still cancels them after the graceful timeout)
+        AppStatus.disable_automatic_graceful_drain()
+    NotifyingServer(config).run(sockets=[sock] if sock is not None else None)
+
+
+class Master:
+    """Forks the workers, reports readiness and supervises them."""
+
+    def __init__(self, config, sock: socket.socket, args, started: float):
+        self.config = config
+        self.sock = sock
+        self.args = args
+        self.workers: Dict[int, bool] = {}  # pid -> ready
+        self.stopping = False
+        self.ready_sent = False
+        self._notify_read, self._notify_write = os.pipe()
+        self._buffer = b""
+        self._started = started
+
+    def log(self, message: str) -> None:
+        print(f"[launcher] {message}", flush=True)
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            os.close(self._notify_read)
+            if self.args.ready_fd is not None and not self.ready_sent:
+                # Only the master may hold the launcher's end: its exit is EOF
+                os.close(self.args.ready_fd)
+            code = 0
+            try:
+                _run_worker(self.config, self.sock, self._notify_write)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                import traceback
+
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        self.workers[pid] = False
+
+    def stop(self, sig=None, frame=None) -> None:
+        if not self.stopping:
+            self.log(f"Shutting down {len(self.workers)} workers gracefully")
+        self.stopping = True
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _read_notifications(self, timeout: float) -> None:
+        readable, _, _ = select.select([self._notify_read], [], [], timeout)
+        if not readable:
+            return
+        self._buffer += os.read(self._notify_read, 4096)
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for line in lines:
+            pid = int(line)
+            if pid in self.workers:
+                self.workers[pid] = True
+        if not self.ready_sent and self.workers and all(self.workers.values()):
+            self.ready_sent = True
+            self.log(f"All {len(self.workers)} workers ready on "
+                     f"http://{self.args.host}:{self.args.port} "
+                     f"({_elapsed_ms(self._started)})")
+            if self.args.ready_fd is not None:
+                os.write(self.args.ready_fd, READY)
+                os.close(self.args.ready_fd)
+
+    def _reap(self) -> None:
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            was_ready = self.workers.pop(pid, False)
+            if self.stopping:
+                continue
+            if not self.ready_sent or not was_ready:
+                # A worker that cannot start would fail again: give up
+                self.log(f"Worker {pid} failed during startup (status {status})")
+                self.stop()
+                return
+            self.log(f"Worker {pid} exited (status {status}), starting a replacement")
+            self.spawn()
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.args.workers):
+            self.spawn()
+
+        deadline = None
+        while self.workers:
+            self._read_notifications(timeout=0.2)
+            self._reap()
+            if self.stopping and deadline is None:
+                # Workers get the graceful timeout plus a little for lifespan shutdown
+                deadline = time.monotonic() + self.args.graceful_timeout + 5
+            if deadline is not None and time.monotonic() > deadline:
+                for pid in list(self.workers):
+                    self.log(f"Worker {pid} did not stop in time, killing it")
+                    os.kill(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                    del self.workers[pid]
+        return 0 if self.ready_sent else 1
+
+
+def _elapsed_ms(since: float) -> str:
+    return f"{(time.perf_counter() - since) * 1000:.0f} ms"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run an ASGI app (e.g. to_a2a()) on N workers")
+    parser.add_argument("app", help='App to serve, "module:attribute"')
+    parser.add_argument("--app-dir", default=".", help="Directory to import the app from")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--graceful-timeout", type=float, default=10.0,
+                        help="Seconds to let in-flight requests finish on shutdown")
+    parser.add_argument("--ready-fd", type=int,
+                        help="File descriptor to write 'ready' to once all workers are up")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    # Preload: import the app and load the config once, before forking
+    started = time.perf_counter()
+    from uvicorn.importer import import_from_string
+
+    sys.path.insert(0, os.path.abspath(args.app_dir))
+    app = import_from_string(args.app)
+    print(f"[launcher] Imported {args.app} ({_elapsed_ms(started)})", flush=True)
+    config = _load_config(app, args)
+    if not CAN_FORK:
+        if args.workers > 1:
+            print("[launcher] os.fork is not available here: serving with 1 worker", flush=True)
+        _run_worker(config)
+        return 0
+    sock = _bind(args.host, args.port)
+    return Master(config, sock, args, started).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
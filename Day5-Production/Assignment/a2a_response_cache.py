@@ -0,0 +1,375 @@
+"""
+Day 5a: A2A Server Response Cache
+
+A to_a2a() server runs a full agent turn - one or more model calls - for every
+message it receives, even when many consumers ask the product catalog agent
+the same question.
+
+ResponseCache is an opt-in cache in front of the agent executor:
+
+- exact match: the message is normalized (case, punctuation and whitespace
+  ignored) and looked up together with the agent version
+- semantic match (optional): a cached answer is reused for a message whose
+  similarity to a cached one is at least `semantic_threshold`. By default
+  similarity is the cosine of the messages' content words (stop words and
+  plural "s" ignored). Pass `embed` to use real embeddings (any text ->
+  vector function). A similar message only matches if its key terms are the
+  same: by default its numbers, so "iPhone 15" never answers for "iPhone 14".
+  In a long question one other word barely changes the similarity, so pass
+  `key_terms` with the words that name products (e.g.
+  CatalogIndex.name_tokens) to keep "MacBook Air 14" from getting the
+  "MacBook Pro 14" answer
+- entries expire after `ttl` seconds; at most `max_entries` are kept (least
+  recently used are evicted)
+- concurrent identical misses share one agent run
+- the agent version defaults to a fingerprint of the agent's name,
+  instruction, model and tools, so changing the agent invalidates its entries
+
+Only the first message of an A2A conversation (a new context) is served from
+or stored in the cache: later turns depend on the conversation so far, and a
+cached answer is not added to the session. Use it for question/answer agents
+like the product catalog, not for multi-turn ones.
+
+Hit/miss metrics are served as JSON at GET /cache/metrics to local clients
+only. Each worker of a2a_launcher.py has its own cache and metrics.
+
+Usage (in the server file):
+    from a2a_response_cache import ResponseCache, add_cache_metrics_route, caching_executor_factory
+
+    cache = ResponseCache(ttl=300, semantic_threshold=0.9, key_terms=CATALOG.name_tokens)
+    app = to_a2a(product_catalog_agent, port=8001,
+                 agent_executor_factory=caching_executor_factory(cache, streaming_executor_factory))
+    add_cache_metrics_route(app, cache)
+
+    # python benchmark_a2a.py cache
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import Task, TaskArtifactUpdateEvent, TaskState, TaskStatus, TaskStatusUpdateEvent
+from google.adk.a2a.executor.a2a_agent_executor import A2aAgentExecutor
+from google.adk.runners import Runner
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+METRICS_PATH = "/cache/metrics"
+LOCAL_CLIENTS = {"127.0.0.1", "::1"}
+STOP_WORDS = {
+    "a", "about", "an", "and", "any", "are", "can", "could", "do", "does", "for", "have",
+    "hi", "i", "is", "it", "me", "my", "of", "on", "please", "s", "tell", "that", "the",
+    "there", "this", "to", "want", "what", "would", "you", "your",
+}
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_message(text: str) -> str:
+    """Lowercase words separated by single spaces: the exact-match key."""
+    return " ".join(_WORD_RE.findall(text.casefold()))
+
+
+def word_vector(text: str) -> Dict[str, float]:
+    """Content-word counts of `text`, the default `embed` for semantic matching."""
+    vector: Dict[str, float] = {}
+    for word in normalize_message(text).split():
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        vector[word] = vector.get(word, 0.0) + 1.0
+    return vector
+
+
+def numbers(text: str) -> frozenset:
+    """The numbers in `text`, the default `key_terms` for semantic matching."""
+    return frozenset(re.findall(r"\d+", text))
+
+
+def cosine(a, b) -> float:
+    """Cosine similarity of two sparse (dict) or dense (sequence) vectors."""
+    if isinstance(a, dict):
+        dot = sum(value * b.get(key, 0.0) for key, value in a.items())
+        norms = math.sqrt(sum(v * v for v in a.values()) * sum(v * v for v in b.values()))
+    else:
+        dot = sum(x * y for x, y in zip(a, b))
+        norms = math.sqrt(sum(x * x for x in a) * sum(y * y for y in b))
+    return dot / norms if norms else 0.0
+
+
+def agent_fingerprint(agent) -> str:
+    """Short hash of what shapes an agent's answers: name, instruction, model and tools."""
+    model = getattr(agent, "model", "")
+    tools = getattr(agent, "tools", []) or []
+    description = "\n".join([
+        agent.name,
+        str(getattr(agent, "instruction", "")),
+        getattr(model, "model", None) or str(model),
+        *(getattr(tool, "__name__", None) or getattr(tool, "name", "") for tool in tools),
+        *((getattr(tool, "__doc__", None) or "") for tool in tools),
+    ])
+    return hashlib.sha256(description.encode()).hexdigest()[:12]
+
+
+# ============================================================================
+# Cache
+# ============================================================================
+
+
+class ResponseCache:
+    """Final agent answers by normalized message and agent version."""
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        max_entries: int = 1024,
+        semantic_threshold: Optional[float] = None,
+        embed: Callable[[str], Any] = word_vector,
+        key_terms: Callable[[str], Any] = numbers,
+    ):
+        """
+        semantic_threshold=None caches exact (normalized) matches only.
+        key_terms: terms a message must share exactly with a cached one for a
+            semantic match
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.semantic_threshold = semantic_threshold
+        self.embed = embed
+        self.key_terms = key_terms
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {
+            "exact_hits": 0, "semantic_hits": 0, "shared_runs": 0, "misses": 0,
+            "bypassed": 0, "stores": 0, "expired": 0, "evicted": 0,
+        }
+
+    @staticmethod
+    def key(message: str, agent_version: str) -> str:
+        return f"{agent_version}:{normalize_message(message)}"
+
+    def get(self, message: str, agent_version: str) -> Optional[List]:
+        """The cached answer parts for `message`, or None."""
+        now = time.monotonic()
+        key = self.key(message, agent_version)
+        entry = self._entries.get(key)
+        if entry is not None and now - entry["stored"] > self.ttl:
+            del self._entries[key]
+            self.stats["expired"] += 1
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.stats["exact_hits"] += 1
+            return entry["parts"]
+
+        # While the exact message is being answered, wait for that run instead
+        if self.semantic_threshold is not None and key not in self._inflight:
+            entry = self._semantic_match(message, agent_version, now)
+            if entry is not None:
+                self.stats["semantic_hits"] += 1
+                return entry["parts"]
+        return None
+
+    def _semantic_match(self, message: str, agent_version: str, now: float):
+        vector = self.embed(message)
+        key_terms = self.key_terms(message)
+        best, best_score = None, self.semantic_threshold
+        for entry in self._entries.values():
+            if (entry["agent_version"] != agent_version or now - entry["stored"] > self.ttl
+                    or entry["key_terms"] != key_terms):
+                continue
+            score = cosine(vector, entry["vector"])
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def put(self, message: str, agent_version: str, parts: List) -> None:
+        key = self.key(message, agent_version)
+        self._entries[key] = {
+            "parts": parts,
+            "stored": time.monotonic(),
+            "agent_version": agent_version,
+            "key_terms": self.key_terms(message),
+            "vector": self.embed(message) if self.semantic_threshold is not None else None,
+        }
+        self._entries.move_to_end(key)
+        self.stats["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evicted"] += 1
+
+    def pending(self, message: str, agent_version: str) -> Optional[asyncio.Future]:
+        """The run answering this exact message right now, if any."""
+        return self._inflight.get(self.key(message, agent_version))
+
+    def start(self, message: str, agent_version: str) -> asyncio.Future:
+        """Record a miss; the agent is about to run for this message."""
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[self.key(message, agent_version)] = future
+        return future
+
+    def finish(self, message: str, agent_version: str, future: asyncio.Future,
+               parts: Optional[List]) -> None:
+        """
+        Store a run's answer (None if it did not complete) and wake the
+        waiters of its `future`, the one start() returned.
+        """
+        key = self.key(message, agent_version)
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if parts:
+            self.put(message, agent_version, parts)
+        if not future.done():
+            future.set_result(parts)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"] + self.stats["shared_runs"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "ttl": self.ttl,
+            "semantic_threshold": self.semantic_threshold,
+            "pid": os.getpid(),
+        }
+
+
+# ============================================================================
+# Executor
+# ============================================================================
+
+
+class _RecordingQueue:
+    """Passes events on to the real queue and keeps the final answer."""
+
+    def __init__(self, queue: EventQueue):
+        self._queue = queue
+        self.answer: Optional[List] = None
+        self.completed = False
+
+    async def enqueue_event(self, event) -> None:
+        if isinstance(event, TaskArtifactUpdateEvent) and event.last_chunk:
+            self.answer = list(event.artifact.parts)
+        elif isinstance(event, TaskStatusUpdateEvent):
+            self.completed = event.status.state == TaskState.TASK_STATE_COMPLETED
+        await self._queue.enqueue_event(event)
+
+    def __getattr__(self, name):
+        return getattr(self._queue, name)
+
+
+class CachingAgentExecutor(AgentExecutor):
+    """Serves repeated first messages from a ResponseCache instead of running the agent."""
+
+    def __init__(self, executor: AgentExecutor, cache: ResponseCache, agent_version: str,
+                 max_contexts: int = 10000):
+        self.executor = executor
+        self.cache = cache
+        self.agent_version = agent_version
+        self.max_contexts = max_contexts
+        self._contexts: "OrderedDict[str, None]" = OrderedDict()  # conversations seen
+
+    def _first_message(self, context: RequestContext) -> bool:
+        first = context.current_task is None and context.context_id not in self._contexts
+        self._contexts[context.context_id] = None
+        self._contexts.move_to_end(context.context_id)
+        while len(self._contexts) > self.max_contexts:
+            self._contexts.popitem(last=False)
+        return first
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        message = context.get_user_input()
+        if not message or not self._first_message(context):
+            self.cache.stats["bypassed"] += 1
+            await self.executor.execute(context, event_queue)
+            return
+
+        parts = self.cache.get(message, self.agent_version)
+        while parts is None:
+            # The same question is being answered right now: wait for that run.
+            # If it fails, the first waiter to wake up starts the next run
+            # (there is no await between pending() and start()) and the
+            # others wait for that one
+            pending = self.cache.pending(message, self.agent_version)
+            if pending is None:
+                break
+            parts = await asyncio.shield(pending)
+            if parts is not None:
+                self.cache.stats["shared_runs"] += 1
+        if parts is not None:
+            await self._replay(context, event_queue, parts)
+            return
+
+        future = self.cache.start(message, self.agent_version)
+        recorder = _RecordingQueue(event_queue)
+        try:
+            await self.executor.execute(context, recorder)
+        finally:
+            self.cache.finish(
+                message, self.agent_version, future,
+                recorder.answer if recorder.completed else None,
+            )
+
+    async def _replay(self, context: RequestContext, event_queue: EventQueue,
+                      parts: Sequence) -> None:
+        """Publish a cached answer as a completed task."""
+        await event_queue.enqueue_event(
+            Task(
+                id=context.task_id,
+                context_id=context.context_id,
+                status=TaskStatus(state=TaskState.TASK_STATE_SUBMITTED),
+                history=[context.message],
+            )
+        )
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.add_artifact(list(parts), artifact_id=str(uuid.uuid4()), last_chunk=True)
+        await updater.complete()
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        await self.executor.cancel(context, event_queue)
+
+
+def caching_executor_factory(
+    cache: ResponseCache,
+    executor_factory: Optional[Callable[[Runner], AgentExecutor]] = None,
+    agent_version: Optional[str] = None,
+) -> Callable[[Runner], AgentExecutor]:
+    """
+    agent_executor_factory for to_a2a() that answers from `cache` when it can.
+
+    executor_factory builds the executor that runs the agent on a miss
+    (default: A2aAgentExecutor); agent_version defaults to agent_fingerprint().
+    """
+
+    def factory(runner: Runner) -> AgentExecutor:
+        executor = executor_factory(runner) if executor_factory else A2aAgentExecutor(runner=runner)
+        return CachingAgentExecutor(executor, cache, agent_version or agent_fingerprint(runner.agent))
+
+    return factory
+
+
+def add_cache_metrics_route(app, cache: ResponseCache, path: str = METRICS_PATH) -> None:
+    """Serve cache.metrics() as JSON at `path`, to clients on this machine only."""
+
+    async def metrics(request: Request) -> JSONResponse:
+        if request.client is None or request.client.host not in LOCAL_CLIENTS:
+            return JSONResponse({"error": "metrics are only available locally"}, status_code=403)
+        return JSONResponse(cache.metrics())
+
+    app.add_route(path, metrics, methods=["GET"])
@@ -0,0 +1,103 @@
+"""
+Day 5a: Streaming A2A Responses
+
+to_a2a() runs the agent without streaming, and the A2A executor reports each
+ADK event as a "working" status update. RemoteA2aAgent marks those updates as
+thoughts, so the only user-visible text is the final artifact sent after the
+whole remote run - the customer waits for the complete answer.
+
+streaming_executor_factory makes the server stream:
+
+- the request converter runs the agent with StreamingMode.SSE, so the model
+  yields partial responses as tokens arrive
+- the event converter sends each partial text chunk as a
+  TaskArtifactUpdateEvent (append=True, last_chunk=False) on the task's
+  server-sent event stream; complete events are converted as before
+
+RemoteA2aAgent (streaming is on by default in its ClientConfig) turns those
+artifact updates into events with partial=True, so the consumer agent's runner
+yields the remote agent's answer token by token. The final answer still
+arrives as the last artifact (partial=False), and partial events are not
+stored in the session.
+
+Usage (in the server file):
+    from a2a_streaming import streaming_executor_factory
+
+    app = to_a2a(product_catalog_agent, port=8001,
+                 agent_executor_factory=streaming_executor_factory)
+
+    # python benchmark_a2a.py stream --token-latency 0.05
+"""
+
+import uuid
+from typing import Dict, List, Tuple
+
+from a2a.types import Artifact, TaskArtifactUpdateEvent
+from google.adk.a2a.converters.event_converter import (
+    convert_event_to_a2a_events,
+    convert_event_to_a2a_message,
+)
+from google.adk.a2a.converters.request_converter import (
+    AgentRunRequest,
+    convert_a2a_request_to_agent_run_request,
+)
+from google.adk.a2a.executor.a2a_agent_executor import A2aAgentExecutor
+from google.adk.a2a.executor.config import A2aAgentExecutorConfig
+from google.adk.agents.run_config import StreamingMode
+from google.adk.runners import Runner
+
+
+def streaming_request_converter(request, part_converter) -> AgentRunRequest:
+    """The default A2A request conversion, with SSE streaming turned on."""
+    run_request = convert_a2a_request_to_agent_run_request(request, part_converter)
+    run_request.run_config.streaming_mode = StreamingMode.SSE
+    return run_request
+
+
+class StreamingEventConverter:
+    """
+    ADK event -> A2A events, sending partial events as artifact chunks.
+
+    Chunks of one model response share an artifact id: the first chunk
+    creates the artifact, later ones append to it, and the complete event
+    that follows them ends the stream for that agent.
+    """
+
+    def __init__(self):
+        self._artifacts: Dict[Tuple[str, str], str] = {}
+
+    def __call__(self, event, invocation_context, task_id=None, context_id=None,
+                 part_converter=None) -> List:
+        key = (event.invocation_id, event.author)
+        kwargs = {"part_converter": part_converter} if part_converter else {}
+        if not event.partial:
+            self._artifacts.pop(key, None)
+            return convert_event_to_a2a_events(
+                event, invocation_context, task_id, context_id, **kwargs
+            )
+
+        message = convert_event_to_a2a_message(event, invocation_context, **kwargs)
+        if message is None:
+            return []
+        append = key in self._artifacts
+        artifact_id = self._artifacts.setdefault(key, str(uuid.uuid4()))
+        return [
+            TaskArtifactUpdateEvent(
+                task_id=task_id,
+                context_id=context_id,
+                append=append,
+                last_chunk=False,
+                artifact=Artifact(artifact_id=artifact_id, parts=message.parts),
+            )
+        ]
+
+
+def streaming_executor_factory(runner: Runner) -> A2aAgentExecutor:
+    """agent_executor_factory for to_a2a() that streams partial responses."""
+    return A2aAgentExecutor(
+        runner=runner,
+        config=A2aAgentExecutorConfig(
+            request_converter=streaming_request_converter,
+            event_converter=StreamingEventConverter(),
+        ),
+    )
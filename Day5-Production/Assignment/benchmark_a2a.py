@@ -0,0 +1,729 @@
+"""
+Day 5a: A2A Benchmarks
+
+Runs against the product catalog server from day_5a_agent2agent_communication.py
+(start_product_catalog_server), started offline with catalog_model.CatalogModel
+so no API key or network is needed. Connections and agent-card downloads are
+counted from the server's access log (one client port = one TCP connection).
+
+Benchmarks:
+- pool: the same product question sent through
+  - a new RemoteA2aAgent per request (own HTTP client, card fetched each time)
+  - a new PooledRemoteA2aAgent per request (shared client, cached card)
+  - one long-lived RemoteA2aAgent
+  at each --concurrency level
+- stream: time until the customer sees the first words of the remote agent's
+  answer, and until the answer is complete, with the server streaming partial
+  responses (a2a_streaming.py) and without
+- workers: throughput of the server at each --workers count (a2a_launcher.py),
+  driven by --clients client processes so the client is not the bottleneck
+- batch: a comparison question about three products, answered by a catalog
+  agent that looks the products up one tool call at a time and by one with
+  the batched get_products_info tool
+- cache: a stream of product questions (a few popular ones, asked in
+  different words) against the server with and without the response cache
+  (a2a_response_cache.py), with the cache's hit/miss metrics
+- admission: A2A messages sent at a fixed --rate beyond what the server can
+  answer, for --duration seconds from --clients client IDs (one of them
+  noisy), against the server with and without admission control
+  (a2a_admission_control.py). Reports answered, 429, 503 and failed (timed
+  out or dropped) requests, and the latency percentiles of answered requests
+- catalog: build a catalog_index.CatalogIndex from a generated --skus catalog
+  (CSV and SQLite) and time exact, prefix, typo and unknown-product lookups
+- startup: the server's import time per package (python -X importtime), and
+  its cold start - launch until it serves requests - with the old `uvicorn` +
+  once-a-second polling startup and with a2a_launcher.py at each --workers
+  count, against a --target in seconds
+
+Usage:
+    python benchmark_a2a.py pool
+    python benchmark_a2a.py pool --requests 400 --concurrency 1 16 64 --model-latency 0.05
+    python benchmark_a2a.py stream --token-latency 0.05
+    python benchmark_a2a.py workers --workers 1 2 4 --clients 4
+    python benchmark_a2a.py batch --model-latency 0.2
+    python benchmark_a2a.py cache --requests 200 --concurrency 8
+    python benchmark_a2a.py admission --rate 100 --duration 20
+    python benchmark_a2a.py catalog --skus 100000
+    python benchmark_a2a.py startup --runs 5 --workers 1 4 --target 1.5
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import csv
+import multiprocessing
+import os
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import warnings
+from typing import Callable, Dict, List
+
+import httpx
+import numpy as np
+import requests
+
+# The course script exits at import time without an API key; the offline
+# server never calls Gemini
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+warnings.filterwarnings("ignore", category=UserWarning)  # ADK experimental-feature notices
+
+from google.adk.agents.remote_a2a_agent import AGENT_CARD_WELL_KNOWN_PATH, RemoteA2aAgent
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+import day_5a_agent2agent_communication as day_5a
+from a2a_client_pool import A2AConnectionPool
+from catalog_index import CatalogIndex, normalize
+
+CARD_URL = f"http://localhost:8001{AGENT_CARD_WELL_KNOWN_PATH}"
+QUESTION = "Can you tell me about the iPhone 15 Pro? Is it in stock?"
+COMPARISON = ("Can you compare the Dell XPS 15, the MacBook Pro 14 and the iPad Air "
+              "for me? Which of them are in stock?")
+ACCESS_LINE = re.compile(r':(\d+) - "(\w+) (\S+) HTTP')
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+# ============================================================================
+# Helpers
+# ============================================================================
+
+
+class AccessLog:
+    """Requests and client connections seen by the server since the last mark."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+
+    def mark(self) -> None:
+        self.offset = os.path.getsize(self.path)
+
+    def since_mark(self) -> Dict[str, int]:
+        with open(self.path, encoding="utf-8", errors="replace") as log:
+            log.seek(self.offset)
+            lines = ACCESS_LINE.findall(log.read())
+        return {
+            "connections": len({port for port, _, _ in lines}),
+            "requests": len(lines),
+            "card_fetches": sum(path == AGENT_CARD_WELL_KNOWN_PATH for _, _, path in lines),
+        }
+
+
+async def ask(agent, runner=None, question: str = QUESTION) -> int:
+    """
+    Send `question` through `agent` and wait for the final response.
+
+    Returns the number of tool calls the remote agent reported.
+    """
+    runner = runner or InMemoryRunner(agent=agent, app_name="benchmark_app")
+    session = await runner.session_service.create_session(
+        app_name=runner.app_name, user_id="benchmark_user"
+    )
+    message = types.Content(role="user", parts=[types.Part(text=question)])
+    answered = False
+    tool_calls = 0
+    async for event in runner.run_async(
+        user_id="benchmark_user", session_id=session.id, new_message=message
+    ):
+        answered = answered or (event.is_final_response() and event.content is not None)
+        tool_calls += len(event.get_function_calls())
+    if not answered:
+        raise RuntimeError("no final response from the remote agent")
+    return tool_calls
+
+
+async def measure(request: Callable, requests: int, concurrency: int) -> Dict[str, float]:
+    """Run `request()` `requests` times on `concurrency` workers."""
+    latencies: List[float] = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            await request()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+    p50, p95 = np.percentile(np.array(latencies) * 1000, [50, 95])
+    return {"seconds": seconds, "rps": requests / seconds, "p50": p50, "p95": p95,
+            "latencies": latencies}
+
+
+def _row(label: str, concurrency: int, result: Dict, counts: Dict) -> None:
+    print(f"{label:<30} {concurrency:>4} {result['rps']:>8.1f} {result['p50']:>8.1f} "
+          f"{result['p95']:>8.1f} {counts['connections']:>6} {counts['card_fetches']:>6}")
+
+
+async def time_to_text(agent, runner) -> Dict[str, float]:
+    """Seconds until the first user-visible text of the answer, and until the end."""
+    session = await runner.session_service.create_session(
+        app_name=runner.app_name, user_id="benchmark_user"
+    )
+    message = types.Content(role="user", parts=[types.Part(text=QUESTION)])
+    start = time.perf_counter()
+    first = None
+    async for event in runner.run_async(
+        user_id="benchmark_user",
+        session_id=session.id,
+        new_message=message,
+        run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+    ):
+        parts = event.content.parts if event.content and event.content.parts else []
+        if first is None and any(part.text and not part.thought for part in parts):
+            first = time.perf_counter() - start
+    return {"first": first, "total": time.perf_counter() - start}
+
+
+def start_server(model_latency: float, streaming: bool = True, token_latency: float = 0.0,
+                 workers: int = 1, batch_lookup: bool = True, response_cache: bool = False,
+                 admission_control: bool = False):
+    server = day_5a.start_product_catalog_server(
+        offline=True,
+        model_latency=model_latency,
+        streaming=streaming,
+        token_latency=token_latency,
+        workers=workers,
+        batch_lookup=batch_lookup,
+        response_cache=response_cache,
+        admission_control=admission_control,
+    )
+    if server.poll() is not None:
+        raise SystemExit(f"Server exited; see {day_5a.SERVER_LOG}")
+    return server
+
+
+def stop_server(server) -> None:
+    server.terminate()
+    server.wait()
+
+
+# ============================================================================
+# Benchmarks
+# ============================================================================
+
+
+async def bench_pool(requests: int, levels: List[int], card_max_age: float) -> None:
+    log = AccessLog(day_5a.SERVER_LOG)
+    pool = A2AConnectionPool(card_max_age=card_max_age)
+    shared_agent = RemoteA2aAgent(name="product_catalog_agent", agent_card=CARD_URL)
+    shared_runner = InMemoryRunner(agent=shared_agent, app_name="benchmark_app")
+
+    async def new_agent_per_request():
+        agent = RemoteA2aAgent(name="product_catalog_agent", agent_card=CARD_URL)
+        try:
+            await ask(agent)
+        finally:
+            await agent.cleanup()
+
+    async def pooled_agent_per_request():
+        await ask(pool.remote_agent("product_catalog_agent", CARD_URL))
+
+    async def long_lived_agent():
+        await ask(shared_agent, shared_runner)
+
+    variants = [
+        ("new RemoteA2aAgent / request", new_agent_per_request),
+        ("pooled agent / request", pooled_agent_per_request),
+        ("one long-lived RemoteA2aAgent", long_lived_agent),
+    ]
+    await ask(shared_agent, shared_runner)  # warm up server and imports
+
+    print(f"{requests} requests per run\n")
+    print(f"{'client':<30} {'conc':>4} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'conns':>6} {'cards':>6}")
+    print("-" * 76)
+    for concurrency in levels:
+        for label, request in variants:
+            log.mark()
+            result = await measure(request, requests, concurrency)
+            await asyncio.sleep(0.2)  # let the server flush its access log
+            _row(label, concurrency, result, log.since_mark())
+        print()
+    print(f"agent card cache: {pool.cards.stats}")
+    await pool.aclose()
+    await shared_agent.cleanup()
+
+
+async def bench_stream(requests: int) -> None:
+    pool = A2AConnectionPool()
+    agent = pool.remote_agent("product_catalog_agent", CARD_URL)
+    runner = InMemoryRunner(agent=agent, app_name="benchmark_app")
+    await time_to_text(agent, runner)  # warm up server and imports
+    results = [await time_to_text(agent, runner) for _ in range(requests)]
+    await pool.aclose()
+    first, total = (np.array([result[key] for result in results]) * 1000
+                    for key in ("first", "total"))
+    print(f"first text p50 {np.percentile(first, 50):7.1f} ms  p95 {np.percentile(first, 95):7.1f} ms   "
+          f"complete p50 {np.percentile(total, 50):7.1f} ms  p95 {np.percentile(total, 95):7.1f} ms")
+
+
+async def bench_batch(label: str, requests: int) -> None:
+    pool = A2AConnectionPool()
+    agent = pool.remote_agent("product_catalog_agent", CARD_URL)
+    runner = InMemoryRunner(agent=agent, app_name="benchmark_app")
+    tool_calls = await ask(agent, runner, COMPARISON)  # warm up server and imports
+    result = await measure(lambda: ask(agent, runner, COMPARISON), requests, 1)
+    await pool.aclose()
+    print(f"{label:<30} {tool_calls:>10} {result['p50']:>8.1f} {result['p95']:>8.1f}")
+
+
+def _load_client(start, results, requests: int, concurrency: int) -> None:
+    """One client process: warm up, wait for the others, then send `requests`."""
+
+    async def run():
+        pool = A2AConnectionPool()
+        agent = pool.remote_agent("product_catalog_agent", CARD_URL)
+        runner = InMemoryRunner(agent=agent, app_name="benchmark_app")
+        await ask(agent, runner)
+        start.wait()
+        result = await measure(lambda: ask(agent, runner), requests, concurrency)
+        await pool.aclose()
+        return result
+
+    results.put(asyncio.run(run()))
+
+
+def bench_workers(levels: List[int], clients: int, requests: int, concurrency: int,
+                  model_latency: float) -> None:
+    # Forked clients: this process has no event loop running
+    context = multiprocessing.get_context("fork")
+    print(f"{clients} client processes x {requests} requests, concurrency {concurrency} each "
+          f"({os.cpu_count()} CPU cores)\n")
+    print(f"{'workers':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    print("-" * 43)
+    for workers in levels:
+        with contextlib.redirect_stdout(io.StringIO()):  # keep the table together
+            server = start_server(model_latency, workers=workers)
+        try:
+            start = context.Barrier(clients)
+            results = context.Queue()
+            processes = [
+                context.Process(target=_load_client, args=(start, results, requests, concurrency))
+                for _ in range(clients)
+            ]
+            for process in processes:
+                process.start()
+            runs = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+        finally:
+            stop_server(server)
+        seconds = max(run["seconds"] for run in runs)
+        latencies = np.array([latency for run in runs for latency in run["latencies"]]) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"{workers:>7} {len(latencies) / seconds:>8.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+
+
+PHRASINGS = [
+    "Can you tell me about the {}? Is it in stock?",
+    "can you tell me about the {} - is it in stock",
+    "Tell me about the {}, is it in stock please?",
+]
+
+
+async def bench_cache(label: str, requests: int, concurrency: int) -> None:
+    # Popular products are asked about more often (Zipf-like)
+    rng = random.Random(0)
+    products = ["iPhone 15 Pro", "Samsung Galaxy S24", "Dell XPS 15", "MacBook Pro 14",
+                "Sony WH-1000XM5", "iPad Air", "LG UltraWide 34"]
+    questions = iter([
+        rng.choice(PHRASINGS).format(
+            rng.choices(products, weights=[1 / rank for rank in range(1, len(products) + 1)])[0]
+        )
+        for _ in range(requests)
+    ])
+    pool = A2AConnectionPool()
+    agent = pool.remote_agent("product_catalog_agent", CARD_URL)
+    runner = InMemoryRunner(agent=agent, app_name="benchmark_app")
+    await ask(agent, runner, "Hello")  # warm up server and imports
+    result = await measure(lambda: ask(agent, runner, next(questions)), requests, concurrency)
+    await pool.aclose()
+    print(f"{label:<24} {result['rps']:>8.1f} {result['p50']:>8.1f} {result['p95']:>8.1f}")
+    response = httpx.get("http://localhost:8001/cache/metrics")
+    if response.status_code == 200:
+        metrics = response.json()
+        print(f"  cache: {metrics['hits']} hits ({metrics['exact_hits']} exact, "
+              f"{metrics['semantic_hits']} semantic, {metrics['shared_runs']} shared runs), "
+              f"{metrics['misses']} misses, hit rate {metrics['hit_rate']:.0%}")
+
+
+def _send_message(text: str) -> Dict:
+    """An A2A SendMessage JSON-RPC request."""
+    return {
+        "jsonrpc": "2.0",
+        "id": uuid.uuid4().hex,
+        "method": "SendMessage",
+        "params": {"message": {"messageId": uuid.uuid4().hex, "role": "ROLE_USER",
+                               "parts": [{"text": text}]}},
+    }
+
+
+async def bench_admission(label: str, rate: float, duration: float, clients: int) -> None:
+    # Requests arrive at a fixed rate whether or not earlier ones were answered
+    # (an open loop, like independent users), spread over `clients` client IDs.
+    # client-0 is a noisy client sending a quarter of all requests. Plain
+    # JSON-RPC over httpx: ADK client runners would use up the CPU the server
+    # needs on small machines
+    answered: List[float] = []
+    rejected: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def send(http: httpx.AsyncClient, client_id: str):
+        start = time.perf_counter()
+        try:
+            response = await http.post(
+                "http://localhost:8001/",
+                headers={"A2A-Version": "1.0", "X-Client-Id": client_id},
+                json=_send_message(QUESTION),
+            )
+            status = str(response.status_code)
+        except httpx.TransportError:  # timed out, or the connection was dropped
+            status = "failed"
+        statuses[status] = statuses.get(status, 0) + 1
+        (answered if status == "200" else rejected).append(time.perf_counter() - start)
+
+    async with httpx.AsyncClient(timeout=30, limits=httpx.Limits(max_connections=None)) as http:
+        await http.post("http://localhost:8001/", headers={"A2A-Version": "1.0"},
+                        json=_send_message("Hello"))  # warm up
+        start = time.perf_counter()
+        tasks = []
+        for i in range(int(rate * duration)):
+            await asyncio.sleep(max(0.0, start + i / rate - time.perf_counter()))
+            client_id = "client-0" if i % 4 == 0 else f"client-{1 + i % (clients - 1)}"
+            tasks.append(asyncio.create_task(send(http, client_id)))
+        await asyncio.gather(*tasks)
+        seconds = time.perf_counter() - start
+        metrics = await http.get("http://localhost:8001/admission/metrics")
+
+    p50, p95, p99, worst = (np.percentile(np.array(answered) * 1000, [50, 95, 99, 100])
+                            if answered else [float("nan")] * 4)
+    print(f"{label:<18} {statuses.get('200', 0):>6} {statuses.get('429', 0):>5} "
+          f"{statuses.get('503', 0):>5} {statuses.get('failed', 0):>6} "
+          f"{len(answered) / seconds:>6.1f} {p50:>7.0f} {p95:>7.0f} {p99:>7.0f} {worst:>7.0f}")
+    if rejected:
+        print(f"  rejections answered in p99 {np.percentile(rejected, 99) * 1000:.0f} ms")
+    if metrics.status_code == 200:
+        metrics = metrics.json()
+        print(f"  admission: {metrics['admitted']} admitted ({metrics['queued']} queued), "
+              f"{metrics['rate_limited']} rate limited, {metrics['shed']} shed, "
+              f"{metrics['timed_out']} timed out in the queue")
+
+
+BRANDS = ["Apple", "Samsung", "Dell", "Lenovo", "HP", "Asus", "Acer", "Sony", "LG", "Google",
+          "Microsoft", "Xiaomi", "Huawei", "OnePlus", "Bose", "Logitech", "Razer", "Canon",
+          "Nikon", "Philips", "Panasonic", "Garmin", "Fitbit", "Anker", "JBL"]
+LINES = ["Galaxy", "ThinkPad", "Inspiron", "Pavilion", "ZenBook", "Aspire", "Bravia", "Pixel",
+         "Surface", "Redmi", "MateBook", "Nord", "QuietComfort", "MX Master", "Blade", "EOS",
+         "Coolpix", "Hue", "Lumix", "Forerunner", "Charge", "Soundcore", "Flip", "UltraWide",
+         "Vostro", "IdeaPad", "Envy", "Chromebook", "Predator", "Alpha", "Xperia", "Watch"]
+SUFFIXES = ["", "Pro", "Max", "Mini", "Ultra", "Plus", "Air", "Lite", "Pro Max", "SE"]
+COLORS = ["Black", "White", "Silver", "Graphite", "Midnight Blue", "Rose Gold", "Titanium"]
+
+
+def _catalog_rows(skus: int, seed: int = 0) -> List[Dict[str, str]]:
+    """A synthetic catalog: brand, product line, model number, variant, color."""
+    rng = random.Random(seed)
+    rows = []
+    for number in range(skus):
+        name = " ".join(part for part in (
+            rng.choice(BRANDS), rng.choice(LINES), str(rng.randint(1, 9999)),
+            rng.choice(SUFFIXES), rng.choice(COLORS),
+        ) if part)
+        stock = rng.randint(0, 80)
+        rows.append({
+            "sku": f"SKU-{number:06d}",
+            "name": name,
+            "price": f"${rng.randint(19, 2999)}",
+            "availability": f"In Stock ({stock} units)" if stock else "Out of Stock",
+            "specs": "; ".join(rng.sample(["128GB", "256GB", "16GB RAM", "OLED", "Wi-Fi 7",
+                                           "USB-C", "Bluetooth 5.3", "4K"], 2)),
+        })
+    return rows
+
+
+def _typo(name: str, rng: random.Random) -> str:
+    """`name` with one letter of its longest word dropped, doubled or swapped."""
+    words = name.split()
+    i = max(range(len(words)), key=lambda k: len(words[k]) if words[k].isalpha() else 0)
+    word = words[i]
+    at = rng.randrange(1, len(word) - 1)
+    words[i] = rng.choice([
+        word[:at] + word[at + 1:],
+        word[:at] + word[at] + word[at:],
+        word[:at - 1] + word[at] + word[at - 1] + word[at + 1:],
+    ])
+    return " ".join(words)
+
+
+def bench_catalog(skus: int, queries: int) -> None:
+    rows = _catalog_rows(skus)
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "catalog.csv")
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        db_path = os.path.join(directory, "catalog.db")
+        connection = sqlite3.connect(db_path)
+        connection.execute("CREATE TABLE products (sku TEXT, name TEXT, price TEXT, "
+                           "availability TEXT, specs TEXT)")
+        connection.executemany("INSERT INTO products VALUES (:sku, :name, :price, :availability, :specs)",
+                               rows)
+        connection.commit()
+        connection.close()
+
+        print(f"{skus} SKUs\n")
+        for label, path in (("CSV", csv_path), ("SQLite", db_path)):
+            start = time.perf_counter()
+            index = CatalogIndex.load(path)
+            print(f"load + index from {label:<7} {time.perf_counter() - start:6.2f} s")
+
+    rng = random.Random(1)
+    sample = rng.sample(rows, queries)
+    kinds = {
+        "exact name (get)": (index.get, [row["name"].upper() for row in sample]),
+        "SKU (get)": (index.get, [row["sku"].lower() for row in sample]),
+        "exact name (search)": (index.search, [row["name"] for row in sample]),
+        "prefix (search)": (index.search, [row["name"][:len(row["name"]) * 2 // 3]
+                                           for row in sample]),
+        "typo (search)": (index.search, [_typo(row["name"], rng) for row in sample]),
+        "unknown (search)": (index.search, [f"Zorblax {rng.randint(1, 99)} Quantum"
+                                            for _ in sample]),
+    }
+    expected = [row["name"] for row in sample]
+    print(f"\n{'query':<22} {'p50 us':>8} {'p99 us':>8} {'top-3 hit':>10}")
+    print("-" * 51)
+    for label, (find, texts) in kinds.items():
+        latencies = []
+        hits = 0
+        for text, name in zip(texts, expected):
+            start = time.perf_counter()
+            found = find(text)
+            latencies.append(time.perf_counter() - start)
+            names = [found.name] if hasattr(found, "name") else [p.name for p, _ in found or []]
+            # Names repeat across SKUs: compare normalized names
+            hits += normalize(name) in [normalize(n) for n in names[:3]]
+        p50, p99 = np.percentile(np.array(latencies) * 1e6, [50, 99])
+        hit_rate = "-" if label.startswith("unknown") else f"{hits / len(texts):.0%}"
+        print(f"{label:<22} {p50:>8.0f} {p99:>8.0f} {hit_rate:>10}")
+
+
+def _package(module: str) -> str:
+    """Group modules the way their cost is discussed: google.adk.<subsystem>."""
+    parts = module.split(".")
+    depth = 3 if parts[:2] == ["google", "adk"] else 2 if parts[0] == "google" else 1
+    return ".".join(parts[:depth])
+
+
+def bench_import_profile(server_file: str, top: int) -> None:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         f"import {os.path.splitext(os.path.basename(server_file))[0]}"],
+        cwd=os.path.dirname(server_file),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr[-2000:])
+    self_us: Dict[str, int] = {}
+    total_us = 0
+    for self_time, cumulative, indent, module in IMPORT_TIME_LINE.findall(result.stderr):
+        self_us[_package(module)] = self_us.get(_package(module), 0) + int(self_time)
+        if not indent:
+            total_us += int(cumulative)  # top-level imports include everything below them
+    print(f"Import profile of {server_file}: {total_us / 1000:.0f} ms in total\n")
+    print(f"{'package':<40} {'self ms':>8} {'share':>6}")
+    print("-" * 56)
+    for package, us in sorted(self_us.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<40} {us / 1000:>8.1f} {us / total_us:>6.1%}")
+
+
+def _start_polling_baseline(app_dir: str):
+    """start_product_catalog_server before a2a_launcher.py: uvicorn + polling."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "product_catalog_server:app",
+         "--host", "localhost", "--port", "8001"],
+        cwd=app_dir,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.STDOUT,
+    )
+    for _ in range(30):
+        try:
+            if requests.get(CARD_URL, timeout=1).status_code == 200:
+                return process
+        except requests.exceptions.RequestException:
+            time.sleep(1)
+    stop_server(process)
+    raise SystemExit("Baseline server did not start")
+
+
+def bench_cold_start(server_file: str, runs: int, levels: List[int], target: float) -> None:
+    variants: List = [("uvicorn + 1 s polling", lambda: _start_polling_baseline(
+        os.path.dirname(server_file)))]
+    for workers in levels:
+        variants.append((f"a2a_launcher, {workers} worker(s)",
+                         lambda workers=workers: start_server(0.0, workers=workers)))
+
+    print(f"\nCold start: launch until the agent card is served, {runs} runs each "
+          f"({os.cpu_count()} CPU cores)\n")
+    print(f"{'startup':<30} {'p50 s':>7} {'max s':>7} {'target':>7}")
+    print("-" * 54)
+    for label, start in variants:
+        seconds = []
+        for _ in range(runs):
+            began = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                server = start()
+            try:
+                requests.get(CARD_URL, timeout=5).raise_for_status()
+                seconds.append(time.perf_counter() - began)
+            finally:
+                stop_server(server)
+        p50 = float(np.percentile(seconds, 50))
+        print(f"{label:<30} {p50:>7.2f} {max(seconds):>7.2f} "
+              f"{'met' if p50 <= target else 'missed':>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="A2A benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    pool_parser = subparsers.add_parser("pool", help="Shared connection pool vs per-agent clients")
+    pool_parser.add_argument("--requests", type=int, default=200)
+    pool_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    pool_parser.add_argument("--model-latency", type=float, default=0.0,
+                             help="Simulated seconds per model call on the server")
+    pool_parser.add_argument("--card-max-age", type=float, default=300.0)
+
+    stream_parser = subparsers.add_parser("stream", help="Time to first token with and without streaming")
+    stream_parser.add_argument("--requests", type=int, default=20)
+    stream_parser.add_argument("--model-latency", type=float, default=0.2,
+                               help="Simulated seconds per model call on the server")
+    stream_parser.add_argument("--token-latency", type=float, default=0.05,
+                               help="Simulated seconds between streamed chunks")
+
+    workers_parser = subparsers.add_parser("workers", help="Throughput by server worker count")
+    workers_parser.add_argument("--workers", type=int, nargs="+",
+                                default=sorted({1, 2, os.cpu_count() or 1}))
+    workers_parser.add_argument("--clients", type=int, default=os.cpu_count() or 1,
+                                help="Client processes sending requests")
+    workers_parser.add_argument("--requests", type=int, default=100,
+                                help="Requests per client process")
+    workers_parser.add_argument("--concurrency", type=int, default=8,
+                                help="Concurrent requests per client process")
+    workers_parser.add_argument("--model-latency", type=float, default=0.0,
+                                help="Simulated seconds per model call on the server")
+
+    batch_parser = subparsers.add_parser("batch", help="Comparison question with and without batched lookups")
+    batch_parser.add_argument("--requests", type=int, default=20)
+    batch_parser.add_argument("--model-latency", type=float, default=0.2,
+                              help="Simulated seconds per model call on the server")
+
+    cache_parser = subparsers.add_parser("cache", help="Repeated questions with and without the response cache")
+    cache_parser.add_argument("--requests", type=int, default=200)
+    cache_parser.add_argument("--concurrency", type=int, default=8)
+    cache_parser.add_argument("--model-latency", type=float, default=0.2,
+                              help="Simulated seconds per model call on the server")
+
+    admission_parser = subparsers.add_parser("admission", help="Overload with and without admission control")
+    admission_parser.add_argument("--rate", type=float, default=100.0,
+                                  help="Requests per second sent to the server")
+    admission_parser.add_argument("--duration", type=float, default=20.0,
+                                  help="Seconds each run sends requests")
+    admission_parser.add_argument("--clients", type=int, default=16,
+                                  help="Client IDs the requests are spread over")
+    admission_parser.add_argument("--model-latency", type=float, default=0.2,
+                                  help="Simulated seconds per model call on the server")
+
+    catalog_parser = subparsers.add_parser("catalog", help="Catalog index load and lookup times")
+    catalog_parser.add_argument("--skus", type=int, default=100_000)
+    catalog_parser.add_argument("--queries", type=int, default=1000,
+                                help="Queries of each kind")
+
+    startup_parser = subparsers.add_parser("startup", help="Import profile and cold start time")
+    startup_parser.add_argument("--runs", type=int, default=5)
+    startup_parser.add_argument("--workers", type=int, nargs="+",
+                                default=sorted({1, os.cpu_count() or 1}))
+    startup_parser.add_argument("--top", type=int, default=15,
+                                help="Packages to list in the import profile")
+    startup_parser.add_argument("--target", type=float, default=1.5,
+                                help="Cold start target in seconds (p50)")
+    args = parser.parse_args()
+
+    if args.benchmark == "cache":
+        print(f"{args.requests} product questions, concurrency {args.concurrency}\n")
+        print(f"{'server':<24} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        print("-" * 51)
+        for response_cache in (False, True):
+            with contextlib.redirect_stdout(io.StringIO()):  # keep the table together
+                server = start_server(args.model_latency, response_cache=response_cache)
+            try:
+                label = "response cache" if response_cache else "no cache"
+                asyncio.run(bench_cache(label, args.requests, args.concurrency))
+            finally:
+                stop_server(server)
+    elif args.benchmark == "admission":
+        print(f"{args.rate:.0f} requests/s for {args.duration:.0f} s from {args.clients} clients "
+              f"(one sends 1/4 of them); latency of answered requests\n")
+        print(f"{'server':<18} {'200':>6} {'429':>5} {'503':>5} {'failed':>6} {'ok/s':>6} "
+              f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'max ms':>7}")
+        print("-" * 80)
+        # Every client runs on localhost: let the server tell them apart by X-Client-Id
+        os.environ["A2A_TRUST_CLIENT_HEADER"] = "1"
+        for admission_control in (False, True):
+            with contextlib.redirect_stdout(io.StringIO()):  # keep the table together
+                server = start_server(args.model_latency, admission_control=admission_control)
+            try:
+                label = "admission control" if admission_control else "unlimited"
+                asyncio.run(bench_admission(label, args.rate, args.duration, args.clients))
+            finally:
+                stop_server(server)
+    elif args.benchmark == "catalog":
+        bench_catalog(args.skus, args.queries)
+    elif args.benchmark == "startup":
+        server_file = day_5a.create_product_catalog_server_file(offline=True)
+        bench_import_profile(server_file, args.top)
+        bench_cold_start(server_file, args.runs, args.workers, args.target)
+    elif args.benchmark == "workers":
+        bench_workers(args.workers, args.clients, args.requests, args.concurrency,
+                      args.model_latency)
+    elif args.benchmark == "pool":
+        server = start_server(args.model_latency)
+        try:
+            asyncio.run(bench_pool(args.requests, args.concurrency, args.card_max_age))
+        finally:
+            stop_server(server)
+    elif args.benchmark == "batch":
+        print(f"{args.requests} comparison questions (3 products), one at a time\n")
+        print(f"{'catalog agent tools':<30} {'tool calls':>10} {'p50 ms':>8} {'p95 ms':>8}")
+        print("-" * 59)
+        for batch_lookup in (False, True):
+            with contextlib.redirect_stdout(io.StringIO()):  # keep the table together
+                server = start_server(args.model_latency, batch_lookup=batch_lookup)
+            try:
+                label = "get_products_info (batched)" if batch_lookup else "get_product_info per product"
+                asyncio.run(bench_batch(label, args.requests))
+            finally:
+                stop_server(server)
+    elif args.benchmark == "stream":
+        for streaming in (False, True):
+            server = start_server(args.model_latency, streaming, args.token_latency)
+            try:
+                print(f"\n{'streaming' if streaming else 'not streaming'} server, "
+                      f"{args.requests} requests")
+                asyncio.run(bench_stream(args.requests))
+            finally:
+                stop_server(server)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Day 5a: Product Catalog Index
+
+get_product_info used to find products with an exact lowercase dictionary key
+("iphone 15 pro"). Anything else - "iPhone 15", "iphne 15 pro", a SKU - got the
+whole list of available products back, which costs tokens and makes the model
+retry with other spellings.
+
+CatalogIndex finds products the way a search box does:
+
+- names are normalized to tokens (case, accents, punctuation and full-width
+  characters ignored, letters and digits split), so "Sony WH-1000XM5",
+  "sony wh 1000xm5" and "Sony WH1000XM5" are the same product, and SKUs match
+  exactly
+- prefix search over the sorted token vocabulary (a flattened trie: all tokens
+  with a prefix are one contiguous range), so "macb pro" finds "MacBook Pro"
+- edit-distance search for typos in words ("iphne", "samsng"), using a
+  symmetric-delete index: a word of 4-7 letters may have 1 edit, longer
+  words 2
+- ranked suggestions: each product scores by how well the query tokens match
+  its name (exact > prefix > typo), with rare tokens weighing more (IDF), and
+  names with fewer unmatched tokens first
+
+Catalogs load from a dict of description strings (the course's
+PRODUCT_CATALOG), a CSV file or a SQLite table with the columns
+sku, name, price, availability, specs (specs separated by "; ").
+
+Usage:
+    from catalog_index import CatalogIndex
+
+    index = CatalogIndex.load("catalog.csv")        # or catalog.db / .sqlite
+    index.get("iphone 15 pro")                      # exact name or SKU, or None
+    index.search("iphne 15", limit=3)               # [(Product, score), ...]
+    index.lookup("iphne 15 pro")                    # get(), or a confident match
+
+    # python benchmark_a2a.py catalog --skus 100000
+"""
+
+import bisect
+import csv
+import heapq
+import itertools
+import math
+import re
+import sqlite3
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[^\W\d_]+|\d+")
+_COLUMNS = ("sku", "name", "price", "availability", "specs")
+
+# Similarity of a query token to a name token
+EXACT = 1.0
+PREFIX = 0.8
+TYPO = (1.0, 0.7, 0.5)  # by edit distance
+MAX_PREFIX_EXPANSIONS = 256
+# lookup() accepts the best search result when it scores at least this much
+# and clearly beats the runner-up
+CONFIDENT_SCORE = 0.75
+CONFIDENT_MARGIN = 0.1
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercase tokens without accents: "Café WH-1000XM5" -> ["cafe", "wh", "1000", "xm", "5"]."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _TOKEN_RE.findall(text)
+
+
+def _max_edits(token: str) -> int:
+    if not token.isalpha() or len(token) < 4:
+        return 0
+    return 1 if len(token) < 8 else 2
+
+
+def _deletes(token: str, edits: int) -> Set[str]:
+    """`token` with up to `edits` characters removed."""
+    variants = {token}
+    frontier = {token}
+    for _ in range(edits):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (transpositions count once), or limit + 1."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class Product:
+    """One catalog entry."""
+
+    __slots__ = _COLUMNS
+
+    def __init__(self, sku: str, name: str, price: str, availability: str,
+                 specs: Iterable[str] = ()):
+        self.sku = sku
+        self.name = name
+        self.price = price
+        self.availability = availability
+        self.specs = list(specs)
+
+    @classmethod
+    def from_description(cls, sku: str, description: str) -> "Product":
+        """Product from "Name, $price, availability, spec, spec, ..."."""
+        name, price, availability, *specs = description.split(", ")
+        return cls(sku, name, price, availability, specs)
+
+    def to_dict(self) -> Dict:
+        return {column: getattr(self, column) for column in _COLUMNS}
+
+    def __str__(self) -> str:
+        return ", ".join([self.name, self.price, self.availability, *self.specs])
+
+    def __repr__(self) -> str:
+        return f"Product({self.sku!r}, {self.name!r})"
+
+
+class CatalogIndex:
+    """Exact, prefix and typo-tolerant product search over a catalog."""
+
+    def __init__(self, products: Iterable[Product]):
+        self.products: List[Product] = []
+        self._tokens: List[Tuple[str, ...]] = []
+        self._exact: Dict[str, int] = {}  # normalized name / SKU -> product
+        self._postings: Dict[str, Set[int]] = {}  # token -> products containing it
+        for product in products:
+            self._add(product)
+        self._vocabulary = sorted(self._postings)
+        self._idf = {
+            token: math.log(1 + len(self.products) / len(ids))
+            for token, ids in self._postings.items()
+        }
+        self._max_idf = math.log(1 + len(self.products))
+        self._typos: Dict[str, List[str]] = {}  # deleted variant -> tokens
+        for token in self._vocabulary:
+            for variant in _deletes(token, _max_edits(token)):
+                self._typos.setdefault(variant, []).append(token)
+
+    def _add(self, product: Product) -> None:
+        product_id = len(self.products)
+        tokens = normalize(product.name) or normalize(product.sku)
+        self.products.append(product)
+        self._tokens.append(tuple(dict.fromkeys(tokens)))
+        for key in (" ".join(tokens), "".join(tokens), " ".join(normalize(product.sku))):
+            self._exact.setdefault(key, product_id)
+        for token in tokens:
+            self._postings.setdefault(token, set()).add(product_id)
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    # ------------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------------
+
+    @classmethod
+    def from_descriptions(cls, catalog: Dict[str, str]) -> "CatalogIndex":
+        """Index a {key: "Name, $price, availability, specs..."} dict."""
+        return cls(Product.from_description(key, description) for key, description in catalog.items())
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, str]]) -> "CatalogIndex":
+        return cls(
+            Product(row["sku"], row["name"], row["price"], row["availability"],
+                    [spec for spec in (row.get("specs") or "").split("; ") if spec])
+            for row in rows
+        )
+
+    @classmethod
+    def from_csv(cls, path: str) -> "CatalogIndex":
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls.from_rows(csv.DictReader(f))
+
+    @classmethod
+    def from_sqlite(cls, path: str, table: str = "products") -> "CatalogIndex":
+        connection = sqlite3.connect(path)
+        connection.row_factory = sqlite3.Row
+        try:
+            rows = connection.execute(f"SELECT {', '.join(_COLUMNS)} FROM {table}")
+            return cls.from_rows(dict(row) for row in rows)
+        finally:
+            connection.close()
+
+    @classmethod
+    def load(cls, path: str) -> "CatalogIndex":
+        """Load a .csv file or a SQLite database (.db, .sqlite, .sqlite3)."""
+        if path.endswith(".csv"):
+            return cls.from_csv(path)
+        if path.endswith((".db", ".sqlite", ".sqlite3")):
+            return cls.from_sqlite(path)
+        raise ValueError(f"Unsupported catalog file: {path} (expected .csv or a SQLite .db)")
+
+    # ------------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------------
+
+    def get(self, query: str) -> Optional[Product]:
+        """The product whose normalized name or SKU is exactly `query`."""
+        tokens = normalize(query)
+        product_id = self._exact.get(" ".join(tokens))
+        if product_id is None:
+            product_id = self._exact.get("".join(tokens))
+        return None if product_id is None else self.products[product_id]
+
+    def name_tokens(self, text: str) -> frozenset:
+        """The normalized tokens of `text` that occur in product names or SKUs."""
+        return frozenset(token for token in normalize(text) if token in self._postings)
+
+    def _expand(self, token: str, last: bool) -> Dict[str, float]:
+        """
+        Vocabulary tokens that `token` may stand for, with their similarity.
+
+        Prefixes are only expanded for tokens that are not words of the
+        catalog, or for the last one (the user may still be typing it).
+        """
+        matches: Dict[str, float] = {}
+        known = token in self._postings
+        edits = 0 if known else _max_edits(token)
+        if edits:
+            for variant in _deletes(token, edits):
+                for candidate in self._typos.get(variant, ()):
+                    if candidate not in matches:
+                        distance = edit_distance(token, candidate, edits)
+                        if distance <= edits:
+                            matches[candidate] = TYPO[distance]
+        if last or not known:
+            start = bisect.bisect_left(self._vocabulary, token)
+            for candidate in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+                if not candidate.startswith(token):
+                    break
+                if candidate != token:
+                    matches[candidate] = max(matches.get(candidate, 0.0), PREFIX)
+        if known:
+            matches[token] = EXACT
+        return matches
+
+    def _narrow(self, matched: List[Tuple[float, Dict[str, float]]]) -> Set[int]:
+        """
+        Products matching as many query tokens as possible: start from the most
+        selective token and keep those that also match the next one, skipping
+        tokens no remaining product matches.
+        """
+        by_size = sorted(
+            ((sum(len(self._postings[token]) for token in matches), matches)
+             for _, matches in matched),
+            key=lambda item: item[0],
+        )
+        candidates: Optional[Set[int]] = None
+        for size, matches in by_size:
+            if len(matches) == 1:
+                matching = self._postings[next(iter(matches))]
+                narrowed = matching if candidates is None else candidates & matching
+            elif candidates is not None and len(candidates) * 25 < size:
+                # Checking a few candidates beats building a large union
+                narrowed = {
+                    product_id for product_id in candidates
+                    if not matches.keys().isdisjoint(self._tokens[product_id])
+                }
+            else:
+                matching = set().union(*(self._postings[token] for token in matches))
+                narrowed = matching if candidates is None else candidates & matching
+            if narrowed:
+                candidates = narrowed
+        return candidates or set()
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[Product, float]]:
+        """Best matches for `query`, with scores from 0 to 1, best first."""
+        tokens = normalize(query)
+        matched = []  # (weight, matches) per query token found in the catalog
+        total_weight = 0.0
+        for position, token in enumerate(tokens):
+            matches = self._expand(token, last=position == len(tokens) - 1)
+            # Unknown tokens weigh as much as the rarest ones
+            weight = self._idf.get(token) or max(
+                (self._idf[t] for t in matches), default=self._max_idf
+            )
+            total_weight += weight
+            if matches:
+                matched.append((weight, matches))
+        if not matched:
+            return []
+        candidates = self._narrow(matched)
+
+        zeros = itertools.repeat(0.0)
+        every_match = set().union(*(matches for _, matches in matched))
+        scored = []
+        for product_id in candidates:
+            name_tokens = self._tokens[product_id]
+            score = sum(weight * max(map(matches.get, name_tokens, zeros))
+                        for weight, matches in matched)
+            # Prefer names without extra, unmatched tokens ("iPhone 15 Pro" over
+            # "iPhone 15 Pro Max" for "iphone 15 pro")
+            coverage = len(every_match.intersection(name_tokens)) / len(name_tokens)
+            scored.append((score / total_weight * (0.8 + 0.2 * coverage), -product_id))
+        return [
+            (self.products[-negative_id], round(score, 3))
+            for score, negative_id in heapq.nlargest(limit, scored)
+        ]
+
+    def lookup(self, query: str) -> Optional[Product]:
+        """get(), or the best search result if it is a confident match."""
+        product = self.get(query)
+        if product is not None:
+            return product
+        results = self.search(query, limit=2)
+        if not results or results[0][1] < CONFIDENT_SCORE:
+            return None
+        if len(results) > 1 and results[0][1] - results[1][1] < CONFIDENT_MARGIN:
+            return None
+        return results[0][0]
@@ -0,0 +1,146 @@
+"""
+Day 5a: Offline Model for the Product Catalog Agent
+
+A deterministic stand-in for Gemini so the A2A product catalog server can run
+without an API key or network - used by the A2A benchmarks.
+
+For every user message CatalogModel:
+1. finds the known product names mentioned in the message
+2. looks them up: with one get_products_info call when the agent has that
+   tool and more than one product is mentioned, otherwise with one
+   get_product_info call per product (one model response per call)
+3. answers with the tool results
+
+It sleeps `latency` seconds per response to simulate model round-trips and
+fills usage_metadata with token estimates. Answers take `token_latency`
+seconds per chunk of a few words to "generate"; with stream=True (RunConfig
+streaming_mode=SSE) the chunks arrive as they are generated, like Gemini's
+SSE stream, followed by the complete response.
+
+Usage:
+    from catalog_model import CatalogModel
+
+    agent = LlmAgent(name="product_catalog_agent", model=CatalogModel(latency=0.2),
+                     tools=[get_product_info])
+"""
+
+import asyncio
+from typing import AsyncGenerator, Dict, List
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+PRODUCT_NAMES = [
+    "iphone 15 pro",
+    "samsung galaxy s24",
+    "dell xps 15",
+    "macbook pro 14",
+    "sony wh-1000xm5",
+    "ipad air",
+    "lg ultrawide 34",
+]
+BATCH_TOOL = "get_products_info"
+
+
+def _result_lines(response: Dict) -> List[str]:
+    """Answer lines for one tool result."""
+    if "products" not in response:
+        return [str(response.get("result", ""))]
+    lines = []
+    for product in response["products"]:
+        if product["found"]:
+            fields = [product["name"], product["price"], product["availability"], *product["specs"]]
+            lines.append("Product: " + ", ".join(fields))
+        else:
+            lines.append(f"Sorry, I don't have information for {product['query']}.")
+    return lines
+
+
+def _estimate_tokens(text: str) -> int:
+    """~4 characters per token."""
+    return max(1, len(text) // 4)
+
+
+class CatalogModel(BaseLlm):
+    """BaseLlm that looks up the products mentioned, then reports the results."""
+
+    model: str = "catalog-model"
+    products: List[str] = PRODUCT_NAMES
+    latency: float = 0.0
+    token_latency: float = 0.0
+    chunk_words: int = 3
+
+    def _turn(self, llm_request: LlmRequest):
+        """The last user text and the tool results since then."""
+        results = []
+        for content in reversed(llm_request.contents):
+            parts = content.parts or []
+            responses = [part.function_response for part in parts if part.function_response]
+            if responses:
+                results[:0] = [response.response for response in responses]
+            elif content.role == "user" and any(part.text for part in parts):
+                return " ".join(part.text for part in parts if part.text), results
+        return "", results
+
+    def _usage(self, llm_request: LlmRequest, output_text: str):
+        prompt_text = " ".join(
+            part.text or ""
+            for content in llm_request.contents
+            for part in content.parts or []
+        )
+        prompt_tokens = _estimate_tokens(prompt_text)
+        output_tokens = _estimate_tokens(output_text)
+        return types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens,
+        )
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        text, results = self._turn(llm_request)
+        lowered = text.lower()
+        mentioned = [name for name in self.products if name in lowered]
+        batch = len(mentioned) > 1 and BATCH_TOOL in llm_request.tools_dict
+        if batch and not results:
+            call = types.FunctionCall(name=BATCH_TOOL, args={"product_names": mentioned})
+        elif not batch and len(results) < len(mentioned):
+            call = types.FunctionCall(
+                name="get_product_info", args={"product_name": mentioned[len(results)]}
+            )
+        else:
+            call = None
+        if call:
+            yield LlmResponse(
+                content=types.Content(role="model", parts=[types.Part(function_call=call)]),
+                usage_metadata=self._usage(llm_request, str(call.args)),
+            )
+            return
+
+        lines = [line for result in results for line in _result_lines(result)]
+        answer = "\n".join(lines) or (
+            "I can help with: " + ", ".join(name.title() for name in self.products)
+        )
+        words = answer.split(" ")
+        for start in range(0, len(words), self.chunk_words):
+            # Generating takes as long either way; streaming shows it sooner
+            if stream:
+                chunk = " ".join(words[start:start + self.chunk_words])
+                if start + self.chunk_words < len(words):
+                    chunk += " "
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=chunk)]),
+                    partial=True,
+                )
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=answer)]),
+            usage_metadata=self._usage(llm_request, answer),
+        )
@@ -14,8 +14,6 @@
 
 import os
 import json
-import time
-import subprocess
 import requests
 import uuid
 from dotenv import load_dotenv
@@ -26,11 +24,15 @@ from google.adk.agents.remote_a2a_agent import (
     AGENT_CARD_WELL_KNOWN_PATH,
 )
 from google.adk.a2a.utils.agent_to_a2a import to_a2a
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.models.lite_llm import LiteLlm
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
 
+from a2a_client_pool import get_default_pool
+from a2a_launcher import ServerStartError, start_server
+
 # ============================================================================
 # 设置和配置
 # ============================================================================
@@ -47,6 +49,8 @@ if not os.getenv("DOUBAO_API_KEY"):
 print("✅ ADK 组件导入成功。")
 print("✅ API 密钥已从 .env 文件加载")
 
+SERVER_LOG = "/tmp/product_catalog_server.log"
+
 # ============================================================================
 # 第1部分：产品目录代理（将通过 A2A 暴露）
 # ============================================================================
@@ -119,30 +123,82 @@ def create_product_catalog_server_file():
 
     server_code = f'''
 import os
+import sys
+sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})
+
+# to_a2a() 在应用启动时才导入 A2A 请求处理器和路由。
+# 在这里导入，a2a_launcher.py 就能在派生工作进程之前只加载一次，
+# 而不是每个工作进程各加载一次
+import a2a.server.request_handlers  # noqa: F401
+import a2a.server.routes  # noqa: F401
+from a2a_streaming import streaming_executor_factory
+from catalog_index import CatalogIndex
 from google.adk.agents import LlmAgent
 from google.adk.a2a.utils.agent_to_a2a import to_a2a
 from google.adk.models.lite_llm import LiteLlm
-from google.genai import types
+
+PRODUCT_CATALOG = {{
+    "iphone 15 pro": "iPhone 15 Pro, $999, 库存低 (8 台), 128GB, 钛金属饰面",
+    "samsung galaxy s24": "Samsung Galaxy S24, $799, 有库存 (31 台), 256GB, 幻影黑",
+    "dell xps 15": "Dell XPS 15, $1,299, 有库存 (45 台), 15.6\\" 显示屏, 16GB 内存, 512GB SSD",
+    "macbook pro 14": "MacBook Pro 14\\", $1,999, 有库存 (22 台), M3 Pro 芯片, 18GB 内存, 512GB SSD",
+    "sony wh-1000xm5": "Sony WH-1000XM5 耳机, $399, 有库存 (67 台), 降噪, 30 小时电池",
+    "ipad air": "iPad Air, $599, 有库存 (28 台), 10.9\\" 显示屏, 64GB",
+    "lg ultrawide 34": "LG UltraWide 34\\" 显示器, $499, 无库存, 预计：下周",
+}}
+
+# 把 PRODUCT_CATALOG_PATH 设为 CSV 文件或 SQLite 数据库，即可改用该目录
+# （列：sku, name, price, availability, specs）
+if os.environ.get("PRODUCT_CATALOG_PATH"):
+    CATALOG = CatalogIndex.load(os.environ["PRODUCT_CATALOG_PATH"])
+else:
+    CATALOG = CatalogIndex.from_descriptions(PRODUCT_CATALOG)
+
+def suggest(product_name: str) -> list[str]:
+    """最接近的产品名称，最佳匹配在前。"""
+    return [product.name for product, _ in CATALOG.search(product_name, limit=3)]
 
 def get_product_info(product_name: str) -> str:
-    """获取给定产品的产品信息。"""
-    product_catalog = {{
-        "iphone 15 pro": "iPhone 15 Pro, $999, 库存低 (8 台), 128GB, 钛金属饰面",
-        "samsung galaxy s24": "Samsung Galaxy S24, $799, 有库存 (31 台), 256GB, 幻影黑",
-        "dell xps 15": "Dell XPS 15, $1,299, 有库存 (45 台), 15.6\\" 显示屏, 16GB 内存, 512GB SSD",
-        "macbook pro 14": "MacBook Pro 14\\", $1,999, 有库存 (22 台), M3 Pro 芯片, 18GB 内存, 512GB SSD",
-        "sony wh-1000xm5": "Sony WH-1000XM5 耳机, $399, 有库存 (67 台), 降噪, 30 小时电池",
-        "ipad air": "iPad Air, $599, 有库存 (28 台), 10.9\\" 显示屏, 64GB",
-        "lg ultrawide 34": "LG UltraWide 34\\" 显示器, $499, 无库存, 预计：下周",
-    }}
+    """获取给定产品的产品信息。
 
-    product_lower = product_name.lower().strip()
+    名称可以不完整或有拼写错误，也可以是 SKU。
+    """
+    product = CATALOG.lookup(product_name)
+
+    if product is not None:
+        return f"产品: {{product}}"
+    suggestions = suggest(product_name)
+    if suggestions:
+        return f"抱歉，我没有 {{product_name}} 的信息。您是否要找: {{', '.join(suggestions)}}？"
+    return f"抱歉，我没有 {{product_name}} 的信息。"
+
+def get_products_info(product_names: list[str]) -> dict:
+    """一次调用获取多个产品的产品信息。
+
+    比较产品或回答涉及多个产品的问题时使用此工具，而不是对每个产品各调用一次
+    get_product_info。
+
+    Args:
+        product_names: 要查找的产品，例如 ["iPhone 15 Pro", "iPad Air"]。
+
+    Returns:
+        每个请求的产品对应一项、顺序与请求相同的字典。
+        找到：{{"query": "sony wh1000xm5", "found": True, "sku": "sony wh-1000xm5",
+               "name": "Sony WH-1000XM5 耳机", "price": "$399",
+               "availability": "有库存 (67 台)",
+               "specs": ["降噪", "30 小时电池"]}}
+        未找到：{{"query": "pixel 9", "found": False, "suggestions": [...]}}
+    """
+    products = []
+    for product_name in product_names:
+        product = CATALOG.lookup(product_name)
+        if product is None:
+            products.append({{"query": product_name, "found": False,
+                              "suggestions": suggest(product_name)}})
+        else:
+            products.append({{"query": product_name, "found": True, **product.to_dict()}})
 
-    if product_lower in product_catalog:
-        return f"产品: {{product_catalog[product_lower]}}"
-    else:
-        available = ", ".join([p.title() for p in product_catalog.keys()])
-        return f"抱歉，我没有 {{product_name}} 的信息。可用产品: {{available}}"
+    return {{"status": "success", "products": products}}
 
 product_catalog_agent = LlmAgent(
     model=LiteLlm(
@@ -155,14 +211,14 @@ product_catalog_agent = LlmAgent(
     您是来自外部供应商的产品目录专家。
     当被问及产品时，使用 get_product_info 工具从目录中获取数据。
     提供清晰、准确的产品信息，包括价格、可用性和规格。
-    如果被问及多个产品，请逐个查找。
+    如果被问及多个产品，请用一次 get_products_info 调用查找所有产品。
     保持专业和乐于助人。
     """,
-    tools=[get_product_info]
+    tools=[get_product_info, get_products_info]
 )
 
-# 创建 A2A 应用
-app = to_a2a(product_catalog_agent, port=8001)
+# 创建 A2A 应用，生成过程中即把部分响应流式发送给客户端
+app = to_a2a(product_catalog_agent, port=8001, agent_executor_factory=streaming_executor_factory)
 '''
 
     # 写入临时文件
@@ -174,50 +230,43 @@ app = to_a2a(product_catalog_agent, port=8001)
     return server_file
 
 
-def start_product_catalog_server():
-    """在后台启动产品目录代理服务器"""
+def start_product_catalog_server(workers: int = 1):
+    """
+    在后台启动产品目录代理服务器
+
+    Args:
+        workers: 服务 8001 端口的工作进程数（a2a_launcher.py）。Windows 没有
+            os.fork，无论此值为多少都只由一个进程服务该端口
+    """
 
     # 创建服务器文件
     server_file = create_product_catalog_server_file()
 
-    # 在后台启动 uvicorn 服务器
+    # 在后台启动服务器：启动器预加载应用、派生工作进程，
+    # 并在所有工作进程报告就绪后返回
     print("\n🚀 启动产品目录代理服务器...")
     print("   等待服务器准备就绪...")
 
-    server_process = subprocess.Popen(
-        [
-            "uvicorn",
-            "product_catalog_server:app",
-            "--host",
-            "localhost",
-            "--port",
-            "8001",
-        ],
-        cwd="/tmp",
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        env={**os.environ},
-    )
-
-    # 等待服务器启动
-    max_attempts = 30
-    for attempt in range(max_attempts):
+    # 使用日志文件而不是管道：没有人读取管道，缓冲区写满后服务器会阻塞。
+    # 服务器持有自己的文件描述符副本，因此启动后关闭我们这一份
+    with open(SERVER_LOG, "w") as log:
         try:
-            response = requests.get(
-                "http://localhost:8001/.well-known/agent-card.json", timeout=1
+            server_process = start_server(
+                "product_catalog_server:app",
+                port=8001,
+                workers=workers,
+                app_dir=os.path.dirname(server_file),
+                stdout=log,
+                env={**os.environ},
             )
-            if response.status_code == 200:
-                print(f"\n✅ 产品目录代理服务器正在运行！")
-                print(f"   服务器 URL：http://localhost:8001")
-                print(
-                    f"   代理卡片：http://localhost:8001/.well-known/agent-card.json"
-                )
-                break
-        except requests.exceptions.RequestException:
-            time.sleep(1)
-            print(".", end="", flush=True)
-    else:
-        print("\n⚠️  服务器可能尚未准备就绪。如果需要，请手动检查。")
+        except ServerStartError as e:
+            print(f"\n⚠️  {e}。详情请查看 {SERVER_LOG}。")
+            return e.process
+
+    print(f"\n✅ 产品目录代理服务器正在运行！")
+    print(f"   服务器 URL：http://localhost:8001")
+    print(f"   代理卡片：http://localhost:8001/.well-known/agent-card.json")
+    print(f"   工作进程：{workers}")
 
     return server_process
 
@@ -257,16 +306,18 @@ def view_agent_card():
 def create_customer_support_agent():
     """创建消费产品目录代理的客户支持代理"""
 
-    # 创建连接到产品目录代理的 RemoteA2aAgent
-    remote_product_catalog_agent = RemoteA2aAgent(
+    # 创建连接到产品目录代理的 RemoteA2aAgent。连接池让各远程代理共享
+    # keep-alive 连接和缓存的代理卡片
+    remote_product_catalog_agent = get_default_pool().remote_agent(
         name="product_catalog_agent",
         description="来自外部供应商的远程产品目录代理，提供产品信息。",
-        agent_card=f"http://localhost:8001{AGENT_CARD_WELL_KNOWN_PATH}",
+        agent_card_url=f"http://localhost:8001{AGENT_CARD_WELL_KNOWN_PATH}",
     )
 
     print("\n✅ 远程产品目录代理代理创建成功！")
     print(f"   连接到：http://localhost:8001")
     print(f"   代理卡片：http://localhost:8001{AGENT_CARD_WELL_KNOWN_PATH}")
+    print("   连接：共享的 keep-alive 连接池，代理卡片已缓存（ETag）")
     print("   客户支持代理现在可以像本地子代理一样使用它！")
 
     # 创建客户支持代理
@@ -281,7 +332,8 @@ def create_customer_support_agent():
         您是一个友好且专业的客户支持代理。
 
         当客户询问产品时：
-        1. 使用 product_catalog_agent 子代理查找产品信息
+        1. 使用 product_catalog_agent 子代理查找产品信息。
+           涉及多个产品的问题（例如比较）请在一次请求中询问所有产品
         2. 提供关于价格、可用性和规格的清晰答案
         3. 如果产品缺货，提及预计可用时间
         4. 保持乐于助人和专业！
@@ -334,14 +386,27 @@ async def test_a2a_communication(customer_support_agent, user_query: str):
     print(f"\n🎧 支持代理响应：")
     print("-" * 60)
 
-    # 运行代理
+    # 以流式方式运行代理：部分事件携带正在生成的响应，
+    # 包括经 A2A 转发的远程代理回答
+    streamed = False
     async for event in runner.run_async(
-        user_id=user_id, session_id=session_id, new_message=test_content
+        user_id=user_id,
+        session_id=session_id,
+        new_message=test_content,
+        run_config=RunConfig(streaming_mode=StreamingMode.SSE),
     ):
-        if event.is_final_response() and event.content:
-            for part in event.content.parts:
-                if hasattr(part, "text"):
-                    print(part.text)
+        if not event.content or not event.content.parts:
+            continue
+        text = "".join(
+            part.text for part in event.content.parts if part.text and not part.thought
+        )
+        if event.partial:
+            print(text, end="", flush=True)
+            streamed = streamed or bool(text)
+        elif event.is_final_response() and text:
+            # 流式响应已经逐块打印过了
+            print("" if streamed else text)
+            streamed = False
 
     print("-" * 60)
 
@@ -413,6 +478,7 @@ async def main():
     print("清理")
     print("=" * 80)
     print("\n🛑 停止产品目录服务器...")
+    await get_default_pool().aclose()
     server_process.terminate()
     server_process.wait()
     print("✅ 服务器已停止")
@@ -14,8 +14,6 @@ Licensed under the Apache License, Version 2.0
 
 import os
 import json
-import time
-import subprocess
 import requests
 import uuid
 from dotenv import load_dotenv
@@ -26,11 +24,15 @@ from google.adk.agents.remote_a2a_agent import (
     AGENT_CARD_WELL_KNOWN_PATH,
 )
 from google.adk.a2a.utils.agent_to_a2a import to_a2a
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.models.google_llm import Gemini
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
 
+from a2a_client_pool import get_default_pool
+from a2a_launcher import ServerStartError, start_server
+
 # ============================================================================
 # Setup and Configuration
 # ============================================================================
@@ -58,6 +60,8 @@ retry_config = types.HttpRetryOptions(
     http_status_codes=[429, 500, 503, 504],
 )
 
+SERVER_LOG = "/tmp/product_catalog_server.log"
+
 # ============================================================================
 # Section 1: Product Catalog Agent (To Be Exposed via A2A)
 # ============================================================================
@@ -122,13 +126,42 @@ def create_product_catalog_agent():
 # ============================================================================
 
 
-def create_product_catalog_server_file():
-    """Create a standalone Python file for the A2A server"""
+def create_product_catalog_server_file(
+    offline: bool = False,
+    model_latency: float = 0.2,
+    streaming: bool = True,
+    token_latency: float = 0.0,
+    batch_lookup: bool = True,
+    response_cache: bool = False,
+    admission_control: bool = False,
+):
+    """
+    Create a standalone Python file for the A2A server
 
-    server_code = f'''
-import os
-from google.adk.agents import LlmAgent
-from google.adk.a2a.utils.agent_to_a2a import to_a2a
+    Args:
+        offline: Use catalog_model.CatalogModel instead of Gemini, so the
+            server runs without an API key (for benchmarks)
+        model_latency: Simulated seconds per model call when offline
+        streaming: Stream partial responses to A2A clients as they are
+            generated (a2a_streaming.py)
+        token_latency: Simulated seconds between streamed chunks when offline
+        batch_lookup: Give the agent get_products_info, which looks up several
+            products in one tool call, in addition to get_product_info
+        response_cache: Answer repeated questions from a response cache
+            (a2a_response_cache.py), with metrics at /cache/metrics
+        admission_control: Rate-limit each client and shed load beyond a
+            bounded queue with 503 (a2a_admission_control.py), with metrics
+            at /admission/metrics
+    """
+
+    if offline:
+        model_setup = f'''
+from catalog_model import CatalogModel
+
+model = CatalogModel(latency={model_latency}, token_latency={token_latency})
+'''
+    else:
+        model_setup = '''
 from google.adk.models.google_llm import Gemini
 from google.genai import types
 
@@ -139,42 +172,143 @@ retry_config = types.HttpRetryOptions(
     http_status_codes=[429, 500, 503, 504],
 )
 
-def get_product_info(product_name: str) -> str:
-    """Get product information for a given product."""
-    product_catalog = {{
-        "iphone 15 pro": "iPhone 15 Pro, $999, Low Stock (8 units), 128GB, Titanium finish",
-        "samsung galaxy s24": "Samsung Galaxy S24, $799, In Stock (31 units), 256GB, Phantom Black",
-        "dell xps 15": "Dell XPS 15, $1,299, In Stock (45 units), 15.6\\" display, 16GB RAM, 512GB SSD",
-        "macbook pro 14": "MacBook Pro 14\\", $1,999, In Stock (22 units), M3 Pro chip, 18GB RAM, 512GB SSD",
-        "sony wh-1000xm5": "Sony WH-1000XM5 Headphones, $399, In Stock (67 units), Noise-canceling, 30hr battery",
-        "ipad air": "iPad Air, $599, In Stock (28 units), 10.9\\" display, 64GB",
-        "lg ultrawide 34": "LG UltraWide 34\\" Monitor, $499, Out of Stock, Expected: Next week",
-    }}
+model = Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config)
+'''
 
-    product_lower = product_name.lower().strip()
+    if response_cache:
+        executor_factory = "streaming_executor_factory" if streaming else "None"
+        app_setup = f'''from a2a_response_cache import ResponseCache, add_cache_metrics_route, caching_executor_factory
+
+# Repeated first questions are answered from the cache, without running the
+# agent. A reworded question only reuses an answer if it names the same
+# catalog words ("MacBook Air 14" never gets the "MacBook Pro 14" answer)
+cache = ResponseCache(ttl=300, semantic_threshold=0.9, key_terms=CATALOG.name_tokens)
+app = to_a2a(
+    product_catalog_agent,
+    port=8001,
+    agent_executor_factory=caching_executor_factory(cache, {executor_factory}),
+)
+add_cache_metrics_route(app, cache)'''
+    elif streaming:
+        app_setup = "app = to_a2a(product_catalog_agent, port=8001, agent_executor_factory=streaming_executor_factory)"
+    else:
+        app_setup = "app = to_a2a(product_catalog_agent, port=8001)"
 
-    if product_lower in product_catalog:
-        return f"Product: {{product_catalog[product_lower]}}"
+    if admission_control:
+        app_setup += '''
+
+from a2a_admission_control import AdmissionControl, add_admission_control
+
+# At most 32 agent runs at once and 32 waiting; each client IP may send 5
+# requests per second (bursts of 10). The rest get 429 / 503 with Retry-After.
+# A2A_TRUST_CLIENT_HEADER=1 limits by X-Client-Id instead: only set it behind a
+# proxy that sets the header (or in the local benchmark)
+add_admission_control(app, AdmissionControl(
+    rate=5, burst=10, max_concurrent=32, max_queue=32,
+    trust_client_header=os.environ.get("A2A_TRUST_CLIENT_HEADER") == "1",
+))'''
+
+    if batch_lookup:
+        tools = "get_product_info, get_products_info"
+        multiple_products = "If asked about multiple products, look them all up with a single get_products_info call."
     else:
-        available = ", ".join([p.title() for p in product_catalog.keys()])
-        return f"Sorry, I don't have information for {{product_name}}. Available products: {{available}}"
+        tools = "get_product_info"
+        multiple_products = "If asked about multiple products, look up each one."
+
+    server_code = f'''
+import os
+import sys
+sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})
+
+# to_a2a() imports the A2A request handlers and routes when the app starts.
+# Importing them here lets a2a_launcher.py load them once, before it forks the
+# workers, instead of once in every worker
+import a2a.server.request_handlers  # noqa: F401
+import a2a.server.routes  # noqa: F401
+from a2a_streaming import streaming_executor_factory
+from catalog_index import CatalogIndex
+from google.adk.agents import LlmAgent
+from google.adk.a2a.utils.agent_to_a2a import to_a2a
+{model_setup}
+PRODUCT_CATALOG = {{
+    "iphone 15 pro": "iPhone 15 Pro, $999, Low Stock (8 units), 128GB, Titanium finish",
+    "samsung galaxy s24": "Samsung Galaxy S24, $799, In Stock (31 units), 256GB, Phantom Black",
+    "dell xps 15": "Dell XPS 15, $1,299, In Stock (45 units), 15.6\\" display, 16GB RAM, 512GB SSD",
+    "macbook pro 14": "MacBook Pro 14\\", $1,999, In Stock (22 units), M3 Pro chip, 18GB RAM, 512GB SSD",
+    "sony wh-1000xm5": "Sony WH-1000XM5 Headphones, $399, In Stock (67 units), Noise-canceling, 30hr battery",
+    "ipad air": "iPad Air, $599, In Stock (28 units), 10.9\\" display, 64GB",
+    "lg ultrawide 34": "LG UltraWide 34\\" Monitor, $499, Out of Stock, Expected: Next week",
+}}
+
+# Set PRODUCT_CATALOG_PATH to a CSV file or SQLite database to serve that
+# catalog instead (columns: sku, name, price, availability, specs)
+if os.environ.get("PRODUCT_CATALOG_PATH"):
+    CATALOG = CatalogIndex.load(os.environ["PRODUCT_CATALOG_PATH"])
+else:
+    CATALOG = CatalogIndex.from_descriptions(PRODUCT_CATALOG)
+
+def suggest(product_name: str) -> list[str]:
+    """Names of the closest products, best first."""
+    return [product.name for product, _ in CATALOG.search(product_name, limit=3)]
+
+def get_product_info(product_name: str) -> str:
+    """Get product information for a given product.
+
+    The name may be partial or misspelled, or a SKU.
+    """
+    product = CATALOG.lookup(product_name)
+
+    if product is not None:
+        return f"Product: {{product}}"
+    suggestions = suggest(product_name)
+    if suggestions:
+        return f"Sorry, I don't have information for {{product_name}}. Did you mean: {{', '.join(suggestions)}}?"
+    return f"Sorry, I don't have information for {{product_name}}."
+
+def get_products_info(product_names: list[str]) -> dict:
+    """Get product information for several products in one call.
+
+    Use this to compare products or to answer a question about more than one
+    product, instead of calling get_product_info once per product.
+
+    Args:
+        product_names: The products to look up, e.g. ["iPhone 15 Pro", "iPad Air"].
+
+    Returns:
+        Dictionary with one entry per requested product, in the same order.
+        Found: {{"query": "sony wh1000xm5", "found": True, "sku": "sony wh-1000xm5",
+                 "name": "Sony WH-1000XM5 Headphones", "price": "$399",
+                 "availability": "In Stock (67 units)",
+                 "specs": ["Noise-canceling", "30hr battery"]}}
+        Not found: {{"query": "pixel 9", "found": False, "suggestions": [...]}}
+    """
+    products = []
+    for product_name in product_names:
+        product = CATALOG.lookup(product_name)
+        if product is None:
+            products.append({{"query": product_name, "found": False,
+                              "suggestions": suggest(product_name)}})
+        else:
+            products.append({{"query": product_name, "found": True, **product.to_dict()}})
+
+    return {{"status": "success", "products": products}}
 
 product_catalog_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
+    model=model,
     name="product_catalog_agent",
     description="External vendor's product catalog agent that provides product information and availability.",
     instruction="""
     You are a product catalog specialist from an external vendor.
     When asked about products, use the get_product_info tool to fetch data from the catalog.
     Provide clear, accurate product information including price, availability, and specs.
-    If asked about multiple products, look up each one.
+    {multiple_products}
     Be professional and helpful.
     """,
-    tools=[get_product_info]
+    tools=[{tools}]
 )
 
 # Create the A2A app
-app = to_a2a(product_catalog_agent, port=8001)
+{app_setup}
 '''
 
     # Write to temp file
@@ -186,50 +320,59 @@ app = to_a2a(product_catalog_agent, port=8001)
     return server_file
 
 
-def start_product_catalog_server():
-    """Start the Product Catalog Agent server in the background"""
+def start_product_catalog_server(
+    offline: bool = False,
+    model_latency: float = 0.2,
+    streaming: bool = True,
+    token_latency: float = 0.0,
+    workers: int = 1,
+    batch_lookup: bool = True,
+    response_cache: bool = False,
+    admission_control: bool = False,
+):
+    """
+    Start the Product Catalog Agent server in the background
+
+    Args:
+        workers: Worker processes serving port 8001 (a2a_launcher.py). Windows
+            has no os.fork: there one process serves the port, whatever this is
+        batch_lookup: Give the agent the batched get_products_info tool
+        response_cache: Serve repeated questions from a response cache
+        admission_control: Rate-limit clients and shed load beyond a bounded queue
+    """
 
     # Create server file
-    server_file = create_product_catalog_server_file()
+    server_file = create_product_catalog_server_file(
+        offline, model_latency, streaming, token_latency, batch_lookup, response_cache,
+        admission_control,
+    )
 
-    # Start uvicorn server in background
+    # Start the server in background: the launcher preloads the app, forks the
+    # workers and returns once all of them report that they are ready
     print("\n🚀 Starting Product Catalog Agent server...")
     print("   Waiting for server to be ready...")
 
-    server_process = subprocess.Popen(
-        [
-            "uvicorn",
-            "product_catalog_server:app",
-            "--host",
-            "localhost",
-            "--port",
-            "8001",
-        ],
-        cwd="/tmp",
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        env={**os.environ},
-    )
-
-    # Wait for server to start
-    max_attempts = 30
-    for attempt in range(max_attempts):
+    # A log file instead of pipes: nobody reads the pipes, and once their buffer
+    # is full the server blocks on its next log line. The server keeps its own
+    # copy of the file descriptor, so ours is closed once it has started
+    with open(SERVER_LOG, "w") as log:
         try:
-            response = requests.get(
-                "http://localhost:8001/.well-known/agent-card.json", timeout=1
+            server_process = start_server(
+                "product_catalog_server:app",
+                port=8001,
+                workers=workers,
+                app_dir=os.path.dirname(server_file),
+                stdout=log,
+                env={**os.environ},
             )
-            if response.status_code == 200:
-                print(f"\n✅ Product Catalog Agent server is running!")
-                print(f"   Server URL: http://localhost:8001")
-                print(
-                    f"   Agent card: http://localhost:8001/.well-known/agent-card.json"
-                )
-                break
-        except requests.exceptions.RequestException:
-            time.sleep(1)
-            print(".", end="", flush=True)
-    else:
-        print("\n⚠️  Server may not be ready yet. Check manually if needed.")
+        except ServerStartError as e:
+            print(f"\n⚠️  {e}. Check {SERVER_LOG} for details.")
+            return e.process
+
+    print(f"\n✅ Product Catalog Agent server is running!")
+    print(f"   Server URL: http://localhost:8001")
+    print(f"   Agent card: http://localhost:8001/.well-known/agent-card.json")
+    print(f"   Workers: {workers}")
 
     return server_process
 
@@ -269,16 +412,18 @@ def view_agent_card():
 def create_customer_support_agent():
     """Create the Customer Support Agent that consumes the Product Catalog Agent"""
 
-    # Create a RemoteA2aAgent that connects to Product Catalog Agent
-    remote_product_catalog_agent = RemoteA2aAgent(
+    # Create a RemoteA2aAgent that connects to Product Catalog Agent. The pool
+    # shares keep-alive connections and cached agent cards between remote agents
+    remote_product_catalog_agent = get_default_pool().remote_agent(
         name="product_catalog_agent",
         description="Remote product catalog agent from external vendor that provides product information.",
-        agent_card=f"http://localhost:8001{AGENT_CARD_WELL_KNOWN_PATH}",
+        agent_card_url=f"http://localhost:8001{AGENT_CARD_WELL_KNOWN_PATH}",
     )
 
     print("\n✅ Remote Product Catalog Agent proxy created!")
     print(f"   Connected to: http://localhost:8001")
     print(f"   Agent card: http://localhost:8001{AGENT_CARD_WELL_KNOWN_PATH}")
+    print("   Connections: shared keep-alive pool, agent card cached (ETag)")
     print("   The Customer Support Agent can now use this like a local sub-agent!")
 
     # Create the Customer Support Agent
@@ -290,7 +435,9 @@ def create_customer_support_agent():
         You are a friendly and professional customer support agent.
 
         When customers ask about products:
-        1. Use the product_catalog_agent sub-agent to look up product information
+        1. Use the product_catalog_agent sub-agent to look up product information.
+           For questions about several products (e.g. comparisons), ask about all
+           of them in one request
         2. Provide clear answers about pricing, availability, and specifications
         3. If a product is out of stock, mention the expected availability
         4. Be helpful and professional!
@@ -343,14 +490,27 @@ async def test_a2a_communication(customer_support_agent, user_query: str):
     print(f"\n🎧 Support Agent response:")
     print("-" * 60)
 
-    # Run the agent
+    # Run the agent with streaming: partial events carry the response as it is
+    # generated, including the remote agent's answer forwarded over A2A
+    streamed = False
     async for event in runner.run_async(
-        user_id=user_id, session_id=session_id, new_message=test_content
+        user_id=user_id,
+        session_id=session_id,
+        new_message=test_content,
+        run_config=RunConfig(streaming_mode=StreamingMode.SSE),
     ):
-        if event.is_final_response() and event.content:
-            for part in event.content.parts:
-                if hasattr(part, "text"):
-                    print(part.text)
+        if not event.content or not event.content.parts:
+            continue
+        text = "".join(
+            part.text for part in event.content.parts if part.text and not part.thought
+        )
+        if event.partial:
+            print(text, end="", flush=True)
+            streamed = streamed or bool(text)
+        elif event.is_final_response() and text:
+            # A streamed response has already been printed chunk by chunk
+            print("" if streamed else text)
+            streamed = False
 
     print("-" * 60)
 
@@ -422,6 +582,7 @@ async def main():
     print("CLEANUP")
     print("=" * 80)
     print("\n🛑 Stopping Product Catalog server...")
+    await get_default_pool().aclose()
     server_process.terminate()
     server_process.wait()
     print("✅ Server stopped")
@@ -0,0 +1,42 @@
+"""
+Tests for the per-client rate limit of a2a_admission_control.AdmissionControl.
+
+Run: python -m pytest test_a2a_admission_control.py
+"""
+
+import asyncio
+
+from a2a_admission_control import AdmissionControl
+
+
+def scope(client_id: str, ip: str = "203.0.113.7"):
+    return {
+        "type": "http",
+        "method": "POST",
+        "client": (ip, 50000),
+        "headers": [(b"x-client-id", client_id.encode())],
+    }
+
+
+def statuses(control: AdmissionControl, scopes) -> list:
+    async def admit_all():
+        results = []
+        for request_scope in scopes:
+            rejection = await control.acquire(request_scope)
+            if rejection is None:
+                control.release(0.0)
+            results.append(200 if rejection is None else rejection[0])
+        return results
+
+    return asyncio.run(admit_all())
+
+
+def test_changing_the_client_header_does_not_dodge_the_limit():
+    control = AdmissionControl(rate=0.001, burst=2)
+    assert statuses(control, [scope(f"client-{i}") for i in range(4)]) == [200, 200, 429, 429]
+
+
+def test_trusted_client_header_separates_clients():
+    control = AdmissionControl(rate=0.001, burst=2, trust_client_header=True)
+    assert statuses(control, [scope(f"client-{i}") for i in range(4)]) == [200] * 4
+    assert statuses(control, [scope("client-0")] * 2) == [200, 429]
@@ -0,0 +1,68 @@
+"""
+Tests for a2a_client_pool.py, including the private RemoteA2aAgent API that
+PooledRemoteA2aAgent relies on.
+
+Run: python -m pytest test_a2a_client_pool.py
+"""
+
+import asyncio
+import inspect
+
+import httpx
+import pytest
+from google.adk.agents.remote_a2a_agent import RemoteA2aAgent
+
+import a2a_client_pool
+from a2a_client_pool import A2AConnectionPool, get_default_pool
+
+CARD_URL = "http://localhost:8001/.well-known/agent-card.json"
+CARD = {"name": "product_catalog_agent", "description": "Product catalog", "version": "1.0"}
+
+
+def make_pool(requests: list) -> A2AConnectionPool:
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        return httpx.Response(200, json=CARD, headers={"etag": '"v1"'})
+
+    pool = A2AConnectionPool()
+    pool._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return pool
+
+
+def test_remote_a2a_agent_still_has_the_overridden_card_resolver():
+    # PooledRemoteA2aAgent overrides this private method; fail loudly if ADK
+    # renames it or changes its parameters
+    method = getattr(RemoteA2aAgent, "_resolve_agent_card_from_url", None)
+    assert method is not None
+    assert list(inspect.signature(method).parameters) == ["self", "url", "ctx"]
+
+
+def test_agents_resolve_cards_through_the_pool_cache():
+    requests = []
+    pool = make_pool(requests)
+
+    async def resolve_twice():
+        for _ in range(2):
+            agent = pool.remote_agent("product_catalog_agent", CARD_URL)
+            card = await agent._resolve_agent_card()
+            assert card.name == "product_catalog_agent"
+        await pool.aclose()
+
+    asyncio.run(resolve_twice())
+    assert requests == ["/.well-known/agent-card.json"]
+    assert pool.cards.stats == {"hits": 1, "revalidated": 0, "fetched": 1}
+
+
+def test_closed_pool_fails_fast_and_default_pool_is_replaced(monkeypatch):
+    pool = make_pool([])
+    agent = pool.remote_agent("product_catalog_agent", CARD_URL)
+    asyncio.run(pool.aclose())
+
+    with pytest.raises(RuntimeError, match="closed"):
+        pool.client
+    with pytest.raises(RuntimeError, match="closed"):
+        asyncio.run(agent._resolve_agent_card())
+
+    monkeypatch.setattr(a2a_client_pool, "_default_pool", pool)
+    assert get_default_pool() is not pool
+    assert not get_default_pool().closed
@@ -0,0 +1,59 @@
+"""
+Tests for a2a_launcher.start_server, including the agent-card polling used
+where os.fork is not available (Windows).
+
+Run: python -m pytest test_a2a_launcher.py
+"""
+
+import socket
+import urllib.request
+
+import pytest
+
+import a2a_launcher
+from a2a_launcher import AGENT_CARD_PATH, ServerStartError, start_server
+
+APP = '''
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+async def card(request):
+    return JSONResponse({"name": "test_agent"})
+
+
+app = Starlette(routes=[Route("/.well-known/agent-card.json", card)])
+'''
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(params=[True, False], ids=["fork", "no-fork"])
+def can_fork(request, monkeypatch):
+    monkeypatch.setattr(a2a_launcher, "CAN_FORK", request.param)
+    return request.param
+
+
+def test_start_server_returns_once_the_agent_card_is_served(can_fork, tmp_path):
+    (tmp_path / "card_app.py").write_text(APP)
+    port = free_port()
+    server = start_server("card_app:app", port=port, app_dir=str(tmp_path), timeout=20)
+    try:
+        with urllib.request.urlopen(f"http://localhost:{port}{AGENT_CARD_PATH}") as response:
+            assert response.status == 200
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def test_server_that_fails_to_import_raises(can_fork, tmp_path):
+    (tmp_path / "broken_app.py").write_text("raise ImportError('missing dependency')\n")
+    with open(tmp_path / "server.log", "w") as log, \
+            pytest.raises(ServerStartError, match="exited with code"):
+        start_server("broken_app:app", port=free_port(), app_dir=str(tmp_path), timeout=20,
+                     stdout=log)
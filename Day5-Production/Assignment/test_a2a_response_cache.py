@@ -0,0 +1,107 @@
+"""
+Tests for the semantic matching of a2a_response_cache.ResponseCache, and for
+CachingAgentExecutor sharing one run between identical questions.
+
+Run: python -m pytest test_a2a_response_cache.py
+"""
+
+import asyncio
+
+import pytest
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import TaskUpdater
+from a2a.types import Message, Part, Role, SendMessageRequest
+
+from a2a_response_cache import CachingAgentExecutor, ResponseCache
+from catalog_index import CatalogIndex
+
+CATALOG = CatalogIndex.from_descriptions({
+    "iphone 15 pro": "iPhone 15 Pro, $999, Low Stock (8 units), 128GB",
+    "dell xps 15": "Dell XPS 15, $1,299, In Stock (45 units), 16GB RAM",
+    "macbook pro 14": "MacBook Pro 14\", $1,999, In Stock (22 units), M3 Pro chip",
+    "ipad air": "iPad Air, $599, In Stock (28 units), 64GB",
+})
+VERSION = "v1"
+LONG_QUESTION = ("Could you tell me the price, colors, storage options, warranty and "
+                 "shipping time for the {}?")
+
+
+def make_cache() -> ResponseCache:
+    return ResponseCache(semantic_threshold=0.9, key_terms=CATALOG.name_tokens)
+
+
+@pytest.mark.parametrize("cached, asked", [
+    (LONG_QUESTION.format("MacBook Pro 14"), LONG_QUESTION.format("MacBook Air 14")),
+    ("Is the dell xps 15 laptop in stock and how much does the dell xps 15 laptop cost?",
+     "Is the hp xps 15 laptop in stock and how much does the hp xps 15 laptop cost?"),
+    ("Can you tell me about the iPhone 15 Pro? Is it in stock?",
+     "Can you tell me about the iPhone 14 Pro? Is it in stock?"),
+])
+def test_other_product_is_not_a_semantic_hit(cached, asked):
+    cache = make_cache()
+    cache.put(cached, VERSION, ["cached answer"])
+    assert cache.get(asked, VERSION) is None
+    assert cache.stats["semantic_hits"] == 0
+
+
+def test_rephrased_question_is_a_semantic_hit():
+    cache = make_cache()
+    cache.put("Can you tell me about the MacBook Pro 14? Is it in stock?", VERSION, ["answer"])
+    assert cache.get("Tell me about the macbook pro 14, is it in stock please?",
+                     VERSION) == ["answer"]
+    assert cache.stats["semantic_hits"] == 1
+
+
+class FlakyExecutor(AgentExecutor):
+    """Fails its first run, answers every later one; each run takes 10 ms."""
+
+    def __init__(self):
+        self.runs = 0
+
+    async def execute(self, context, event_queue) -> None:
+        self.runs += 1
+        await asyncio.sleep(0.01)
+        if self.runs == 1:
+            raise RuntimeError("model unavailable")
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.add_artifact([Part(text="answer")], last_chunk=True)
+        await updater.complete()
+
+    async def cancel(self, context, event_queue) -> None:
+        pass
+
+
+class ListQueue:
+    def __init__(self):
+        self.events = []
+
+    async def enqueue_event(self, event) -> None:
+        self.events.append(event)
+
+
+def make_context(index: int) -> RequestContext:
+    message = Message(role=Role.ROLE_USER, message_id=f"m{index}",
+                      parts=[Part(text="Tell me about the iPad Air")])
+    return RequestContext(ServerCallContext(), SendMessageRequest(message=message),
+                          task_id=f"task-{index}", context_id=f"context-{index}")
+
+
+def test_failed_shared_run_is_retried_once_for_all_waiters():
+    flaky = FlakyExecutor()
+    cache = make_cache()
+    executor = CachingAgentExecutor(flaky, cache, VERSION)
+
+    async def ask_four_times():
+        return await asyncio.gather(
+            *(executor.execute(make_context(i), ListQueue()) for i in range(4)),
+            return_exceptions=True,
+        )
+
+    outcomes = asyncio.run(ask_four_times())
+    assert isinstance(outcomes[0], RuntimeError)
+    assert outcomes[1:] == [None] * 3
+    # One waiter ran the agent again, the other two shared its answer
+    assert flaky.runs == 2
+    assert cache.stats["misses"] == 2 and cache.stats["shared_runs"] == 2
+    assert cache.pending("Tell me about the iPad Air", VERSION) is None